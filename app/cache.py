@@ -0,0 +1,207 @@
+"""
+Caches em memória do processo (por worker).
+
+Nada aqui é compartilhado entre workers. Para os caches de usuário, token
+e mídia isso só custa hits; o read-your-writes (recent_writers) depende
+disso: ele só vale se o request seguinte do usuário cair no mesmo worker.
+Com réplica de leitura (DATABASE_READ_URL), rode um único worker ou use
+sessões sticky por usuário no balanceador; senão, outro worker pode ler da
+réplica uma escrita que ela ainda não recebeu.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.config import settings
+from app.models import User
+
+
+class TTLCache:
+    """
+    Cache LRU limitado com expiração por entrada.
+
+    Thread-safe: os handlers síncronos rodam no threadpool do Starlette.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Incrementado a cada invalidate (ver o `generation` de set)
+        self.generation = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None (conta hit/miss)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None) -> None:
+        """
+        Armazena valor; `ttl` sobrescreve o TTL padrão para esta entrada.
+        Com `generation` (lido antes de consultar o banco), não grava se houve
+        invalidate desde então: o valor lido pode ser anterior a ele.
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a entrada, se existir."""
+        with self._lock:
+            self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        """Esvazia o cache e zera os contadores."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Contadores para diagnóstico (ver /debug/cache)."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# ==================== USER CACHE ====================
+user_cache = TTLCache(settings.user_cache_max_size, settings.user_cache_ttl_seconds)
+
+_USER_COLUMNS = ("id", "email", "name", "hashed_password", "created_at", "updated_at")
+
+
+def cache_user(user: User, generation: int) -> None:
+    """
+    Guarda uma cópia desanexada (só colunas) do usuário. `generation` é
+    user_cache.generation lido antes da consulta que carregou `user`.
+    """
+    snapshot = User(**{name: getattr(user, name) for name in _USER_COLUMNS})
+    make_transient_to_detached(snapshot)
+    user_cache.set(user.id, snapshot, generation=generation)
+
+
+def get_cached_user(db: Session, user_id: int) -> Optional[User]:
+    """
+    Retorna o usuário do cache anexado à sessão atual, sem SQL.
+
+    `merge(load=False)` cria uma cópia ligada à sessão sem consultar o banco;
+    relacionamentos continuam lazy como num objeto carregado normalmente.
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        return None
+    return db.merge(snapshot, load=False)
+
+
+async def get_cached_user_async(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Versão assíncrona de get_cached_user."""
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        return None
+    return await db.merge(snapshot, load=False)
+
+
+# A invalidação espera o commit: no flush a linha antiga ainda é a
+# commitada, e um request concorrente poderia recolocá-la no cache.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _schedule_user_invalidation(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("users_to_invalidate", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users(session: Session) -> None:
+    for user_id in session.info.pop("users_to_invalidate", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_invalidations(session: Session) -> None:
+    session.info.pop("users_to_invalidate", None)
+
+
+# ==================== MEDIA CACHE (interning) ====================
+# (media_uri, media_type) -> id das mídias que já existem em `media`. O
+# catálogo guarda só a identidade, que nunca muda nem é apagada: a entrada
+# não expira. Ela entra no commit da transação que gravou a linha; num
+# rollback é descartada (ver app.crud.intern_media).
+media_cache = TTLCache(settings.media_cache_max_size, float("inf"))
+
+
+def cache_media(db: Union[Session, AsyncSession], rows: list[dict[str, Any]]) -> None:
+    """Agenda as linhas do catálogo gravadas nesta transação para o cache."""
+    db.info.setdefault("media_to_cache", []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_media(session: Session) -> None:
+    for row in session.info.pop("media_to_cache", ()):
+        media_cache.set((row["media_uri"], row["media_type"]), row["id"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_media(session: Session) -> None:
+    session.info.pop("media_to_cache", None)
+
+
+# ==================== READ-YOUR-WRITES ====================
+# Usuários que escreveram há menos de READ_YOUR_WRITES_SECONDS leem do
+# primário (ver app.deps.get_read_db): a réplica pode ainda não ter a escrita.
+# Só vale com um worker ou sessões sticky (ver o docstring do módulo).
+recent_writers = TTLCache(settings.user_cache_max_size, settings.read_your_writes_seconds)
+
+
+def mark_user_write(db: Union[Session, AsyncSession], user_id: int) -> None:
+    """Agenda o usuário para leituras no primário a partir do commit da sessão."""
+    db.info.setdefault("users_written", set()).add(user_id)
+
+
+def wrote_recently(user_id: int) -> bool:
+    return recent_writers.get(user_id) is not None
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_writers(session: Session) -> None:
+    for user_id in session.info.pop("users_written", ()):
+        recent_writers.set(user_id, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writers(session: Session) -> None:
+    session.info.pop("users_written", None)
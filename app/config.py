@@ -4,12 +4,45 @@ import os
 from pydantic import BaseModel
 from functools import lru_cache
 
+def _pre_ping_strategy(value: str) -> str:
+    """POOL_PRE_PING: always | idle | never (true/false continuam aceitos)."""
+    value = value.lower()
+    return {"true": "always", "false": "never"}.get(value, value)
+
 class Settings(BaseModel):
     database_url: str = os.getenv("DATABASE_URL") or os.getenv("database_url", "")
+    database_read_url: str = os.getenv("DATABASE_READ_URL", "")
+    read_your_writes_seconds: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
     sql_echo: bool = os.getenv("SQL_ECHO", "false").lower() == "true"
     secret_key: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    pool_size: int = int(os.getenv("POOL_SIZE", "5"))
+    max_overflow: int = int(os.getenv("MAX_OVERFLOW", "10"))
+    pool_timeout_seconds: float = float(os.getenv("POOL_TIMEOUT", "30"))
+    pool_recycle_seconds: int = int(os.getenv("POOL_RECYCLE", "-1"))
+    pool_pre_ping: str = _pre_ping_strategy(os.getenv("POOL_PRE_PING", "always"))
+    pool_pre_ping_idle_seconds: float = float(os.getenv("POOL_PRE_PING_IDLE_SECONDS", "30"))
+    log_level: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    log_format: str = os.getenv("LOG_FORMAT", "json").lower()
+    log_request_sample_rate: float = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "1.0"))
+    log_slow_request_ms: float = float(os.getenv("LOG_SLOW_REQUEST_MS", "500"))
+    query_budget: str = os.getenv("QUERY_BUDGET", "off").lower()  # off | warn | error
+    query_budget_default: int = int(os.getenv("QUERY_BUDGET_DEFAULT", "10"))
+    query_repeat_limit: int = int(os.getenv("QUERY_REPEAT_LIMIT", "3"))
+    auto_migrate: bool = os.getenv("AUTO_MIGRATE", "true").lower() == "true"
+    sqlite_tuning: bool = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    sqlite_cache_size_kib: int = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536"))
+    sqlite_read_pool_size: int = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+    async_db: bool = os.getenv("ASYNC_DB", "false").lower() == "true"
+    user_cache_ttl_seconds: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    user_cache_max_size: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    token_cache_max_size: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+    media_cache_max_size: int = int(os.getenv("MEDIA_CACHE_MAX_SIZE", "50000"))
+    position_flush_interval_seconds: float = float(os.getenv("POSITION_FLUSH_INTERVAL_SECONDS", "5"))
+    position_flush_max_pending: int = int(os.getenv("POSITION_FLUSH_MAX_PENDING", "1000"))
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,16 +1,188 @@
-"""Operações CRUD."""
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+"""
+Operações CRUD.
+
+Unit of work: as funções apenas fazem flush (chaves geradas e defaults voltam
+via INSERT ... RETURNING); o commit é único por request, feito em app.db.get_db.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Union
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.models import (
-    User, Favorite, HistoryItem, Playlist, PlaylistItem,
-    Tag, MediaTag, Setting, Statistics, MediaType
+    Base, User, Media, Favorite, HistoryItem, Playlist, PlaylistItem,
+    Tag, MediaTag, Setting, Statistics, MediaType, SyncState, SyncChange, media_key, mozambique_now
 )
 from app import schemas
+from app.cache import cache_media, mark_user_write, media_cache
+from app.pagination import keyset
+from app.serialization import as_dicts, schema_columns
 from app.security import get_password_hash, verify_password
 
 
+# ==================== UPSERT ENGINE ====================
+_DIALECT_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def _upsert_stmt(
+    dialect: str,
+    model: type[Base],
+    values: Union[dict[str, Any], list[dict[str, Any]]],
+    conflict: Sequence[str],
+    update: Sequence[str],
+    extra_set: Union[dict[str, Any], Callable[[Any], dict[str, Any]], None] = None,
+    returning: bool = True,
+    where: Optional[Callable[[Any], Any]] = None,
+):
+    """
+    Monta INSERT ... ON CONFLICT (conflict) DO UPDATE SET ... RETURNING *.
+
+    `values` pode ser uma lista de linhas (INSERT multi-VALUES);
+    `update` lista as colunas copiadas da linha proposta (EXCLUDED);
+    `extra_set` permite expressões SQL (ex.: play_count + 1); se for
+    callable, recebe EXCLUDED (ex.: play_count + excluded.play_count);
+    `where` (callable sobre EXCLUDED) restringe quais conflitos atualizam.
+    Compartilhado com app.crud_async.
+    """
+    insert = _DIALECT_INSERTS.get(dialect)
+    if insert is None:
+        raise NotImplementedError(f"Upsert nativo não suportado para o dialeto '{dialect}'")
+    
+    stmt = insert(model).values(values)
+    set_ = {column: stmt.excluded[column] for column in update}
+    set_["updated_at"] = mozambique_now()
+    if callable(extra_set):
+        extra_set = extra_set(stmt.excluded)
+    if extra_set:
+        set_.update(extra_set)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(conflict),
+        set_=set_,
+        where=where(stmt.excluded) if where else None,
+    )
+    return stmt.returning(model) if returning else stmt
+
+
+def _upsert(db: Session, model: type[Base], **kwargs):
+    """Upsert nativo em um único statement (ver _upsert_stmt)."""
+    stmt = _upsert_stmt(db.get_bind().dialect.name, model, **kwargs)
+    return db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+
+# ==================== SYNC (change log) ====================
+# Entidades sincronizadas por GET /sync (nome = tabela)
+SYNC_MODELS: dict[str, type[Base]] = {
+    model.__tablename__: model
+    for model in (Favorite, HistoryItem, Playlist, PlaylistItem, Tag, MediaTag, Setting, Statistics)
+}
+
+
+def _owned_ids_select(model: type[Base], user_id: int):
+    """SELECT dos ids das linhas do usuário (itens e vínculos via o pai)."""
+    if model is PlaylistItem:
+        return select(PlaylistItem.id).join(Playlist, Playlist.id == PlaylistItem.playlist_id).where(Playlist.user_id == user_id)
+    if model is MediaTag:
+        return select(MediaTag.id).join(Tag, Tag.id == MediaTag.tag_id).where(Tag.user_id == user_id)
+    return select(model.id).where(model.user_id == user_id)
+
+
+def _seq_bump_stmt(dialect: str, user_id: int):
+    """Incrementa (ou cria) a sequência do usuário; a linha fica travada até o commit."""
+    return _upsert_stmt(
+        dialect, SyncState,
+        values={"user_id": user_id, "seq": 1},
+        conflict=("user_id",),
+        update=(),
+        extra_set={"seq": SyncState.__table__.c.seq + 1},
+    )
+
+
+def _changes_stmt(dialect: str, user_id: int, seq: int, entity: str, entity_ids: list[int], deleted: bool):
+    """Upsert multi-linha no log compactado (uma linha por entidade)."""
+    return _upsert_stmt(
+        dialect, SyncChange,
+        values=[
+            {"user_id": user_id, "seq": seq, "entity": entity, "entity_id": entity_id, "deleted": deleted}
+            for entity_id in entity_ids
+        ],
+        conflict=("user_id", "entity", "entity_id"),
+        update=("seq", "deleted"),
+        returning=False,
+    )
+
+
+def _backfill_stmts(user_id: int, seq: int):
+    """
+    INSERT ... SELECT com todas as linhas já existentes do usuário. Roda uma
+    vez, quando a sequência do usuário nasce, para que o primeiro /sync
+    inclua dados anteriores ao log.
+    """
+    now = mozambique_now()
+    for entity, model in SYNC_MODELS.items():
+        ids = _owned_ids_select(model, user_id).subquery()
+        yield SyncChange.__table__.insert().from_select(
+            ["user_id", "seq", "entity", "entity_id", "deleted", "created_at", "updated_at"],
+            select(
+                literal(user_id), literal(seq), literal(entity), ids.c.id,
+                literal(False), literal(now), literal(now),
+            ),
+        )
+
+
+def _bump_seq(db: Session, user_id: int) -> int:
+    """
+    Incrementa a sequência do usuário. O lock da linha serializa as escritas
+    do mesmo usuário, então a ordem de commit acompanha a das sequências.
+    """
+    dialect = db.get_bind().dialect.name
+    state = db.scalars(_seq_bump_stmt(dialect, user_id), execution_options={"populate_existing": True}).one()
+    if state.seq == 1:
+        for stmt in _backfill_stmts(user_id, state.seq):
+            db.execute(stmt)
+    return state.seq
+
+
+def record_changes(db: Session, user_id: int, entity: str, entity_ids: Iterable[int], deleted: bool = False) -> None:
+    """Registra mudanças para GET /sync (tombstones se `deleted`)."""
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+    mark_user_write(db, user_id)
+    seq = _bump_seq(db, user_id)
+    db.execute(_changes_stmt(db.get_bind().dialect.name, user_id, seq, entity, entity_ids, deleted))
+
+
+def get_changes_since(
+    db: Session, user_id: int, after: Optional[tuple], limit: int
+) -> tuple[List[SyncChange], dict[str, list]]:
+    """
+    Lista as mudanças do usuário depois do cursor (seq, id) e carrega as
+    linhas atuais das entidades vivas: uma query por tipo de entidade.
+    """
+    if db.get(SyncState, user_id) is None:
+        # Usuário sem log ainda: cria a sequência com o estado atual
+        _bump_seq(db, user_id)
+    
+    query = db.query(SyncChange).filter(SyncChange.user_id == user_id)
+    changes = keyset(query, SyncChange.seq, SyncChange.id, after, limit).all()
+    
+    live: dict[str, list[int]] = defaultdict(list)
+    for change in changes:
+        if not change.deleted:
+            live[change.entity].append(change.entity_id)
+    rows = {
+        entity: db.query(SYNC_MODELS[entity]).filter(SYNC_MODELS[entity].id.in_(ids)).all()
+        for entity, ids in live.items()
+    }
+    return changes, rows
+
+
 # ==================== USER CRUD ====================
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Busca usuário por email."""
@@ -26,8 +198,7 @@ def create_user(db: Session, user: schemas.UserSignup) -> User:
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db.flush()
     return db_user
 
 
@@ -41,55 +212,188 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     return user
 
 
+# ==================== MEDIA CATALOG ====================
+# Campos que vivem em `media`; as tabelas que referenciam guardam media_id
+# e os próprios metadados (MediaMetadataMixin)
+_MEDIA_FIELDS = ("media_uri", "media_type")
+_MEDIA_METADATA = ("title", "mime_type", "duration_ms")
+
+
+def _as_dict(item: Union[dict[str, Any], Any]) -> dict[str, Any]:
+    return item if isinstance(item, dict) else item.dict()
+
+
+def _media_row(item) -> dict[str, Any]:
+    """Linha do catálogo a partir de um schema (ou dict) com os campos da mídia."""
+    data = _as_dict(item)
+    row = {field: data.get(field) for field in _MEDIA_FIELDS}
+    row["id"] = media_key(data["media_uri"], data["media_type"])
+    return row
+
+
+def _media_values(item) -> dict[str, Any]:
+    """Valores da linha que referencia a mídia: sem media_uri/media_type, com media_id."""
+    data = _as_dict(item)
+    values = {key: value for key, value in data.items() if key not in _MEDIA_FIELDS}
+    values["media_id"] = media_key(data["media_uri"], data["media_type"])
+    return values
+
+
+def _media_rows(items: Iterable[Any]) -> list[dict[str, Any]]:
+    """Linhas do catálogo para os itens (entradas repetidas viram uma linha)."""
+    return list({row["id"]: row for row in map(_media_row, items)}.values())
+
+
+def _media_insert_stmt(dialect: str):
+    """
+    INSERT no catálogo que ignora as mídias já existentes: a linha é só a
+    identidade, derivada da chave, então não há o que atualizar. As linhas
+    vão como parâmetros (executemany): o statement compilado fica em cache,
+    o que um VALUES com centenas de linhas não permite. Compartilhado com
+    app.crud_async e app.migrations.
+    """
+    insert = _DIALECT_INSERTS.get(dialect)
+    if insert is None:
+        raise NotImplementedError(f"Upsert nativo não suportado para o dialeto '{dialect}'")
+    return insert(Media).on_conflict_do_nothing(index_elements=["id"])
+
+
+def _uncached_media(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Linhas que o cache de interning ainda não conhece. Compartilhado com app.crud_async."""
+    return [row for row in rows if media_cache.get((row["media_uri"], row["media_type"])) != row["id"]]
+
+
+def _detached_media(rows: list[dict[str, Any]]) -> list[Media]:
+    """
+    Objetos Media das linhas, prontos para db.merge(..., load=False): as
+    linhas existem no banco (o INSERT acima roda antes, na mesma transação)
+    e a identidade vem da chave, então não é preciso relê-las.
+    """
+    media = []
+    for row in rows:
+        instance = Media(**row)
+        make_transient_to_detached(instance)
+        media.append(instance)
+    return media
+
+
+def intern_media(db: Session, items: Iterable[Any]) -> dict[int, Media]:
+    """
+    Garante as linhas do catálogo para os itens e as retorna por id,
+    anexadas à sessão. Mídias já conhecidas pelo cache não geram SQL; as
+    demais vão num único INSERT em lote e entram no cache no commit.
+    """
+    rows = _media_rows(items)
+    missing = _uncached_media(rows)
+    if missing:
+        db.execute(_media_insert_stmt(db.get_bind().dialect.name), missing)
+        cache_media(db, missing)
+    return {media.id: db.merge(media, load=False) for media in _detached_media(rows)}
+
+
+def _attach_media(rows: Iterable[Any], media: dict[int, Media]) -> None:
+    """Liga as linhas vindas de RETURNING à sua mídia (sem lazy load)."""
+    for row in rows:
+        set_committed_value(row, "media", media[row.media_id])
+
+
 # ==================== FAVORITE CRUD ====================
 def get_favorite_by_uri(db: Session, user_id: int, media_uri: str, media_type: MediaType) -> Optional[Favorite]:
     """Busca favorito por URI e tipo."""
     return db.query(Favorite).filter(
         and_(
             Favorite.user_id == user_id,
-            Favorite.media_uri == media_uri,
-            Favorite.media_type == media_type
+            Favorite.media_id == media_key(media_uri, media_type)
         )
     ).first()
 
 
-def get_user_favorites(db: Session, user_id: int) -> List[Favorite]:
-    """Lista todos os favoritos do usuário."""
-    return db.query(Favorite).filter(Favorite.user_id == user_id).all()
+def _favorites_list_stmt(user_id: int, after: Optional[tuple], limit: Optional[int]):
+    stmt = select(*schema_columns(schemas.FavoriteOut, Favorite)).join(Media, Media.id == Favorite.media_id).where(
+        Favorite.user_id == user_id
+    )
+    return keyset(stmt, Favorite.created_at, Favorite.id, after, limit, descending=True)
+
+
+def get_user_favorites(db: Session, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[dict[str, Any]]:
+    """
+    Lista os favoritos do usuário, mais recentes primeiro (keyset em
+    created_at), como dicts no formato de FavoriteOut (ver app.serialization).
+    """
+    return as_dicts(db.execute(_favorites_list_stmt(user_id, after, limit)))
 
 
 def upsert_favorite(db: Session, user_id: int, favorite: schemas.FavoriteIn) -> Favorite:
-    """Cria ou atualiza favorito (upsert)."""
-    existing = get_favorite_by_uri(db, user_id, favorite.media_uri, favorite.media_type)
-    
-    if existing:
-        # Atualiza existente
-        existing.title = favorite.title
-        existing.mime_type = favorite.mime_type
-        existing.duration_ms = favorite.duration_ms
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        # Cria novo
-        db_favorite = Favorite(
-            user_id=user_id,
-            **favorite.dict()
-        )
-        db.add(db_favorite)
-        db.commit()
-        db.refresh(db_favorite)
-        return db_favorite
+    """Cria ou atualiza favorito (upsert; a mídia entra no catálogo)."""
+    media = intern_media(db, [favorite])
+    db_favorite = _upsert(
+        db, Favorite,
+        values={"user_id": user_id, **_media_values(favorite)},
+        conflict=("user_id", "media_id"),
+        update=_MEDIA_METADATA,
+    )
+    _attach_media([db_favorite], media)
+    record_changes(db, user_id, "favorites", [db_favorite.id])
+    return db_favorite
 
 
 def delete_favorite_by_uri(db: Session, user_id: int, media_uri: str, media_type: MediaType) -> bool:
-    """Deleta favorito por URI e tipo."""
-    favorite = get_favorite_by_uri(db, user_id, media_uri, media_type)
-    if favorite:
-        db.delete(favorite)
-        db.commit()
-        return True
-    return False
+    """Deleta favorito por URI e tipo (um único DELETE ... RETURNING)."""
+    deleted_ids = db.scalars(
+        delete(Favorite).where(
+            and_(
+                Favorite.user_id == user_id,
+                Favorite.media_id == media_key(media_uri, media_type)
+            )
+        ).returning(Favorite.id)
+    ).all()
+    record_changes(db, user_id, "favorites", deleted_ids, deleted=True)
+    return len(deleted_ids) > 0
+
+
+def _favorites_batch_stmt(dialect: str, user_id: int, favorites: Sequence[schemas.FavoriteIn]):
+    """Upsert multi-linha de favoritos (entradas repetidas viram uma linha)."""
+    rows = {row["media_id"]: row for row in ({"user_id": user_id, **_media_values(f)} for f in favorites)}
+    return _upsert_stmt(
+        dialect, Favorite,
+        values=list(rows.values()),
+        conflict=("user_id", "media_id"),
+        update=_MEDIA_METADATA,
+    )
+
+
+def _media_refs_filter(model: type[Base], user_id: int, refs: Sequence[schemas.MediaRef]):
+    """user_id = ? AND media_id IN (...): usa o índice único da chave natural."""
+    return and_(
+        model.user_id == user_id,
+        model.media_id.in_([media_key(ref.media_uri, ref.media_type) for ref in refs]),
+    )
+
+
+def upsert_favorites(db: Session, user_id: int, favorites: Sequence[schemas.FavoriteIn]) -> List[Favorite]:
+    """Upsert em lote (um statement); retorna um favorito por entrada, na ordem recebida."""
+    media = intern_media(db, favorites)
+    stmt = _favorites_batch_stmt(db.get_bind().dialect.name, user_id, favorites)
+    saved = db.scalars(stmt, execution_options={"populate_existing": True}).all()
+    _attach_media(saved, media)
+    record_changes(db, user_id, "favorites", [f.id for f in saved])
+    by_key = {f.media_id: f for f in saved}
+    return [by_key[media_key(f.media_uri, f.media_type)] for f in favorites]
+
+
+def delete_favorites(db: Session, user_id: int, refs: Sequence[schemas.MediaRef]) -> int:
+    """Remove vários favoritos num único DELETE ... RETURNING; retorna quantos saíram."""
+    deleted_ids = db.scalars(
+        delete(Favorite).where(_media_refs_filter(Favorite, user_id, refs)).returning(Favorite.id)
+    ).all()
+    record_changes(db, user_id, "favorites", deleted_ids, deleted=True)
+    return len(deleted_ids)
+
+
+def get_favorited(db: Session, user_id: int, refs: Sequence[schemas.MediaRef]) -> List[bool]:
+    """Para cada referência, se ela está nos favoritos (uma query indexada)."""
+    found = set(db.scalars(select(Favorite.media_id).where(_media_refs_filter(Favorite, user_id, refs))))
+    return [media_key(ref.media_uri, ref.media_type) in found for ref in refs]
 
 
 # ==================== HISTORY CRUD ====================
@@ -98,57 +402,180 @@ def get_history_item_by_uri(db: Session, user_id: int, media_uri: str, media_typ
     return db.query(HistoryItem).filter(
         and_(
             HistoryItem.user_id == user_id,
-            HistoryItem.media_uri == media_uri,
-            HistoryItem.media_type == media_type
+            HistoryItem.media_id == media_key(media_uri, media_type)
         )
     ).first()
 
 
-def get_user_history(db: Session, user_id: int) -> List[HistoryItem]:
-    """Lista todo o histórico do usuário."""
-    return db.query(HistoryItem).filter(HistoryItem.user_id == user_id).all()
+def _history_list_stmt(user_id: int, after: Optional[tuple], limit: Optional[int]):
+    stmt = select(*schema_columns(schemas.HistoryItemOut, HistoryItem)).join(Media, Media.id == HistoryItem.media_id).where(
+        HistoryItem.user_id == user_id
+    )
+    return keyset(stmt, HistoryItem.last_played, HistoryItem.id, after, limit, descending=True)
+
+
+def get_user_history(db: Session, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[dict[str, Any]]:
+    """
+    Lista o histórico do usuário, mais recente primeiro (keyset em
+    last_played), como dicts no formato de HistoryItemOut.
+    """
+    return as_dicts(db.execute(_history_list_stmt(user_id, after, limit)))
 
 
 def upsert_history_item(db: Session, user_id: int, history_item: schemas.HistoryItemIn) -> HistoryItem:
-    """Cria ou atualiza item de histórico (upsert)."""
-    existing = get_history_item_by_uri(db, user_id, history_item.media_uri, history_item.media_type)
+    """Cria ou atualiza item de histórico (upsert; a mídia entra no catálogo)."""
+    media = intern_media(db, [history_item])
+    db_history = _upsert(
+        db, HistoryItem,
+        values={"user_id": user_id, **_media_values(history_item)},
+        conflict=("user_id", "media_id"),
+        update=(*_MEDIA_METADATA, "last_position_ms", "last_played"),
+        extra_set={"play_count": HistoryItem.__table__.c.play_count + 1},  # Incrementa contador no SQL
+    )
+    _attach_media([db_history], media)
+    record_changes(db, user_id, "history", [db_history.id])
+    return db_history
+
+
+def _merge_history_batch(user_id: int, items: Sequence[schemas.HistoryItemIn]) -> list[dict[str, Any]]:
+    """
+    Colapsa entradas repetidas (media_uri, media_type) do lote: play_count
+    é somado e os demais campos vêm da última ocorrência (posição mais
+    recente). Necessário porque um ON CONFLICT não pode tocar a mesma
+    linha duas vezes no mesmo statement.
+    """
+    merged: dict[tuple[str, MediaType], dict[str, Any]] = {}
+    for item in items:
+        key = (item.media_uri, item.media_type)
+        row = {"user_id": user_id, **item.dict()}
+        if key in merged:
+            row["play_count"] += merged[key]["play_count"]
+        merged[key] = row
+    return list(merged.values())
+
+
+def _history_batch_stmt(dialect: str, rows: list[dict[str, Any]]):
+    """Upsert multi-linha do histórico; na conflitante soma o play_count do lote."""
+    table = HistoryItem.__table__
+    return _upsert_stmt(
+        dialect, HistoryItem,
+        values=[_media_values(row) for row in rows],
+        conflict=("user_id", "media_id"),
+        update=(*_MEDIA_METADATA, "last_position_ms", "last_played"),
+        extra_set=lambda excluded: {"play_count": table.c.play_count + excluded.play_count},
+    )
+
+
+def upsert_history_items(db: Session, user_id: int, items: Sequence[schemas.HistoryItemIn]) -> List[HistoryItem]:
+    """
+    Upsert em lote do histórico (um statement). Retorna um item por
+    entrada, na ordem recebida (entradas repetidas apontam para a mesma linha).
+    """
+    rows = _merge_history_batch(user_id, items)
+    if not rows:
+        return []
+    media = intern_media(db, rows)
+    stmt = _history_batch_stmt(db.get_bind().dialect.name, rows)
+    saved = db.scalars(stmt, execution_options={"populate_existing": True}).all()
+    _attach_media(saved, media)
+    record_changes(db, user_id, "history", [row.id for row in saved])
+    by_key = {row.media_id: row for row in saved}
+    return [by_key[media_key(item.media_uri, item.media_type)] for item in items]
+
+
+def flush_positions(db: Session, rows: Sequence[dict[str, Any]]) -> int:
+    """
+    Grava as posições do buffer write-behind (app.position_buffer) num único
+    upsert multi-linha. Só atualiza linhas com last_played mais antigo que o
+    do heartbeat, para não sobrescrever um POST /history posterior. Nunca
+    conta reprodução: linhas novas nascem com play_count 0 (quem conta é o
+    POST /history) e com o título do heartbeat; nas existentes os metadados
+    não mudam. Retorna quantas linhas foram gravadas.
+    """
+    table = HistoryItem.__table__
+    intern_media(db, rows)
+    stmt = _upsert_stmt(
+        db.get_bind().dialect.name, HistoryItem,
+        values=[{**_media_values(row), "play_count": 0} for row in rows],
+        conflict=("user_id", "media_id"),
+        update=("last_position_ms", "last_played"),
+        where=lambda excluded: table.c.last_played < excluded.last_played,
+        returning=False,
+    ).returning(table.c.id, table.c.user_id)
+    saved = db.execute(stmt).all()
     
-    if existing:
-        # Atualiza existente
-        existing.title = history_item.title
-        existing.mime_type = history_item.mime_type
-        existing.duration_ms = history_item.duration_ms
-        existing.last_position_ms = history_item.last_position_ms
-        existing.play_count += 1  # Incrementa contador
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        # Cria novo
-        db_history = HistoryItem(
-            user_id=user_id,
-            **history_item.dict()
-        )
-        db.add(db_history)
-        db.commit()
-        db.refresh(db_history)
-        return db_history
+    by_user: dict[int, list[int]] = defaultdict(list)
+    for history_id, user_id in saved:
+        by_user[user_id].append(history_id)
+    for user_id, history_ids in by_user.items():
+        record_changes(db, user_id, "history", history_ids)
+    return len(saved)
 
 
 # ==================== PLAYLIST CRUD ====================
-def get_playlist(db: Session, playlist_id: int, user_id: int) -> Optional[Playlist]:
-    """Busca playlist por ID."""
-    return db.query(Playlist).filter(
+def get_playlist(db: Session, playlist_id: int, user_id: int, with_items: bool = False) -> Optional[Playlist]:
+    """Busca playlist por ID (opcionalmente com itens, em uma query extra)."""
+    query = db.query(Playlist).filter(
         and_(
             Playlist.id == playlist_id,
             Playlist.user_id == user_id
         )
-    ).first()
-
-
-def get_user_playlists(db: Session, user_id: int) -> List[Playlist]:
-    """Lista todas as playlists do usuário."""
-    return db.query(Playlist).filter(Playlist.user_id == user_id).all()
+    )
+    if with_items:
+        query = query.options(selectinload(Playlist.items))
+    return query.first()
+
+
+def _playlists_list_stmts(user_id: int):
+    """Playlists do usuário e todos os seus itens (na ordem de position), para _nest_items."""
+    playlists = select(*schema_columns(schemas.PlaylistOut, Playlist)).where(Playlist.user_id == user_id)
+    items = select(*schema_columns(schemas.PlaylistItemOut, PlaylistItem)).join(
+        Media, Media.id == PlaylistItem.media_id
+    ).join(
+        Playlist, Playlist.id == PlaylistItem.playlist_id
+    ).where(
+        Playlist.user_id == user_id
+    ).order_by(PlaylistItem.playlist_id, PlaylistItem.position, PlaylistItem.id)
+    return playlists, items
+
+
+def _nest_items(playlists: List[dict[str, Any]], items: List[dict[str, Any]]) -> List[dict[str, Any]]:
+    by_id = {}
+    for playlist in playlists:
+        playlist["items"] = []
+        by_id[playlist["id"]] = playlist
+    for item in items:
+        by_id[item["playlist_id"]]["items"].append(item)
+    return playlists
+
+
+def _playlist_summaries_stmt(user_id: int):
+    return select(*schema_columns(
+        schemas.PlaylistSummary, Playlist,
+        item_count=func.count(PlaylistItem.id),
+        total_duration_ms=func.coalesce(func.sum(PlaylistItem.duration_ms), 0),
+    )).outerjoin(
+        PlaylistItem, PlaylistItem.playlist_id == Playlist.id
+    ).where(
+        Playlist.user_id == user_id
+    ).group_by(Playlist.id)
+
+
+def get_user_playlists(db: Session, user_id: int) -> List[dict[str, Any]]:
+    """
+    Lista todas as playlists do usuário com itens (2 queries, sem N+1), como
+    dicts no formato de PlaylistWithItems.
+    """
+    playlists, items = _playlists_list_stmts(user_id)
+    return _nest_items(as_dicts(db.execute(playlists)), as_dicts(db.execute(items)))
+
+
+def get_user_playlist_summaries(db: Session, user_id: int) -> List[dict[str, Any]]:
+    """
+    Lista as playlists do usuário com contagem de itens e duração total
+    (1 query), como dicts no formato de PlaylistSummary.
+    """
+    return as_dicts(db.execute(_playlist_summaries_stmt(user_id)))
 
 
 def create_playlist(db: Session, user_id: int, playlist: schemas.PlaylistIn) -> Playlist:
@@ -158,8 +585,8 @@ def create_playlist(db: Session, user_id: int, playlist: schemas.PlaylistIn) ->
         **playlist.dict()
     )
     db.add(db_playlist)
-    db.commit()
-    db.refresh(db_playlist)
+    db.flush()
+    record_changes(db, user_id, "playlists", [db_playlist.id])
     return db_playlist
 
 
@@ -171,17 +598,20 @@ def update_playlist(db: Session, playlist_id: int, user_id: int, playlist: schem
     
     db_playlist.name = playlist.name
     db_playlist.description = playlist.description
-    db.commit()
-    db.refresh(db_playlist)
+    db.flush()
+    record_changes(db, user_id, "playlists", [db_playlist.id])
     return db_playlist
 
 
 def delete_playlist(db: Session, playlist_id: int, user_id: int) -> bool:
-    """Deleta playlist."""
-    playlist = get_playlist(db, playlist_id, user_id)
+    """Deleta playlist (o cascade do ORM remove os itens)."""
+    playlist = get_playlist(db, playlist_id, user_id, with_items=True)
     if playlist:
+        item_ids = [item.id for item in playlist.items]
         db.delete(playlist)
-        db.commit()
+        db.flush()
+        record_changes(db, user_id, "playlist_items", item_ids, deleted=True)
+        record_changes(db, user_id, "playlists", [playlist_id], deleted=True)
         return True
     return False
 
@@ -197,50 +627,38 @@ def get_playlist_item(db: Session, item_id: int, playlist_id: int) -> Optional[P
     ).first()
 
 
-def get_playlist_items(db: Session, playlist_id: int) -> List[PlaylistItem]:
-    """Lista todos os itens de uma playlist."""
-    return db.query(PlaylistItem).filter(PlaylistItem.playlist_id == playlist_id).all()
+def get_playlist_items(db: Session, playlist_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[PlaylistItem]:
+    """Lista os itens de uma playlist em ordem de posição (keyset em position)."""
+    query = db.query(PlaylistItem).filter(PlaylistItem.playlist_id == playlist_id)
+    return keyset(query, PlaylistItem.position, PlaylistItem.id, after, limit).all()
 
 
-def upsert_playlist_item(db: Session, playlist_id: int, item: schemas.PlaylistItemIn) -> PlaylistItem:
-    """Cria ou atualiza item de playlist (upsert)."""
-    existing = db.query(PlaylistItem).filter(
-        and_(
-            PlaylistItem.playlist_id == playlist_id,
-            PlaylistItem.media_uri == item.media_uri,
-            PlaylistItem.media_type == item.media_type
-        )
-    ).first()
-    
-    if existing:
-        # Atualiza existente
-        existing.title = item.title
-        existing.mime_type = item.mime_type
-        existing.duration_ms = item.duration_ms
-        existing.position = item.position
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        # Cria novo
-        db_item = PlaylistItem(
-            playlist_id=playlist_id,
-            **item.dict()
-        )
-        db.add(db_item)
-        db.commit()
-        db.refresh(db_item)
-        return db_item
-
-
-def delete_playlist_item(db: Session, item_id: int, playlist_id: int) -> bool:
-    """Deleta item de playlist."""
-    item = get_playlist_item(db, item_id, playlist_id)
-    if item:
-        db.delete(item)
-        db.commit()
-        return True
-    return False
+def upsert_playlist_item(db: Session, playlist_id: int, item: schemas.PlaylistItemIn, user_id: int) -> PlaylistItem:
+    """Cria ou atualiza item de playlist (upsert). `user_id` é o dono da playlist."""
+    media = intern_media(db, [item])
+    db_item = _upsert(
+        db, PlaylistItem,
+        values={"playlist_id": playlist_id, **_media_values(item)},
+        conflict=("playlist_id", "media_id"),
+        update=(*_MEDIA_METADATA, "position"),
+    )
+    _attach_media([db_item], media)
+    record_changes(db, user_id, "playlist_items", [db_item.id])
+    return db_item
+
+
+def delete_playlist_item(db: Session, item_id: int, playlist_id: int, user_id: int) -> bool:
+    """Deleta item de playlist (um único DELETE ... RETURNING). `user_id` é o dono da playlist."""
+    deleted_ids = db.scalars(
+        delete(PlaylistItem).where(
+            and_(
+                PlaylistItem.id == item_id,
+                PlaylistItem.playlist_id == playlist_id
+            )
+        ).returning(PlaylistItem.id)
+    ).all()
+    record_changes(db, user_id, "playlist_items", deleted_ids, deleted=True)
+    return len(deleted_ids) > 0
 
 
 # ==================== TAG CRUD ====================
@@ -254,9 +672,10 @@ def get_tag(db: Session, tag_id: int, user_id: int) -> Optional[Tag]:
     ).first()
 
 
-def get_user_tags(db: Session, user_id: int) -> List[Tag]:
-    """Lista todas as tags do usuário."""
-    return db.query(Tag).filter(Tag.user_id == user_id).all()
+def get_user_tags(db: Session, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Tag]:
+    """Lista as tags do usuário em ordem de criação (keyset em created_at)."""
+    query = db.query(Tag).filter(Tag.user_id == user_id)
+    return keyset(query, Tag.created_at, Tag.id, after, limit).all()
 
 
 def create_tag(db: Session, user_id: int, tag: schemas.TagIn) -> Tag:
@@ -266,17 +685,20 @@ def create_tag(db: Session, user_id: int, tag: schemas.TagIn) -> Tag:
         **tag.dict()
     )
     db.add(db_tag)
-    db.commit()
-    db.refresh(db_tag)
+    db.flush()
+    record_changes(db, user_id, "tags", [db_tag.id])
     return db_tag
 
 
 def delete_tag(db: Session, tag_id: int, user_id: int) -> bool:
-    """Deleta tag."""
+    """Deleta tag (o cascade do ORM remove os vínculos)."""
     tag = get_tag(db, tag_id, user_id)
     if tag:
+        media_tag_ids = [media_tag.id for media_tag in tag.media_tags]
         db.delete(tag)
-        db.commit()
+        db.flush()
+        record_changes(db, user_id, "media_tags", media_tag_ids, deleted=True)
+        record_changes(db, user_id, "tags", [tag_id], deleted=True)
         return True
     return False
 
@@ -286,34 +708,45 @@ def get_media_tag(db: Session, media_uri: str, media_type: MediaType, tag_id: in
     """Busca vínculo tag-mídia."""
     return db.query(MediaTag).filter(
         and_(
-            MediaTag.media_uri == media_uri,
-            MediaTag.media_type == media_type,
+            MediaTag.media_id == media_key(media_uri, media_type),
             MediaTag.tag_id == tag_id
         )
     ).first()
 
 
-def create_media_tag(db: Session, media_tag: schemas.MediaTagIn) -> MediaTag:
-    """Cria vínculo tag-mídia."""
+def create_media_tag(db: Session, media_tag: schemas.MediaTagIn, user_id: int) -> MediaTag:
+    """Cria vínculo tag-mídia. `user_id` é o dono da tag (conferido pela rota com get_tag)."""
     existing = get_media_tag(db, media_tag.media_uri, media_tag.media_type, media_tag.tag_id)
     if existing:
         return existing
     
-    db_media_tag = MediaTag(**media_tag.dict())
+    media = intern_media(db, [media_tag])
+    db_media_tag = MediaTag(**_media_values(media_tag))
+    _attach_media([db_media_tag], media)
     db.add(db_media_tag)
-    db.commit()
-    db.refresh(db_media_tag)
+    db.flush()
+    record_changes(db, user_id, "media_tags", [db_media_tag.id])
     return db_media_tag
 
 
-def delete_media_tag(db: Session, media_tag_id: int) -> bool:
-    """Deleta vínculo tag-mídia."""
-    media_tag = db.query(MediaTag).filter(MediaTag.id == media_tag_id).first()
-    if media_tag:
-        db.delete(media_tag)
-        db.commit()
-        return True
-    return False
+def _owned_media_tag(media_tag_id: int, user_id: int):
+    """Filtro do vínculo `media_tag_id` cuja tag pertence a `user_id` (pelo dono em tags)."""
+    return and_(
+        MediaTag.id == media_tag_id,
+        MediaTag.tag_id.in_(select(Tag.id).where(Tag.user_id == user_id)),
+    )
+
+
+def delete_media_tag(db: Session, media_tag_id: int, user_id: int) -> bool:
+    """
+    Deleta vínculo tag-mídia (um único DELETE ... RETURNING), só se a tag
+    for de `user_id`.
+    """
+    deleted_ids = db.scalars(
+        delete(MediaTag).where(_owned_media_tag(media_tag_id, user_id)).returning(MediaTag.id)
+    ).all()
+    record_changes(db, user_id, "media_tags", deleted_ids, deleted=True)
+    return len(deleted_ids) > 0
 
 
 # ==================== SETTINGS CRUD ====================
@@ -326,31 +759,21 @@ def create_default_settings(db: Session, user_id: int) -> Setting:
     """Cria configurações padrão para o usuário."""
     db_settings = Setting(user_id=user_id)
     db.add(db_settings)
-    db.commit()
-    db.refresh(db_settings)
+    db.flush()
+    record_changes(db, user_id, "settings", [db_settings.id])
     return db_settings
 
 
 def upsert_settings(db: Session, user_id: int, settings: schemas.SettingsIn) -> Setting:
     """Cria ou atualiza configurações do usuário."""
-    existing = get_user_settings(db, user_id)
-    
-    if existing:
-        existing.theme_mode = settings.theme_mode
-        existing.playback_speed = settings.playback_speed
-        existing.auto_resume = settings.auto_resume
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        db_settings = Setting(
-            user_id=user_id,
-            **settings.dict()
-        )
-        db.add(db_settings)
-        db.commit()
-        db.refresh(db_settings)
-        return db_settings
+    db_settings = _upsert(
+        db, Setting,
+        values={"user_id": user_id, **settings.dict()},
+        conflict=("user_id",),
+        update=("theme_mode", "playback_speed", "auto_resume"),
+    )
+    record_changes(db, user_id, "settings", [db_settings.id])
+    return db_settings
 
 
 # ==================== STATISTICS CRUD ====================
@@ -363,32 +786,36 @@ def create_default_statistics(db: Session, user_id: int) -> Statistics:
     """Cria estatísticas padrão para o usuário."""
     db_stats = Statistics(user_id=user_id)
     db.add(db_stats)
-    db.commit()
-    db.refresh(db_stats)
+    db.flush()
+    record_changes(db, user_id, "statistics", [db_stats.id])
     return db_stats
 
 
 def upsert_statistics(db: Session, user_id: int, statistics: schemas.StatisticsIn) -> Statistics:
     """Cria ou atualiza estatísticas do usuário."""
-    existing = get_user_statistics(db, user_id)
-    
-    if existing:
-        existing.total_play_count = statistics.total_play_count
-        existing.total_listen_time_ms = statistics.total_listen_time_ms
-        existing.favorite_count = statistics.favorite_count
-        existing.playlist_count = statistics.playlist_count
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        db_stats = Statistics(
-            user_id=user_id,
-            **statistics.dict()
-        )
-        db.add(db_stats)
-        db.commit()
-        db.refresh(db_stats)
-        return db_stats
+    db_stats = _upsert(
+        db, Statistics,
+        values={"user_id": user_id, **statistics.dict()},
+        conflict=("user_id",),
+        update=("total_play_count", "total_listen_time_ms", "favorite_count", "playlist_count"),
+    )
+    record_changes(db, user_id, "statistics", [db_stats.id])
+    return db_stats
+
 
+# ==================== CHANGE MARKERS (ETag) ====================
+def get_change_marker(db: Session, model: type[Base], user_id: int) -> tuple:
+    """Marcador barato de mudança: (contagem, maior updated_at) das linhas do usuário."""
+    return tuple(db.query(func.count(model.id), func.max(model.updated_at)).filter(model.user_id == user_id).one())
 
 
+def get_playlists_change_marker(db: Session, user_id: int) -> tuple:
+    """Marcador de mudança das playlists do usuário, incluindo os itens."""
+    return tuple(db.query(
+        func.count(func.distinct(Playlist.id)),
+        func.max(Playlist.updated_at),
+        func.count(PlaylistItem.id),
+        func.max(PlaylistItem.updated_at),
+    ).outerjoin(
+        PlaylistItem, PlaylistItem.playlist_id == Playlist.id
+    ).filter(Playlist.user_id == user_id).one())
@@ -0,0 +1,398 @@
+"""
+Operações CRUD assíncronas (ASYNC_DB=true).
+
+Espelham app.crud sobre AsyncSession: apenas flush, commit único em
+app.db.get_async_db. Relacionamentos usados na resposta são carregados
+explicitamente (não há lazy load em contexto assíncrono).
+"""
+from typing import Any, Iterable, List, Optional, Sequence
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.crud import (
+    _MEDIA_METADATA, _attach_media, _backfill_stmts, _changes_stmt, _favorites_batch_stmt, _favorites_list_stmt,
+    _detached_media, _history_batch_stmt, _history_list_stmt, _media_insert_stmt, _media_refs_filter, _media_rows,
+    _media_values, _merge_history_batch, _nest_items, _owned_media_tag, _playlist_summaries_stmt,
+    _playlists_list_stmts, _seq_bump_stmt, _uncached_media, _upsert_stmt,
+)
+from app.models import (
+    Base, Media, Favorite, HistoryItem, Playlist, PlaylistItem,
+    Tag, MediaTag, Setting, Statistics, MediaType, media_key
+)
+from app import schemas
+from app.cache import cache_media, mark_user_write
+from app.pagination import keyset
+from app.serialization import as_dicts
+
+
+async def _upsert(db: AsyncSession, model: type[Base], **kwargs):
+    """Upsert nativo em um único statement (ver app.crud._upsert_stmt)."""
+    stmt = _upsert_stmt(db.get_bind().dialect.name, model, **kwargs)
+    result = await db.scalars(stmt, execution_options={"populate_existing": True})
+    return result.one()
+
+
+async def _delete(db: AsyncSession, user_id: int, model: type[Base], *criteria) -> bool:
+    """DELETE ... RETURNING único; registra os tombstones e retorna se removeu algo."""
+    deleted_ids = (await db.scalars(delete(model).where(and_(*criteria)).returning(model.id))).all()
+    await record_changes(db, user_id, model.__tablename__, deleted_ids, deleted=True)
+    return len(deleted_ids) > 0
+
+
+# ==================== SYNC (change log) ====================
+async def _bump_seq(db: AsyncSession, user_id: int) -> int:
+    """Incrementa a sequência do usuário (ver app.crud._bump_seq)."""
+    dialect = db.get_bind().dialect.name
+    state = (await db.scalars(_seq_bump_stmt(dialect, user_id), execution_options={"populate_existing": True})).one()
+    if state.seq == 1:
+        for stmt in _backfill_stmts(user_id, state.seq):
+            await db.execute(stmt)
+    return state.seq
+
+
+async def record_changes(db: AsyncSession, user_id: int, entity: str, entity_ids: Iterable[int], deleted: bool = False) -> None:
+    """Registra mudanças para GET /sync (tombstones se `deleted`)."""
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+    mark_user_write(db, user_id)
+    seq = await _bump_seq(db, user_id)
+    await db.execute(_changes_stmt(db.get_bind().dialect.name, user_id, seq, entity, entity_ids, deleted))
+
+
+# ==================== MEDIA CATALOG ====================
+async def intern_media(db: AsyncSession, items: Iterable[Any]) -> dict[int, Media]:
+    """Garante as linhas do catálogo para os itens (ver app.crud.intern_media)."""
+    rows = _media_rows(items)
+    missing = _uncached_media(rows)
+    if missing:
+        await db.execute(_media_insert_stmt(db.get_bind().dialect.name), missing)
+        cache_media(db, missing)
+    return {media.id: await db.merge(media, load=False) for media in _detached_media(rows)}
+
+
+# ==================== FAVORITE CRUD ====================
+async def get_user_favorites(db: AsyncSession, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[dict[str, Any]]:
+    """Lista os favoritos do usuário, mais recentes primeiro, como dicts no formato de FavoriteOut."""
+    return as_dicts(await db.execute(_favorites_list_stmt(user_id, after, limit)))
+
+
+async def upsert_favorite(db: AsyncSession, user_id: int, favorite: schemas.FavoriteIn) -> Favorite:
+    """Cria ou atualiza favorito (upsert; a mídia entra no catálogo)."""
+    media = await intern_media(db, [favorite])
+    db_favorite = await _upsert(
+        db, Favorite,
+        values={"user_id": user_id, **_media_values(favorite)},
+        conflict=("user_id", "media_id"),
+        update=_MEDIA_METADATA,
+    )
+    _attach_media([db_favorite], media)
+    await record_changes(db, user_id, "favorites", [db_favorite.id])
+    return db_favorite
+
+
+async def delete_favorite_by_uri(db: AsyncSession, user_id: int, media_uri: str, media_type: MediaType) -> bool:
+    """Deleta favorito por URI e tipo (um único DELETE)."""
+    return await _delete(
+        db, user_id, Favorite,
+        Favorite.user_id == user_id,
+        Favorite.media_id == media_key(media_uri, media_type),
+    )
+
+
+async def upsert_favorites(db: AsyncSession, user_id: int, favorites: Sequence[schemas.FavoriteIn]) -> List[Favorite]:
+    """Upsert em lote (ver app.crud.upsert_favorites)."""
+    media = await intern_media(db, favorites)
+    stmt = _favorites_batch_stmt(db.get_bind().dialect.name, user_id, favorites)
+    saved = (await db.scalars(stmt, execution_options={"populate_existing": True})).all()
+    _attach_media(saved, media)
+    await record_changes(db, user_id, "favorites", [f.id for f in saved])
+    by_key = {f.media_id: f for f in saved}
+    return [by_key[media_key(f.media_uri, f.media_type)] for f in favorites]
+
+
+async def delete_favorites(db: AsyncSession, user_id: int, refs: Sequence[schemas.MediaRef]) -> int:
+    """Remove vários favoritos num único DELETE ... RETURNING."""
+    deleted_ids = (await db.scalars(
+        delete(Favorite).where(_media_refs_filter(Favorite, user_id, refs)).returning(Favorite.id)
+    )).all()
+    await record_changes(db, user_id, "favorites", deleted_ids, deleted=True)
+    return len(deleted_ids)
+
+
+async def get_favorited(db: AsyncSession, user_id: int, refs: Sequence[schemas.MediaRef]) -> List[bool]:
+    """Para cada referência, se ela está nos favoritos (uma query indexada)."""
+    found = set(await db.scalars(select(Favorite.media_id).where(_media_refs_filter(Favorite, user_id, refs))))
+    return [media_key(ref.media_uri, ref.media_type) in found for ref in refs]
+
+
+# ==================== HISTORY CRUD ====================
+async def get_user_history(db: AsyncSession, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[dict[str, Any]]:
+    """Lista o histórico do usuário, mais recente primeiro, como dicts no formato de HistoryItemOut."""
+    return as_dicts(await db.execute(_history_list_stmt(user_id, after, limit)))
+
+
+async def upsert_history_item(db: AsyncSession, user_id: int, history_item: schemas.HistoryItemIn) -> HistoryItem:
+    """Cria ou atualiza item de histórico (upsert; a mídia entra no catálogo)."""
+    media = await intern_media(db, [history_item])
+    db_history = await _upsert(
+        db, HistoryItem,
+        values={"user_id": user_id, **_media_values(history_item)},
+        conflict=("user_id", "media_id"),
+        update=(*_MEDIA_METADATA, "last_position_ms", "last_played"),
+        extra_set={"play_count": HistoryItem.__table__.c.play_count + 1},
+    )
+    _attach_media([db_history], media)
+    await record_changes(db, user_id, "history", [db_history.id])
+    return db_history
+
+
+async def upsert_history_items(db: AsyncSession, user_id: int, items: Sequence[schemas.HistoryItemIn]) -> List[HistoryItem]:
+    """Upsert em lote do histórico (ver app.crud.upsert_history_items)."""
+    rows = _merge_history_batch(user_id, items)
+    if not rows:
+        return []
+    media = await intern_media(db, rows)
+    stmt = _history_batch_stmt(db.get_bind().dialect.name, rows)
+    saved = (await db.scalars(stmt, execution_options={"populate_existing": True})).all()
+    _attach_media(saved, media)
+    await record_changes(db, user_id, "history", [row.id for row in saved])
+    by_key = {row.media_id: row for row in saved}
+    return [by_key[media_key(item.media_uri, item.media_type)] for item in items]
+
+
+# ==================== PLAYLIST CRUD ====================
+async def get_playlist(db: AsyncSession, playlist_id: int, user_id: int, with_items: bool = False) -> Optional[Playlist]:
+    """Busca playlist por ID (opcionalmente com itens)."""
+    stmt = select(Playlist).where(and_(Playlist.id == playlist_id, Playlist.user_id == user_id))
+    if with_items:
+        stmt = stmt.options(selectinload(Playlist.items))
+    return (await db.scalars(stmt)).first()
+
+
+async def get_user_playlists(db: AsyncSession, user_id: int) -> List[dict[str, Any]]:
+    """Lista todas as playlists do usuário com itens (2 queries), como dicts no formato de PlaylistWithItems."""
+    playlists, items = _playlists_list_stmts(user_id)
+    return _nest_items(as_dicts(await db.execute(playlists)), as_dicts(await db.execute(items)))
+
+
+async def get_user_playlist_summaries(db: AsyncSession, user_id: int) -> List[dict[str, Any]]:
+    """Lista as playlists do usuário com contagem de itens e duração total (1 query), como dicts."""
+    return as_dicts(await db.execute(_playlist_summaries_stmt(user_id)))
+
+
+async def create_playlist(db: AsyncSession, user_id: int, playlist: schemas.PlaylistIn) -> Playlist:
+    """Cria nova playlist."""
+    db_playlist = Playlist(
+        user_id=user_id,
+        **playlist.dict()
+    )
+    db.add(db_playlist)
+    await db.flush()
+    await record_changes(db, user_id, "playlists", [db_playlist.id])
+    return db_playlist
+
+
+async def update_playlist(db: AsyncSession, playlist_id: int, user_id: int, playlist: schemas.PlaylistIn) -> Optional[Playlist]:
+    """Atualiza playlist existente."""
+    db_playlist = await get_playlist(db, playlist_id, user_id)
+    if not db_playlist:
+        return None
+
+    db_playlist.name = playlist.name
+    db_playlist.description = playlist.description
+    await db.flush()
+    await record_changes(db, user_id, "playlists", [db_playlist.id])
+    return db_playlist
+
+
+async def delete_playlist(db: AsyncSession, playlist_id: int, user_id: int) -> bool:
+    """Deleta playlist (o cascade do ORM remove os itens)."""
+    playlist = await get_playlist(db, playlist_id, user_id, with_items=True)
+    if playlist:
+        item_ids = [item.id for item in playlist.items]
+        await db.delete(playlist)
+        await db.flush()
+        await record_changes(db, user_id, "playlist_items", item_ids, deleted=True)
+        await record_changes(db, user_id, "playlists", [playlist_id], deleted=True)
+        return True
+    return False
+
+
+# ==================== PLAYLIST ITEM CRUD ====================
+async def get_playlist_items(db: AsyncSession, playlist_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[PlaylistItem]:
+    """Lista os itens de uma playlist em ordem de posição (keyset em position)."""
+    stmt = select(PlaylistItem).where(PlaylistItem.playlist_id == playlist_id)
+    result = await db.scalars(keyset(stmt, PlaylistItem.position, PlaylistItem.id, after, limit))
+    return list(result.all())
+
+
+async def upsert_playlist_item(db: AsyncSession, playlist_id: int, item: schemas.PlaylistItemIn, user_id: int) -> PlaylistItem:
+    """Cria ou atualiza item de playlist (upsert). `user_id` é o dono da playlist."""
+    media = await intern_media(db, [item])
+    db_item = await _upsert(
+        db, PlaylistItem,
+        values={"playlist_id": playlist_id, **_media_values(item)},
+        conflict=("playlist_id", "media_id"),
+        update=(*_MEDIA_METADATA, "position"),
+    )
+    _attach_media([db_item], media)
+    await record_changes(db, user_id, "playlist_items", [db_item.id])
+    return db_item
+
+
+async def delete_playlist_item(db: AsyncSession, item_id: int, playlist_id: int, user_id: int) -> bool:
+    """Deleta item de playlist (um único DELETE). `user_id` é o dono da playlist."""
+    return await _delete(
+        db, user_id, PlaylistItem,
+        PlaylistItem.id == item_id,
+        PlaylistItem.playlist_id == playlist_id,
+    )
+
+
+# ==================== TAG CRUD ====================
+async def get_tag(db: AsyncSession, tag_id: int, user_id: int, with_media_tags: bool = False) -> Optional[Tag]:
+    """Busca tag por ID."""
+    stmt = select(Tag).where(and_(Tag.id == tag_id, Tag.user_id == user_id))
+    if with_media_tags:
+        stmt = stmt.options(selectinload(Tag.media_tags))
+    return (await db.scalars(stmt)).first()
+
+
+async def get_user_tags(db: AsyncSession, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Tag]:
+    """Lista as tags do usuário em ordem de criação (keyset em created_at)."""
+    stmt = select(Tag).where(Tag.user_id == user_id)
+    result = await db.scalars(keyset(stmt, Tag.created_at, Tag.id, after, limit))
+    return list(result.all())
+
+
+async def create_tag(db: AsyncSession, user_id: int, tag: schemas.TagIn) -> Tag:
+    """Cria nova tag."""
+    db_tag = Tag(
+        user_id=user_id,
+        **tag.dict()
+    )
+    db.add(db_tag)
+    await db.flush()
+    await record_changes(db, user_id, "tags", [db_tag.id])
+    return db_tag
+
+
+async def delete_tag(db: AsyncSession, tag_id: int, user_id: int) -> bool:
+    """Deleta tag (o cascade do ORM remove os vínculos)."""
+    tag = await get_tag(db, tag_id, user_id, with_media_tags=True)
+    if tag:
+        media_tag_ids = [media_tag.id for media_tag in tag.media_tags]
+        await db.delete(tag)
+        await db.flush()
+        await record_changes(db, user_id, "media_tags", media_tag_ids, deleted=True)
+        await record_changes(db, user_id, "tags", [tag_id], deleted=True)
+        return True
+    return False
+
+
+# ==================== MEDIA TAG CRUD ====================
+async def create_media_tag(db: AsyncSession, media_tag: schemas.MediaTagIn, user_id: int) -> MediaTag:
+    """Cria vínculo tag-mídia. `user_id` é o dono da tag (conferido pela rota com get_tag)."""
+    existing = (await db.scalars(
+        select(MediaTag).where(
+            and_(
+                MediaTag.media_id == media_key(media_tag.media_uri, media_tag.media_type),
+                MediaTag.tag_id == media_tag.tag_id
+            )
+        )
+    )).first()
+    if existing:
+        return existing
+
+    media = await intern_media(db, [media_tag])
+    db_media_tag = MediaTag(**_media_values(media_tag))
+    _attach_media([db_media_tag], media)
+    db.add(db_media_tag)
+    await db.flush()
+    await record_changes(db, user_id, "media_tags", [db_media_tag.id])
+    return db_media_tag
+
+
+async def delete_media_tag(db: AsyncSession, media_tag_id: int, user_id: int) -> bool:
+    """Deleta vínculo tag-mídia (um único DELETE), só se a tag for de `user_id`."""
+    return await _delete(db, user_id, MediaTag, _owned_media_tag(media_tag_id, user_id))
+
+
+# ==================== SETTINGS CRUD ====================
+async def get_user_settings(db: AsyncSession, user_id: int) -> Optional[Setting]:
+    """Busca configurações do usuário."""
+    return (await db.scalars(select(Setting).where(Setting.user_id == user_id))).first()
+
+
+async def create_default_settings(db: AsyncSession, user_id: int) -> Setting:
+    """Cria configurações padrão para o usuário."""
+    db_settings = Setting(user_id=user_id)
+    db.add(db_settings)
+    await db.flush()
+    await record_changes(db, user_id, "settings", [db_settings.id])
+    return db_settings
+
+
+async def upsert_settings(db: AsyncSession, user_id: int, settings: schemas.SettingsIn) -> Setting:
+    """Cria ou atualiza configurações do usuário."""
+    db_settings = await _upsert(
+        db, Setting,
+        values={"user_id": user_id, **settings.dict()},
+        conflict=("user_id",),
+        update=("theme_mode", "playback_speed", "auto_resume"),
+    )
+    await record_changes(db, user_id, "settings", [db_settings.id])
+    return db_settings
+
+
+# ==================== STATISTICS CRUD ====================
+async def get_user_statistics(db: AsyncSession, user_id: int) -> Optional[Statistics]:
+    """Busca estatísticas do usuário."""
+    return (await db.scalars(select(Statistics).where(Statistics.user_id == user_id))).first()
+
+
+async def create_default_statistics(db: AsyncSession, user_id: int) -> Statistics:
+    """Cria estatísticas padrão para o usuário."""
+    db_stats = Statistics(user_id=user_id)
+    db.add(db_stats)
+    await db.flush()
+    await record_changes(db, user_id, "statistics", [db_stats.id])
+    return db_stats
+
+
+async def upsert_statistics(db: AsyncSession, user_id: int, statistics: schemas.StatisticsIn) -> Statistics:
+    """Cria ou atualiza estatísticas do usuário."""
+    db_stats = await _upsert(
+        db, Statistics,
+        values={"user_id": user_id, **statistics.dict()},
+        conflict=("user_id",),
+        update=("total_play_count", "total_listen_time_ms", "favorite_count", "playlist_count"),
+    )
+    await record_changes(db, user_id, "statistics", [db_stats.id])
+    return db_stats
+
+
+# ==================== CHANGE MARKERS (ETag) ====================
+async def get_change_marker(db: AsyncSession, model: type[Base], user_id: int) -> tuple:
+    """Marcador barato de mudança: (contagem, maior updated_at) das linhas do usuário."""
+    result = await db.execute(
+        select(func.count(model.id), func.max(model.updated_at)).where(model.user_id == user_id)
+    )
+    return tuple(result.one())
+
+
+async def get_playlists_change_marker(db: AsyncSession, user_id: int) -> tuple:
+    """Marcador de mudança das playlists do usuário, incluindo os itens."""
+    result = await db.execute(
+        select(
+            func.count(func.distinct(Playlist.id)),
+            func.max(Playlist.updated_at),
+            func.count(PlaylistItem.id),
+            func.max(PlaylistItem.updated_at),
+        ).outerjoin(
+            PlaylistItem, PlaylistItem.playlist_id == Playlist.id
+        ).where(Playlist.user_id == user_id)
+    )
+    return tuple(result.one())
@@ -3,19 +3,38 @@
 Camada de acesso a dados (SQLAlchemy) para a API Mediaplay.
 
 - Normaliza URLs do Render (postgres:// → postgresql+psycopg://).
-- Cria o Engine com pool_pre_ping (evita conexões zumbis).
+- Cria os Engines com o pool de POOL_* (tamanho, overflow, recycle, timeout
+  e estratégia de pre-ping), instrumentado por app.pool_metrics.
 - Controla echo de SQL via settings.sql_echo.
 - Expõe SessionLocal, dependência get_db e a função init_db().
+- Com ASYNC_DB=true, expõe também async_engine, AsyncSessionLocal e get_async_db.
+- DATABASE_READ_URL opcional: ReadSessionLocal lê da réplica (ver
+  app.deps.get_read_db para o read-your-writes).
+- SQLite em arquivo: WAL + pragmas em cada conexão, um único writer e um
+  pool de conexões só-leitura (ver RoutingSession). Com ASYNC_DB=true, os
+  writers das duas stacks fazem a mesma fila (WriterGate). A fila é do
+  processo: com SQLite, rode um único worker do uvicorn.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Generator
+import threading
+import time
+import weakref
+from typing import AsyncGenerator, Callable, Generator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Any, Optional
 
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, SessionTransaction, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.util import await_only
+
+from app import pool_metrics
 from app.config import settings  # precisa existir (ver exemplo de config abaixo)
 
 try:
@@ -40,25 +59,353 @@ def _normalize(url: str) -> str:
 
 SQLALCHEMY_DATABASE_URL = _normalize(settings.database_url)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    echo=getattr(settings, "sql_echo", False),
-)
+
+# ==================== SQLITE ====================
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _sqlite_pragmas(read_only: bool):
+    """
+    Listener de "connect": WAL deixa leitores e o writer trabalharem ao mesmo
+    tempo; synchronous=NORMAL é seguro com WAL (só o último commit pode se
+    perder numa queda de energia). As conexões de leitura usam query_only.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kib}",
+    ]
+    pragmas.insert(0, "PRAGMA query_only = ON" if read_only else "PRAGMA journal_mode = WAL")
+
+    def on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+# ==================== POOL ====================
+def _mark_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+    connection_record.info["checked_in_at"] = time.monotonic()
+
+
+def _ping_if_idle(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+    """
+    POOL_PRE_PING=idle: só testa conexões paradas há mais de
+    POOL_PRE_PING_IDLE_SECONDS (as quentes não pagam o SELECT 1 a cada
+    checkout). DisconnectionError faz o pool descartá-la e abrir outra.
+    """
+    checked_in_at = connection_record.info.get("checked_in_at")
+    if checked_in_at is None or time.monotonic() - checked_in_at < settings.pool_pre_ping_idle_seconds:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.close()
+    except Exception as e:
+        raise exc.DisconnectionError() from e
+
+
+class WriterGate:
+    """
+    Vez única de escrita num SQLite em arquivo, compartilhada pelos writers
+    da stack síncrona e da assíncrona. Cada engine tem seu pool de uma
+    conexão (o driver é outro), mas o arquivo só aceita um writer: sem a
+    vez compartilhada, as duas conexões disputariam o lock do SQLite
+    (busy_timeout) em vez de esperar na fila. O pool do writer pega a vez
+    no checkout e a devolve no checkin (ver pool_class).
+
+    A vez só vale dentro do processo. Com `uvicorn --workers N` sobre o
+    mesmo arquivo, os writers de cada worker voltam a disputar o lock do
+    SQLite e a latência de escrita dispara: SQLite é um worker só
+    (benchmarks.loadtest recusa --workers > 1 com SQLite).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Fila de cada event loop na frente da vez (ver acquire_async)
+        self._loop_queues: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Loop e fila de quem tem a vez, se ela foi pega por acquire_async
+        self._async_holder: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+    def _timed_out(self) -> exc.TimeoutError:
+        return exc.TimeoutError(
+            f"Vez de escrita do SQLite não liberada em {settings.pool_timeout_seconds}s", code="3o7r",
+        )
+
+    def acquire(self) -> None:
+        if not self._lock.acquire(timeout=settings.pool_timeout_seconds):
+            raise self._timed_out()
+
+    async def acquire_async(self) -> None:
+        """
+        Espera a vez sem bloquear o event loop. As corrotinas do loop fazem
+        fila num asyncio.Lock; só a primeira da fila espera o lock da vez
+        (que a stack síncrona também disputa) numa thread do executor, em
+        vez de uma thread bloqueada por writer na fila.
+        """
+        loop = asyncio.get_running_loop()
+        queue = self._loop_queues.setdefault(loop, asyncio.Lock())
+        deadline = time.monotonic() + settings.pool_timeout_seconds
+        try:
+            await asyncio.wait_for(queue.acquire(), settings.pool_timeout_seconds)
+        except asyncio.TimeoutError:
+            raise self._timed_out() from None
+
+        if not self._lock.acquire(blocking=False):
+            waiting = loop.run_in_executor(None, self._lock.acquire, True, max(deadline - time.monotonic(), 0))
+            try:
+                acquired = await asyncio.shield(waiting)
+            except BaseException:
+                # Request cancelado na fila: devolve a vez (e a fila) quando a thread a obtiver
+                def abandon(done: asyncio.Future) -> None:
+                    if done.result():
+                        self._lock.release()
+                    queue.release()
+                waiting.add_done_callback(abandon)
+                raise
+            if not acquired:
+                queue.release()
+                raise self._timed_out()
+        self._async_holder = (loop, queue)
+
+    def release(self) -> None:
+        holder, self._async_holder = self._async_holder, None
+        self._lock.release()
+        if holder is not None:
+            loop, queue = holder
+            if asyncio._get_running_loop() is loop:
+                queue.release()
+            elif not loop.is_closed():
+                # Checkin fora do loop (ex.: conexão coletada pelo GC em outra thread)
+                loop.call_soon_threadsafe(queue.release)
+
+    def pool_class(self, base: type[Pool]) -> type[Pool]:
+        """Subclasse de `base` (QueuePool/AsyncAdaptedQueuePool) que usa esta vez."""
+        gate = self
+
+        class GatedPool(base):  # type: ignore[valid-type, misc]
+            def _do_get(self) -> Any:
+                if self._is_asyncio:
+                    await_only(gate.acquire_async())
+                else:
+                    gate.acquire()
+                try:
+                    return super()._do_get()
+                except BaseException:
+                    gate.release()
+                    raise
+
+            def _do_return_conn(self, record: Any) -> None:
+                try:
+                    super()._do_return_conn(record)
+                finally:
+                    gate.release()
+
+        GatedPool.__name__ = f"Gated{base.__name__}"
+        return GatedPool
+
+
+def _pool_kw(
+    url: str,
+    is_async: bool,
+    pool_size: Optional[int],
+    max_overflow: Optional[int],
+    writer_gate: Optional[WriterGate] = None,
+) -> dict[str, Any]:
+    """Opções POOL_* para o create_engine; SQLite em memória mantém o pool do dialeto."""
+    if make_url(url).get_backend_name() == "sqlite" and not _is_sqlite_file(url):
+        return {}
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    return {
+        "poolclass": pool_metrics.timed_pool_class(writer_gate.pool_class(base) if writer_gate else base),
+        "pool_size": settings.pool_size if pool_size is None else pool_size,
+        "max_overflow": settings.max_overflow if max_overflow is None else max_overflow,
+        "pool_timeout": settings.pool_timeout_seconds,
+        "pool_recycle": settings.pool_recycle_seconds,
+    }
+
+
+def make_engine(
+    url: str,
+    name: str,
+    *,
+    is_async: bool = False,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    sqlite_read_only: Optional[bool] = None,
+    writer_gate: Optional[WriterGate] = None,
+) -> Any:
+    """
+    Engine (ou AsyncEngine) com o pool configurado em POOL_* e instrumentado
+    (ver app.pool_metrics; aparece em /debug/pool como `name`). Com
+    `sqlite_read_only` definido, aplica os pragmas de _sqlite_pragmas; com
+    `writer_gate`, o checkout espera a vez de escrita.
+    """
+    factory = create_async_engine if is_async else create_engine
+    new_engine = factory(
+        url,
+        echo=getattr(settings, "sql_echo", False),
+        pool_pre_ping=settings.pool_pre_ping == "always",
+        **_pool_kw(url, is_async, pool_size, max_overflow, writer_gate),
+    )
+    sync_engine = new_engine.sync_engine if is_async else new_engine
+    if sqlite_read_only is not None:
+        event.listen(sync_engine, "connect", _sqlite_pragmas(read_only=sqlite_read_only))
+    if settings.pool_pre_ping == "idle":
+        event.listen(sync_engine, "checkin", _mark_checkin)
+        event.listen(sync_engine, "checkout", _ping_if_idle)
+    pool_metrics.register(name, sync_engine)
+    return new_engine
+
+
+def create_sqlite_engines(
+    url: str, name: str = "primary", is_async: bool = False, gate: Optional[WriterGate] = None,
+) -> tuple[Any, Any]:
+    """
+    (writer, reader) para um SQLite em arquivo. O writer tem uma única
+    conexão e espera a vez de escrita (`gate`, para dividi-la com o writer
+    de outro engine do mesmo arquivo): requests que escrevem fazem fila em
+    vez de falhar com "database is locked".
+    """
+    writer = make_engine(
+        url, name, is_async=is_async, pool_size=1, max_overflow=0, sqlite_read_only=False,
+        writer_gate=gate or WriterGate(),
+    )
+    reader = make_engine(
+        url, f"{name}_reader", is_async=is_async,
+        pool_size=settings.sqlite_read_pool_size, max_overflow=0, sqlite_read_only=True,
+    )
+    return writer, reader
+
+
+class RoutingSession(Session):
+    """
+    Sessão com engine de leitura separado (`reader`). SELECTs vão para o
+    reader até a primeira escrita da transação (flush ou INSERT/UPDATE/
+    DELETE); a partir daí tudo vai para o writer, que enxerga as escritas
+    ainda não commitadas. Sem reader, comporta-se como Session.
+    """
+
+    def __init__(self, *args: Any, reader: Optional[Engine] = None, **kw: Any):
+        super().__init__(*args, **kw)
+        self.reader = reader
+        self._writing = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self.reader is None or kw.get("bind") is not None:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if not self._writing and not self._flushing and clause is not None and not getattr(clause, "is_dml", False):
+            return self.reader
+        self._writing = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session: RoutingSession, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session._writing = False
+
+
+_sqlite_tuned = settings.sqlite_tuning and _is_sqlite_file(SQLALCHEMY_DATABASE_URL)
+
+# Vez de escrita única do arquivo, para o writer síncrono e o assíncrono
+sqlite_writer_gate = WriterGate() if _sqlite_tuned else None
+
+if _sqlite_tuned:
+    engine, read_engine = create_sqlite_engines(SQLALCHEMY_DATABASE_URL, gate=sqlite_writer_gate)
+else:
+    engine = make_engine(SQLALCHEMY_DATABASE_URL, "primary")
+    read_engine = None
 
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
     bind=engine,
+    reader=read_engine,
 )
 
+# Réplica de leitura opcional. Escritas acidentais numa sessão de leitura
+# continuam indo para o primário (RoutingSession).
+replica_engine = None
+ReadSessionLocal = SessionLocal
 
-def get_db() -> Generator:
+if settings.database_read_url:
+    REPLICA_DATABASE_URL = _normalize(settings.database_read_url)
+    replica_engine = make_engine(
+        REPLICA_DATABASE_URL, "replica", sqlite_read_only=True if _is_sqlite_file(REPLICA_DATABASE_URL) else None,
+    )
+    ReadSessionLocal = sessionmaker(
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+        reader=replica_engine,
+    )
+
+
+def _async_url(url: str) -> str:
+    """Troca o driver síncrono pelo equivalente assíncrono."""
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1).replace("sqlite+pysqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+psycopg://", 1)
+    return url
+
+
+# Stack assíncrona opcional (ASYNC_DB=true): mesmas rotas, handlers async.
+async_engine = None
+async_read_engine = None
+async_replica_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+if settings.async_db:
+    if _sqlite_tuned:
+        async_engine, async_read_engine = create_sqlite_engines(
+            _async_url(SQLALCHEMY_DATABASE_URL), "async_primary", is_async=True, gate=sqlite_writer_gate,
+        )
+    else:
+        async_engine = make_engine(_async_url(SQLALCHEMY_DATABASE_URL), "async_primary", is_async=True)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=RoutingSession,
+        reader=async_read_engine.sync_engine if async_read_engine is not None else None,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    AsyncReadSessionLocal = AsyncSessionLocal
+    if settings.database_read_url:
+        async_replica_engine = make_engine(
+            _async_url(REPLICA_DATABASE_URL), "async_replica", is_async=True,
+            sqlite_read_only=True if _is_sqlite_file(REPLICA_DATABASE_URL) else None,
+        )
+        AsyncReadSessionLocal = async_sessionmaker(
+            bind=async_engine,
+            sync_session_class=RoutingSession,
+            reader=async_replica_engine.sync_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+
+def session_scope(factory: Callable[[], Session] = SessionLocal) -> Generator:
     """
-    Dependência FastAPI: injeta uma sessão por request.
-        def endpoint(db: Session = Depends(get_db)): ...
+    Unit of work: as funções de app.crud só fazem flush; o commit
+    (único por request) acontece aqui, antes da resposta ser enviada.
     """
-    db = SessionLocal()
+    db = factory()
     try:
         yield db
         db.commit()
@@ -69,18 +416,61 @@ def get_db() -> Generator:
         db.close()
 
 
+def get_db() -> Generator:
+    """
+    Dependência FastAPI: injeta uma sessão por request.
+        def endpoint(db: Session = Depends(get_db)): ...
+    """
+    yield from session_scope(SessionLocal)
+
+
+async def async_session_scope(factory: Optional[Callable[[], AsyncSession]]) -> AsyncGenerator[AsyncSession, None]:
+    """Versão assíncrona de session_scope."""
+    if factory is None:
+        raise RuntimeError("Stack assíncrona desativada (defina ASYNC_DB=true).")
+    async with factory() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependência FastAPI assíncrona (ASYNC_DB=true): mesma semântica de get_db.
+        async def endpoint(db: AsyncSession = Depends(get_async_db)): ...
+    """
+    async for db in async_session_scope(AsyncSessionLocal):
+        yield db
+
+
 def init_db() -> None:
     """
-    Inicializa/verifica o schema de banco em tempo de execução.
-    Idempotente: se as tabelas já existem, não recria.
+    Verifica o schema na inicialização com uma única consulta à tabela de
+    versão (ver app.migrations); DDL só roda se o banco estiver atrás de HEAD.
+    Com AUTO_MIGRATE=false, as pendentes ficam para
+    `python -m app.migrations upgrade`.
     """
     if Base is None:
-        log.warning("Base não encontrada; init_db não executará create_all (ok se usar Alembic).")
+        log.warning("Base não encontrada; init_db não verificará o schema.")
+        return
+    from app import migrations
+    
+    version = migrations.current_version(engine)
+    if version >= migrations.head():
+        log.info("Schema atual (versão %d).", version)
+        return
+    if not settings.auto_migrate:
+        log.error(
+            "Schema na versão %d, HEAD é %d: rode `python -m app.migrations upgrade`.",
+            version, migrations.head(),
+        )
         return
     try:
-        Base.metadata.create_all(bind=engine)
-        log.info("Tabelas verificadas/criadas com Base.metadata.create_all.")
+        applied = migrations.upgrade(engine)
+        log.info("Migrações aplicadas: %s", applied)
     except Exception as e:
-        log.exception("Falha no init_db/create_all: %s", e)
+        log.exception("Falha ao migrar o schema: %s", e)
         raise
-
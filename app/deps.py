@@ -1,22 +1,27 @@
 """Dependências compartilhadas."""
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.db import get_db
+from app.cache import cache_user, get_cached_user, get_cached_user_async, user_cache, wrote_recently
+from app.db import (
+    AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal,
+    async_session_scope, get_async_db, get_db, session_scope,
+)
 from app.models import User
+from app.position_buffer import position_buffer
 from app.security import decode_access_token
 
 # Schema de autenticação
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtém o usuário atual do JWT token."""
+def _user_id_from_credentials(credentials: HTTPAuthorizationCredentials) -> int:
+    """Valida o JWT e retorna o user_id do payload."""
     token = credentials.credentials
     payload = decode_access_token(token)
     
@@ -37,18 +42,139 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    return user_id
+
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Usuário não encontrado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _load_user(db: Session, user_id: int) -> User:
+    """Usuário do cache (anexado a `db`, sem SQL) ou do banco via `db`."""
+    user = get_cached_user(db, user_id)
+    if user is None:
+        generation = user_cache.generation
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            cache_user(user, generation)
     
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Usuário não encontrado",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _user_not_found()
     
     return user
 
 
+async def _load_user_async(db: AsyncSession, user_id: int) -> User:
+    """Versão assíncrona de _load_user."""
+    user = await get_cached_user_async(db, user_id)
+    if user is None:
+        generation = user_cache.generation
+        user = (await db.scalars(select(User).where(User.id == user_id))).first()
+        if user is not None:
+            cache_user(user, generation)
+    
+    if user is None:
+        raise _user_not_found()
+    
+    return user
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Obtém o usuário atual do JWT token."""
+    return _load_user(db, _user_id_from_credentials(credentials))
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Versão assíncrona de get_current_user (ASYNC_DB=true)."""
+    return await _load_user_async(db, _user_id_from_credentials(credentials))
+
+
+def get_read_db(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Generator:
+    """
+    Sessão das rotas só-leitura: lê da réplica (DATABASE_READ_URL), exceto
+    para quem escreveu há pouco (read-your-writes, ver app.cache.recent_writers).
+    O user_id vem do token, então a sessão é escolhida antes de carregar o
+    usuário, que é lido nela mesma (ver get_read_user).
+    """
+    user_id = _user_id_from_credentials(credentials)
+    yield from session_scope(SessionLocal if wrote_recently(user_id) else ReadSessionLocal)
+
+
+async def get_read_db_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Versão assíncrona de get_read_db."""
+    user_id = _user_id_from_credentials(credentials)
+    factory = AsyncSessionLocal if wrote_recently(user_id) else AsyncReadSessionLocal
+    async for db in async_session_scope(factory):
+        yield db
+
+
+def get_read_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+) -> User:
+    """
+    get_current_user das rotas só-leitura: carrega o usuário na sessão de
+    leitura do request (o FastAPI reaproveita a mesma instância de
+    get_read_db), em vez de abrir outra conexão só para ele.
+    """
+    return _load_user(db, _user_id_from_credentials(credentials))
+
+
+async def get_read_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db_async)
+) -> User:
+    """Versão assíncrona de get_read_user."""
+    return await _load_user_async(db, _user_id_from_credentials(credentials))
+
+
+def get_history_db(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Generator:
+    """
+    get_read_db de GET /history: antes grava as posições pendentes do
+    usuário (ver PositionBuffer.flush_user). O commit marca o usuário como
+    escritor recente, então a leitura vai ao primário e já vê as linhas.
+    """
+    position_buffer.flush_user(_user_id_from_credentials(credentials))
+    yield from get_read_db(credentials)
+
+
+async def get_history_db_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Versão assíncrona de get_history_db (o buffer grava pelo engine síncrono)."""
+    await run_in_threadpool(position_buffer.flush_user, _user_id_from_credentials(credentials))
+    async for db in get_read_db_async(credentials):
+        yield db
+
+
+def get_history_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_history_db)
+) -> User:
+    """get_read_user de GET /history (na sessão de get_history_db)."""
+    return _load_user(db, _user_id_from_credentials(credentials))
+
+
+async def get_history_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_history_db_async)
+) -> User:
+    """Versão assíncrona de get_history_user."""
+    return await _load_user_async(db, _user_id_from_credentials(credentials))
+
+
 def get_current_user_id(
     current_user: User = Depends(get_current_user)
 ) -> int:
@@ -0,0 +1,43 @@
+"""
+GET condicional (ETag / If-None-Match) para os endpoints por usuário.
+
+O ETag é derivado de um marcador de mudança barato (ex.: contagem + maior
+updated_at, uma única query agregada) e da query string, de modo que um
+If-None-Match válido responde 304 sem carregar nem serializar as linhas.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(marker: Any, request: Request) -> str:
+    """ETag forte a partir do marcador + path + query string."""
+    raw = f"{request.url.path}?{request.url.query}|{marker!r}".encode()
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca (RFC 9110 §13.1.2): ignora o prefixo W/."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, response: Response, marker: Any) -> Optional[Response]:
+    """
+    Define o header ETag na resposta; se o cliente já tem essa versão,
+    retorna a resposta 304 que o handler deve devolver.
+    """
+    etag = make_etag(marker, request)
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
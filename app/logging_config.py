@@ -0,0 +1,123 @@
+"""
+Logging do processo sem I/O no event loop.
+
+Os registros só são enfileirados (QueueHandler); uma thread QueueListener
+formata e escreve no stderr. Com LOG_FORMAT=json sai uma linha JSON por
+registro, e os campos passados em `extra=` viram chaves do JSON.
+
+log_request (chamado por app.metrics.MetricsMiddleware) emite a linha de
+acesso: uma por request, com amostragem dos bem-sucedidos
+(LOG_REQUEST_SAMPLE_RATE); erros (5xx) e requests lentos
+(LOG_SLOW_REQUEST_MS) sempre entram.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Optional
+
+from app.config import settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Atributos padrão de LogRecord: o que sobrar veio de `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro (ts, level, logger, msg + extras)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _EnqueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare formata a mensagem inteira na thread que loga; aqui
+    só resolvemos os args (e o traceback, raro) e o resto fica para o listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Troca os handlers do root (e do uvicorn) pela fila. Idempotente."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    queue: SimpleQueue = SimpleQueue()
+    _listener = QueueListener(queue, stream, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [_EnqueueHandler(queue)]
+    root.setLevel(settings.log_level)
+    for name in ("uvicorn", "uvicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    # A linha de acesso do uvicorn é substituída por log_request
+    logging.getLogger("uvicorn.access").disabled = True
+
+
+def shutdown_logging() -> None:
+    """Esvazia a fila e para a thread (shutdown da aplicação)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+access_log = logging.getLogger("app.access")
+
+
+def log_request(
+    method: str, route: str, path: str, status: int, duration: float, statements: int, db_seconds: float
+) -> None:
+    """Linha de acesso estruturada (ver o docstring do módulo)."""
+    duration_ms = duration * 1000
+    if status >= 500:
+        level = logging.ERROR
+    elif duration_ms >= settings.log_slow_request_ms:
+        level = logging.WARNING
+    elif random.random() < settings.log_request_sample_rate:
+        level = logging.INFO
+    else:
+        return
+    if not access_log.isEnabledFor(level):
+        return
+    access_log.log(level, "request", extra={
+        "method": method,
+        "route": route,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "db_statements": statements,
+        "db_ms": round(db_seconds * 1000, 2),
+    })
@@ -1,14 +1,21 @@
 import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.routers import auth, favorites, playlists, debug, history, settings, statistics, tags
+from app.config import settings as app_settings
+from app.logging_config import setup_logging, shutdown_logging
+from app.metrics import MetricsMiddleware, render as render_metrics
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import auth, favorites, playlists, debug, history, settings, statistics, sync, tags
 
-# Configurar logging para aparecer no Render
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+if app_settings.async_db:
+    # Stack assíncrona: mesmas rotas, handlers async sobre AsyncEngine
+    from app.routers.aio import favorites, playlists, history, settings, statistics, tags
+
+# Logging via fila (ver app.logging_config): JSON por linha no stderr do Render
+setup_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Mediaplay API", version="0.1.0")
@@ -19,8 +26,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Latência, status e SQL por rota + linha de log por request (ver app.metrics e GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/", tags=["default"])
 def root():
     return {
@@ -31,29 +42,42 @@ def root():
 
 @app.get("/health", tags=["default"])
 def health():
-    logger.info("Health check realizado")
+    logger.debug("Health check realizado")
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas deste worker no formato texto do Prometheus."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
-    """Evento de startup - cria tabelas do banco."""
+    """Evento de startup - verifica o schema do banco (migrações)."""
     logger.info("Mediaplay API iniciando...")
     try:
         from app.db import init_db
         init_db()
         logger.info("Banco de dados inicializado com sucesso!")
     except Exception as e:
+        # Schema em estado desconhecido: aborta o startup em vez de servir sobre ele
         logger.exception(f"Erro ao inicializar banco de dados: {e}")
+        raise
     
+    from app.position_buffer import position_buffer
+    position_buffer.start()
     logger.info("API pronta para receber requisicoes!")
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Middleware para logar todas as requisições."""
-    logger.info(f"REQUEST: {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"RESPONSE: {request.method} {request.url.path} - Status: {response.status_code}")
-    return response
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Evento de shutdown - drena o buffer de posições, fecha os pools assíncronos e esvazia a fila de logs."""
+    from app.position_buffer import position_buffer
+    await run_in_threadpool(position_buffer.stop)
+    
+    from app.db import async_engine, async_read_engine, async_replica_engine
+    for engine in (async_engine, async_read_engine, async_replica_engine):
+        if engine is not None:
+            await engine.dispose()
+    shutdown_logging()
 
 # Inclui rotas esperadas pelo frontend
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -63,6 +87,7 @@ app.include_router(history.router, tags=["history"])
 app.include_router(settings.router, tags=["settings"])
 app.include_router(statistics.router, tags=["statistics"])
 app.include_router(tags.router, tags=["tags"])
+app.include_router(sync.router, tags=["sync"])
 
 # Rotas de debug
 app.include_router(debug.router, tags=["debug"])
@@ -0,0 +1,294 @@
+"""
+Instrumentação por worker: latência por rota, contadores de requests e
+erros, requests em andamento e SQL por request.
+
+- MetricsMiddleware (ASGI puro, sem BaseHTTPMiddleware) mede cada request
+  e rotula pelo template da rota (`/playlists/{playlist_id}`), não pelo
+  path, para a cardinalidade ficar limitada.
+- O mesmo middleware emite a linha de acesso estruturada
+  (app.logging_config.log_request).
+- Listeners de Engine (todos os engines, inclusive os assíncronos) contam
+  statements e tempo de SQL no request corrente via ContextVar; com
+  QUERY_BUDGET ligado, também as repetições de cada statement, checadas
+  contra o orçamento da rota (app.query_budget).
+- render() gera o formato texto do Prometheus (GET /metrics);
+  latency_summary() estima p50/p95/p99 a partir dos buckets (GET /debug/latency).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import query_budget
+from app.logging_config import log_request
+from app.pool_metrics import pool_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotônico por combinação de labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_label_str(self.labelnames, labels)} {_fmt(value)}"
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: requests em andamento)."""
+
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram:
+    """Histograma de buckets fixos (cumulativos na exposição, como o Prometheus)."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...], labelnames: Labels = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labelnames = labelnames
+        # labels -> [contagem por bucket (+Inf no fim), soma]
+        self._series: dict[Labels, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _snapshot(self) -> list[tuple[Labels, list[float]]]:
+        with self._lock:
+            return [(labels, list(series)) for labels, series in self._series.items()]
+
+    def samples(self) -> Iterator[str]:
+        bounds = [_fmt(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, series in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{_label_str(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_str(self.labelnames, labels)} {_fmt(series[-1])}"
+            yield f"{self.name}_count{_label_str(self.labelnames, labels)} {cumulative}"
+
+    def quantiles(self, qs: Iterable[float] = QUANTILES) -> dict[Labels, dict[str, Any]]:
+        """Estimativa por interpolação linear no bucket (como histogram_quantile)."""
+        result = {}
+        for labels, series in self._snapshot():
+            counts, total = series[:-1], sum(series[:-1])
+            estimates = {}
+            for q in qs:
+                rank, cumulative, lower = q * total, 0, 0.0
+                for i, count in enumerate(counts):
+                    upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                    if count and cumulative + count >= rank:
+                        estimates[f"p{round(q * 100)}"] = round(lower + (upper - lower) * (rank - cumulative) / count, 6)
+                        break
+                    cumulative += count
+                    lower = upper
+            result[labels] = {"count": total, "sum": round(series[-1], 6), **estimates}
+        return result
+
+
+# ==================== MÉTRICAS ====================
+HTTP_LABELS = ("method", "route")
+
+requests_total = Counter("http_requests_total", "Requests por rota e status.", HTTP_LABELS + ("status",))
+request_errors_total = Counter(
+    "http_request_errors_total", "Respostas 5xx e exceções não tratadas por rota.", HTTP_LABELS,
+)
+requests_in_flight = Gauge("http_requests_in_flight", "Requests em andamento neste worker.")
+request_duration = Histogram(
+    "http_request_duration_seconds", "Latência por rota (até o fim da resposta).", LATENCY_BUCKETS, HTTP_LABELS,
+)
+request_statements = Histogram(
+    "http_request_db_statements", "Statements SQL por request.", STATEMENT_BUCKETS, HTTP_LABELS,
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Tempo em SQL por request.", LATENCY_BUCKETS, HTTP_LABELS,
+)
+db_statements_total = Counter("db_statements_total", "Statements SQL executados (dentro e fora de requests).")
+db_seconds_total = Counter("db_statement_seconds_total", "Tempo total em SQL.")
+
+REGISTRY = (
+    requests_total, request_errors_total, requests_in_flight, request_duration,
+    request_statements, request_db_time, db_statements_total, db_seconds_total,
+)
+
+
+# ==================== SQL POR REQUEST ====================
+class RequestStats:
+    """Acumulado de SQL do request corrente (compartilhado com o threadpool via ContextVar)."""
+
+    __slots__ = ("statements", "db_seconds", "shapes")
+
+    def __init__(self, track_shapes: bool = False) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+        # SQL -> execuções no request (só com o orçamento ligado)
+        self.shapes: Optional[dict[str, int]] = {} if track_shapes else None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._metrics_start
+    db_statements_total.inc()
+    db_seconds_total.inc(amount=elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        if stats.shapes is not None:
+            stats.shapes[statement] = stats.shapes.get(statement, 0) + 1
+
+
+# ==================== MIDDLEWARE ====================
+def route_template(scope: dict) -> str:
+    """Template da rota que atendeu o request ("unmatched" para 404 sem rota)."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Mede cada request HTTP; ver o docstring do módulo."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(track_shapes=query_budget.enabled())
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            requests_in_flight.dec()
+            _current.reset(token)
+            labels = (scope["method"], route_template(scope))
+            requests_total.inc(labels + (str(status),))
+            if status >= 500:
+                request_errors_total.inc(labels)
+            request_duration.observe(labels, duration)
+            request_statements.observe(labels, stats.statements)
+            request_db_time.observe(labels, stats.db_seconds)
+            log_request(*labels, scope["path"], status, duration, stats.statements, stats.db_seconds)
+        if stats.shapes is not None:
+            query_budget.check(scope, stats.statements, stats.shapes)
+
+
+# ==================== EXPOSIÇÃO ====================
+def render() -> str:
+    """Todas as métricas no formato texto do Prometheus (0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+
+    pools = pool_stats()
+    for field, help in (
+        ("checked_out", "Conexões em uso."),
+        ("overflow_in_use", "Conexões de overflow em uso."),
+        ("size", "Tamanho configurado do pool."),
+        ("checkouts", "Checkouts acumulados."),
+        ("timeouts", "Checkouts que estouraram POOL_TIMEOUT."),
+        ("wait_ms_max", "Maior espera no checkout (ms)."),
+    ):
+        name = f"db_pool_{field}"
+        kind = "counter" if field in ("checkouts", "timeouts") else "gauge"
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f'{name}{{pool="{pool}"}} {_fmt(stats[field])}' for pool, stats in pools.items())
+    return "\n".join(lines) + "\n"
+
+
+def latency_summary() -> dict[str, dict[str, Any]]:
+    """p50/p95/p99 estimados por rota, com a média de statements SQL."""
+    statements = request_statements.quantiles(())
+    summary = {}
+    for labels, estimates in request_duration.quantiles().items():
+        sql = statements.get(labels, {"count": 0, "sum": 0})
+        summary[" ".join(labels)] = {
+            **estimates,
+            "db_statements_avg": round(sql["sum"] / sql["count"], 2) if sql["count"] else 0.0,
+        }
+    return summary
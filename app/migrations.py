@@ -0,0 +1,355 @@
+"""
+Migrações de schema versionadas.
+
+A tabela `schema_version` guarda as versões aplicadas. Na inicialização,
+app.db.init_db faz uma única consulta (a maior versão aplicada) e só roda
+DDL se o banco estiver atrás de HEAD. Banco vazio: create_all com o layout
+atual e marca todas as versões como aplicadas.
+
+Para aplicar as pendentes fora do boot:
+    python -m app.migrations upgrade
+    python -m app.migrations status
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import Any, Callable, NamedTuple, Optional
+
+from sqlalchemy import MetaData, Table, UniqueConstraint, and_, exists, func, inspect, insert, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import AddConstraint, CreateTable
+
+from app.crud import _media_insert_stmt, _media_rows
+from app.models import (
+    Base, Favorite, HistoryItem, Media, MediaTag, MediaType, PlaylistItem, SchemaVersion, media_key, mozambique_now
+)
+
+log = logging.getLogger(__name__)
+
+# Chave do advisory lock (PostgreSQL) que serializa workers migrando ao mesmo tempo
+_PG_LOCK_KEY = 7_340_001
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def current_version(engine: Engine) -> int:
+    """Maior versão aplicada (0 se a tabela de versão ainda não existe). Uma query."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except SQLAlchemyError:
+        return 0
+
+
+def head() -> int:
+    return MIGRATIONS[-1].version
+
+
+def pending(version: int) -> list[Migration]:
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def upgrade(engine: Engine) -> list[int]:
+    """Aplica as migrações pendentes numa transação; retorna as versões aplicadas."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+        if not inspect(conn).has_table(Base.metadata.tables["users"].name):
+            # Banco novo: o layout atual já inclui todas as migrações
+            Base.metadata.create_all(conn)
+            _stamp(conn, MIGRATIONS)
+            log.info("Schema criado na versão %d", head())
+            return [migration.version for migration in MIGRATIONS]
+
+        SchemaVersion.__table__.create(conn, checkfirst=True)
+        version = conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+        todo = pending(version)  # relido sob o lock: outro worker pode ter migrado
+        for migration in todo:
+            log.info("Aplicando migração %d: %s", migration.version, migration.description)
+            migration.apply(conn)
+        _stamp(conn, todo)
+        return [migration.version for migration in todo]
+
+
+def _stamp(conn: Connection, migrations: list[Migration]) -> None:
+    if migrations:
+        now = mozambique_now()
+        conn.execute(insert(SchemaVersion), [
+            {"version": m.version, "description": m.description, "applied_at": now} for m in migrations
+        ])
+
+
+# ==================== MIGRAÇÕES ====================
+def _create_tables(*names: str) -> Callable[[Connection], None]:
+    """Migração que cria tabelas específicas declaradas nos modelos (as que faltarem)."""
+    def apply(conn: Connection) -> None:
+        Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in names])
+    return apply
+
+
+def _create_declared_indexes(conn: Connection) -> None:
+    """
+    create_all não adiciona índices a tabelas que já existem. Os upserts
+    (ON CONFLICT) e a paginação por keyset dependem dos índices declarados
+    nos modelos (os da versão 3; os posteriores têm migração própria), então
+    eles são criados aqui se faltarem.
+    """
+    _collapse_duplicate_statistics(conn)
+    _create_indexes(
+        "ix_users_id",
+        "ix_users_email",
+        "ix_favorites_id",
+        "ix_favorites_user_created",
+        "ix_history_id",
+        "ix_history_user_last_played",
+        "ix_playlists_id",
+        "ix_playlist_items_id",
+        "ix_playlist_items_playlist_position",
+        "ix_tags_id",
+        "ix_tags_user_created",
+        "ix_media_tags_id",
+        "ix_settings_id",
+        "ix_statistics_id",
+        "uq_statistics_user",
+        "ix_sync_changes_user_seq",
+    )(conn)
+
+
+def _collapse_duplicate_statistics(conn: Connection) -> None:
+    """
+    O schema inicial não impedia duas linhas de statistics para o mesmo
+    usuário, e uq_statistics_user não pode ser criado com duplicatas: fica
+    a de updated_at mais recente (empate: a de maior id).
+    """
+    table = Table("statistics", MetaData(), autoload_with=conn)
+    newer = table.alias("newer")
+    deleted = conn.execute(table.delete().where(exists().where(
+        newer.c.user_id == table.c.user_id,
+        or_(
+            newer.c.updated_at > table.c.updated_at,
+            and_(newer.c.updated_at == table.c.updated_at, newer.c.id > table.c.id),
+        ),
+    ))).rowcount
+    if deleted:
+        log.warning("statistics: %d linhas duplicadas descartadas antes de uq_statistics_user", deleted)
+
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    """Migração que cria índices específicos declarados nos modelos."""
+    def apply(conn: Connection) -> None:
+        indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+        for name in names:
+            indexes[name].create(conn, checkfirst=True)
+    return apply
+
+
+# Tabelas que passaram a referenciar o catálogo `media` (ver app.models.MediaRefMixin)
+MEDIA_REF_MODELS = (Favorite, HistoryItem, PlaylistItem, MediaTag)
+# ... e as que guardam os metadados da mídia (ver app.models.MediaMetadataMixin)
+MEDIA_METADATA_MODELS = (Favorite, HistoryItem, PlaylistItem)
+_LEGACY_MEDIA_COLUMNS = ("media_uri", "media_type")
+_MEDIA_METADATA = ("title", "mime_type", "duration_ms")
+_BATCH_SIZE = 500
+
+
+def _migrate_media_catalog(conn: Connection) -> None:
+    """
+    Move media_uri/media_type das tabelas legadas para `media` e troca a
+    chave natural por media_id; os metadados ficam em cada linha. Tabelas
+    que já têm media_id são ignoradas.
+    """
+    inspector = inspect(conn)
+    for model in MEDIA_REF_MODELS:
+        if "media_uri" in {column["name"] for column in inspector.get_columns(model.__tablename__)}:
+            _migrate_table(conn, model)
+
+
+def _as_media_type(value: Any) -> MediaType:
+    """SQLEnum grava o nome do membro ("AUDIO"); aceita também o valor."""
+    if isinstance(value, MediaType):
+        return value
+    return MediaType[value] if value in MediaType.__members__ else MediaType(value)
+
+
+def _natural_key(model: type[Base]) -> tuple[str, ...]:
+    """Colunas da constraint única nova (dono + media_id)."""
+    for constraint in model.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint) and "media_id" in constraint.columns:
+            return tuple(column.name for column in constraint.columns)
+    raise ValueError(f"{model.__tablename__} sem chave natural com media_id")
+
+
+def _migrate_table(conn: Connection, model: type[Base]) -> None:
+    name = model.__tablename__
+    legacy = Table(name, MetaData(), autoload_with=conn)
+    rows = [
+        dict(row) for row in
+        conn.execute(select(legacy).order_by(legacy.c.updated_at, legacy.c.id)).mappings()
+    ]
+
+    catalog: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        media_type = _as_media_type(row["media_type"])
+        row["media_id"] = media_key(row["media_uri"], media_type)
+        catalog.setdefault(row["media_id"], {"media_uri": row["media_uri"], "media_type": media_type})
+    entries = list(catalog.values())
+    for start in range(0, len(entries), _BATCH_SIZE):
+        conn.execute(_media_insert_stmt(conn.dialect.name), _media_rows(entries[start:start + _BATCH_SIZE]))
+
+    # A chave nova pode colapsar duplicatas que o banco legado aceitou: fica a mais recente
+    key = _natural_key(model)
+    kept = {tuple(row[column] for column in key): row for row in rows}
+    dropped = [row["id"] for row in rows if kept.get(tuple(row[column] for column in key)) is not row]
+    if dropped:
+        log.warning("%s: %d linhas duplicadas descartadas na migração para media_id", name, len(dropped))
+
+    if conn.dialect.name == "sqlite":
+        _rebuild_sqlite(conn, model, legacy, list(kept.values()))
+    else:
+        _alter_in_place(conn, model, legacy, list(kept.values()), dropped)
+    log.info("%s migrada para o catálogo de mídia (%d linhas, %d mídias)", name, len(kept), len(entries))
+
+
+def _rebuild_sqlite(conn: Connection, model: type[Base], legacy: Table, rows: list[dict[str, Any]]) -> None:
+    """
+    SQLite não remove colunas que participam de constraints: recria a tabela
+    (cria a nova, copia, remove a antiga e renomeia). Os índices ficam com
+    quem chama (a migração 3, na 2).
+    """
+    name = model.__tablename__
+    for index in inspect(conn).get_indexes(name):
+        conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+    scratch = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name != name:
+            table.to_metadata(scratch)
+    new = model.__table__.to_metadata(scratch, name=f"_new_{name}")
+    conn.execute(CreateTable(new))
+
+    columns = [column.name for column in new.columns]
+    values = [{column: row[column] for column in columns} for row in rows]
+    for start in range(0, len(values), _BATCH_SIZE):
+        conn.execute(new.insert(), values[start:start + _BATCH_SIZE])
+
+    legacy.drop(conn)
+    conn.execute(text(f'ALTER TABLE "_new_{name}" RENAME TO "{name}"'))
+
+
+def _alter_in_place(
+    conn: Connection, model: type[Base], legacy: Table, rows: list[dict[str, Any]], dropped: list[int]
+) -> None:
+    """PostgreSQL: adiciona media_id, preenche, troca as constraints e remove as colunas antigas."""
+    name = model.__tablename__
+    table = model.__table__
+    conn.execute(text(f'ALTER TABLE "{name}" ADD COLUMN media_id BIGINT'))
+    if rows:
+        conn.execute(
+            text(f'UPDATE "{name}" SET media_id = :media_id WHERE id = :id'),
+            [{"id": row["id"], "media_id": row["media_id"]} for row in rows],
+        )
+    if dropped:
+        conn.execute(legacy.delete().where(legacy.c.id.in_(dropped)))
+
+    for constraint in inspect(conn).get_unique_constraints(name):
+        conn.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint["name"]}"'))
+    for column in _LEGACY_MEDIA_COLUMNS:
+        if column in legacy.c:
+            conn.execute(text(f'ALTER TABLE "{name}" DROP COLUMN "{column}"'))
+    conn.execute(text(f'ALTER TABLE "{name}" ALTER COLUMN media_id SET NOT NULL'))
+
+    for fk in table.c.media_id.foreign_keys:
+        conn.execute(AddConstraint(fk.constraint))
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            conn.execute(AddConstraint(constraint))
+
+
+def _move_media_metadata(conn: Connection) -> None:
+    """
+    Bancos das versões 2 a 5 guardavam title/mime_type/duration_ms só em
+    `media`, compartilhados por todos os usuários: copia os valores do
+    catálogo para cada linha que referencia e remove as colunas de `media`.
+    Tabelas que já têm os metadados (migradas pela 2 com o layout atual)
+    são ignoradas.
+    """
+    inspector = inspect(conn)
+    media = Table("media", MetaData(), autoload_with=conn)
+    if "title" not in media.c:
+        return
+    for model in MEDIA_METADATA_MODELS:
+        if "title" in {column["name"] for column in inspector.get_columns(model.__tablename__)}:
+            continue
+        if conn.dialect.name == "sqlite":
+            legacy = Table(model.__tablename__, MetaData(), autoload_with=conn)
+            rows = [dict(row) for row in conn.execute(
+                select(legacy, func.coalesce(media.c.title, "").label("title"), media.c.mime_type, media.c.duration_ms)
+                .select_from(legacy.outerjoin(media, media.c.id == legacy.c.media_id))
+            ).mappings()]
+            _rebuild_sqlite(conn, model, legacy, rows)
+            for index in model.__table__.indexes:
+                index.create(conn, checkfirst=True)
+        else:
+            name = model.__tablename__
+            conn.execute(text(
+                f'ALTER TABLE "{name}" ADD COLUMN title VARCHAR, ADD COLUMN mime_type VARCHAR, '
+                'ADD COLUMN duration_ms INTEGER'
+            ))
+            conn.execute(text(
+                f"UPDATE \"{name}\" SET title = coalesce(media.title, ''), mime_type = media.mime_type, "
+                f"duration_ms = media.duration_ms FROM media WHERE media.id = \"{name}\".media_id"
+            ))
+            conn.execute(text(f'ALTER TABLE "{name}" ALTER COLUMN title SET NOT NULL'))
+        log.info("%s: metadados copiados do catálogo de mídia", model.__tablename__)
+    if conn.dialect.name == "sqlite" and conn.dialect.server_version_info < (3, 35):
+        # DROP COLUMN só existe a partir do SQLite 3.35: recria o catálogo
+        _rebuild_sqlite(conn, Media, media, [dict(row) for row in conn.execute(select(media)).mappings()])
+        for index in Media.__table__.indexes:
+            index.create(conn, checkfirst=True)
+        return
+    for column in _MEDIA_METADATA:
+        conn.execute(text(f'ALTER TABLE media DROP COLUMN "{column}"'))
+
+
+MIGRATIONS: list[Migration] = [
+    # Pré-versionamento: o schema inicial mais o catálogo de mídia e as tabelas de sync
+    Migration(1, "tabelas do schema inicial", _create_tables(
+        "users", "settings", "statistics", "playlists", "playlist_items", "favorites", "history",
+        "tags", "media_tags", "media", "sync_state", "sync_changes",
+    )),
+    Migration(2, "catálogo de mídia (media_id)", _migrate_media_catalog),
+    Migration(3, "índices declarados nos modelos", _create_declared_indexes),
+    Migration(4, "índices compostos das consultas por usuário", _create_indexes(
+        "ix_playlists_user_updated",
+        "ix_favorites_user_updated",
+        "ix_history_user_updated",
+        "ix_tags_user_updated",
+    )),
+    Migration(5, "índice de media_tags por mídia", _create_indexes("ix_media_tags_media")),
+    Migration(6, "metadados da mídia em cada linha, não no catálogo", _move_media_metadata),
+]
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=("status", "upgrade"))
+    args = parser.parse_args(argv)
+
+    from app.db import engine
+
+    if args.command == "upgrade":
+        applied = upgrade(engine)
+        print(f"Aplicadas: {applied}" if applied else "Nada a aplicar.")
+    version = current_version(engine)
+    print(f"Versão atual: {version} | HEAD: {head()} | pendentes: {[m.version for m in pending(version)]}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    main()
@@ -3,9 +3,10 @@ from __future__ import annotations
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 import enum
+import hashlib
 
-from sqlalchemy import String, DateTime, Float, ForeignKey, Text, Enum as SQLEnum, UniqueConstraint, Integer
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import String, DateTime, Float, ForeignKey, Text, Enum as SQLEnum, UniqueConstraint, Integer, Index, Boolean, BigInteger
+from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, mapped_column, relationship
 
 
 class Base(DeclarativeBase):
@@ -34,6 +35,57 @@ class TimestampMixin:
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=mozambique_now, onupdate=mozambique_now, nullable=False)
 
 
+def media_key(media_uri: str, media_type: MediaType) -> int:
+    """
+    Chave do catálogo de mídia: hash de 64 bits (com sinal, cabe em BIGINT)
+    de (media_uri, media_type). Determinística, então buscas pela chave
+    natural viram igualdade de inteiro sem consultar a tabela `media`.
+    """
+    raw = f"{MediaType(media_type).value}\x00{media_uri}".encode()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big", signed=True)
+
+
+class Media(Base, TimestampMixin):
+    """
+    Catálogo de mídia compartilhado (uma linha por media_uri + media_type).
+    Guarda só a identidade: os metadados são de quem referencia (ver
+    MediaMetadataMixin), já que URIs content:// são locais ao aparelho e
+    a mesma URI pode ser outra mídia para outro usuário.
+    """
+    __tablename__ = "media"
+    
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)  # media_key(...)
+    media_uri: Mapped[str] = mapped_column(String, nullable=False)
+    media_type: Mapped[MediaType] = mapped_column(SQLEnum(MediaType), nullable=False)
+
+
+class MediaRefMixin:
+    """
+    Referência ao catálogo `media` por id inteiro. media_uri e media_type
+    continuam acessíveis como atributos (somente leitura) para os schemas.
+    """
+    media_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("media.id"), nullable=False)
+    
+    @declared_attr
+    def media(cls) -> Mapped["Media"]:
+        return relationship("Media", lazy="joined", innerjoin=True)
+    
+    @property
+    def media_uri(self) -> str:
+        return self.media.media_uri
+    
+    @property
+    def media_type(self) -> MediaType:
+        return self.media.media_type
+
+
+class MediaMetadataMixin:
+    """Metadados da mídia como o dono da linha os informou."""
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    mime_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
 class User(Base, TimestampMixin):
     """Modelo de usuário."""
     __tablename__ = "users"
@@ -50,43 +102,35 @@ class User(Base, TimestampMixin):
     settings: Mapped[Optional["Setting"]] = relationship("Setting", back_populates="user", cascade="all, delete-orphan", uselist=False)
 
 
-class Favorite(Base, TimestampMixin):
+class Favorite(Base, MediaRefMixin, MediaMetadataMixin, TimestampMixin):
     """Modelo de favorito."""
     __tablename__ = "favorites"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
-    # Chave natural: media_uri + media_type
-    media_uri: Mapped[str] = mapped_column(String, nullable=False)
-    media_type: Mapped[MediaType] = mapped_column(SQLEnum(MediaType), nullable=False)
-    
-    title: Mapped[str] = mapped_column(String, nullable=False)
-    mime_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Chave natural: user_id + media_id (ver MediaRefMixin)
     
     # Relacionamentos
     user: Mapped["User"] = relationship("User", back_populates="favorites")
     
     __table_args__ = (
-        UniqueConstraint('user_id', 'media_uri', 'media_type', name='uq_favorite_user_media'),
+        UniqueConstraint('user_id', 'media_id', name='uq_favorite_user_media'),
+        # Keyset de GET /favorites
+        Index('ix_favorites_user_created', 'user_id', 'created_at', 'id'),
+        # Marcador do ETag (count + max(updated_at)) só no índice
+        Index('ix_favorites_user_updated', 'user_id', 'updated_at'),
     )
 
 
-class HistoryItem(Base, TimestampMixin):
+class HistoryItem(Base, MediaRefMixin, MediaMetadataMixin, TimestampMixin):
     """Modelo de item de histórico."""
     __tablename__ = "history"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
-    # Chave natural: media_uri + media_type
-    media_uri: Mapped[str] = mapped_column(String, nullable=False)
-    media_type: Mapped[MediaType] = mapped_column(SQLEnum(MediaType), nullable=False)
-    
-    title: Mapped[str] = mapped_column(String, nullable=False)
-    mime_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Chave natural: user_id + media_id (ver MediaRefMixin)
     last_position_ms: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     last_played: Mapped[datetime] = mapped_column(DateTime, default=mozambique_now, nullable=False)
     play_count: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
@@ -95,7 +139,11 @@ class HistoryItem(Base, TimestampMixin):
     user: Mapped["User"] = relationship("User", back_populates="history")
     
     __table_args__ = (
-        UniqueConstraint('user_id', 'media_uri', 'media_type', name='uq_history_user_media'),
+        UniqueConstraint('user_id', 'media_id', name='uq_history_user_media'),
+        # Keyset de GET /history
+        Index('ix_history_user_last_played', 'user_id', 'last_played', 'id'),
+        # Marcador do ETag (count + max(updated_at)) só no índice
+        Index('ix_history_user_updated', 'user_id', 'updated_at'),
     )
 
 
@@ -112,29 +160,30 @@ class Playlist(Base, TimestampMixin):
     # Relacionamentos
     user: Mapped["User"] = relationship("User", back_populates="playlists")
     items: Mapped[list["PlaylistItem"]] = relationship("PlaylistItem", back_populates="playlist", cascade="all, delete-orphan", order_by="PlaylistItem.position")
+    
+    __table_args__ = (
+        # GET /playlists (lista, resumo e marcador do ETag) e o backfill do /sync
+        Index('ix_playlists_user_updated', 'user_id', 'updated_at'),
+    )
 
 
-class PlaylistItem(Base, TimestampMixin):
+class PlaylistItem(Base, MediaRefMixin, MediaMetadataMixin, TimestampMixin):
     """Modelo de item de playlist."""
     __tablename__ = "playlist_items"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     playlist_id: Mapped[int] = mapped_column(Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False)
     
-    # Chave natural: playlist_id + media_uri + media_type
-    media_uri: Mapped[str] = mapped_column(String, nullable=False)
-    media_type: Mapped[MediaType] = mapped_column(SQLEnum(MediaType), nullable=False)
-    
-    title: Mapped[str] = mapped_column(String, nullable=False)
-    mime_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Chave natural: playlist_id + media_id (ver MediaRefMixin)
     position: Mapped[int] = mapped_column(Integer, nullable=False)  # Ordem na playlist
     
     # Relacionamentos
     playlist: Mapped["Playlist"] = relationship("Playlist", back_populates="items")
     
     __table_args__ = (
-        UniqueConstraint('playlist_id', 'media_uri', 'media_type', name='uq_playlist_item_media'),
+        UniqueConstraint('playlist_id', 'media_id', name='uq_playlist_item_media'),
+        # Keyset de GET /playlists/{id}/items
+        Index('ix_playlist_items_playlist_position', 'playlist_id', 'position', 'id'),
     )
 
 
@@ -150,24 +199,31 @@ class Tag(Base, TimestampMixin):
     
     # Relacionamentos
     media_tags: Mapped[list["MediaTag"]] = relationship("MediaTag", back_populates="tag", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset de GET /tags
+        Index('ix_tags_user_created', 'user_id', 'created_at', 'id'),
+        # Marcador do ETag (count + max(updated_at)) só no índice
+        Index('ix_tags_user_updated', 'user_id', 'updated_at'),
+    )
 
 
-class MediaTag(Base, TimestampMixin):
+class MediaTag(Base, MediaRefMixin, TimestampMixin):
     """Modelo de vínculo tag-mídia."""
     __tablename__ = "media_tags"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     tag_id: Mapped[int] = mapped_column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=False)
     
-    # Chave natural: media_uri + media_type + tag_id
-    media_uri: Mapped[str] = mapped_column(String, nullable=False)
-    media_type: Mapped[MediaType] = mapped_column(SQLEnum(MediaType), nullable=False)
+    # Chave natural: tag_id + media_id (ver MediaRefMixin)
     
     # Relacionamentos
     tag: Mapped["Tag"] = relationship("Tag", back_populates="media_tags")
     
     __table_args__ = (
-        UniqueConstraint('tag_id', 'media_uri', 'media_type', name='uq_media_tag'),
+        UniqueConstraint('tag_id', 'media_id', name='uq_media_tag'),
+        # Vínculos por mídia (tags de uma mídia, FK do catálogo); a unique começa por tag_id
+        Index('ix_media_tags_media', 'media_id', 'tag_id'),
     )
 
 
@@ -197,3 +253,45 @@ class Statistics(Base, TimestampMixin):
     total_listen_time_ms: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     favorite_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     playlist_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        # Índice único (e não constraint) para poder ser criado em bancos já existentes
+        Index('uq_statistics_user', 'user_id', unique=True),
+    )
+
+
+class SyncState(Base, TimestampMixin):
+    """Sequência de mudanças por usuário (monotônica, base do cursor de /sync)."""
+    __tablename__ = "sync_state"
+    
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class SyncChange(Base, TimestampMixin):
+    """
+    Log de mudanças compactado: uma linha por entidade alterada, com a
+    última sequência em que mudou. Remoções ficam como tombstones (deleted=True).
+    """
+    __tablename__ = "sync_changes"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    entity: Mapped[str] = mapped_column(String, nullable=False)  # nome da tabela
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'entity', 'entity_id', name='uq_sync_change_entity'),
+        Index('ix_sync_changes_user_seq', 'user_id', 'seq'),
+    )
+
+
+class SchemaVersion(Base):
+    """Migrações aplicadas (ver app.migrations)."""
+    __tablename__ = "schema_version"
+    
+    version: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    description: Mapped[str] = mapped_column(String, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=mozambique_now, nullable=False)
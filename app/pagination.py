@@ -0,0 +1,110 @@
+"""
+Paginação por keyset (cursor opaco).
+
+O corpo das respostas continua sendo a lista (mesmo schema de antes); o
+cursor da próxima página vai no header X-Next-Cursor. Sem `limit`, a
+lista completa é retornada, como antes.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value: Any, row_id: int) -> str:
+    """Codifica (valor de ordenação, id) num cursor opaco."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, sort_type: type) -> tuple[Any, int]:
+    """
+    Decodifica um cursor e valida o valor de ordenação contra `sort_type`
+    (o python_type da coluna; datetime volta convertido da string ISO).
+    ValueError se for inválido: o cursor vem do cliente.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        if sort_type is datetime and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+    except Exception as e:
+        raise ValueError("cursor inválido") from e
+    valid = _is_int(value) if sort_type is int else isinstance(value, sort_type)
+    if not valid or not _is_int(row_id):
+        raise ValueError("cursor inválido")
+    return value, row_id
+
+
+def keyset(query, sort_column, id_column, after: Optional[tuple[Any, int]], limit: Optional[int], descending: bool = False):
+    """
+    Aplica ORDER BY (sort_column, id) e, se houver cursor (já validado por
+    decode_cursor), o predicado de keyset em comparação de tupla. Funciona
+    com Query e com select().
+    """
+    if after is not None:
+        value, row_id = after
+        key = tuple_(sort_column, id_column)
+        query = query.filter(key < (value, row_id) if descending else key > (value, row_id))
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+class Page:
+    """
+    Dependência FastAPI com os parâmetros `cursor` e `limit`. Use
+    Page.sorted_by(coluna) no Depends: o cursor é validado contra o tipo
+    da coluna de ordenação da rota.
+    """
+
+    sort_type: type
+
+    @classmethod
+    def sorted_by(cls, sort_column) -> type["Page"]:
+        return type(cls.__name__, (cls,), {"sort_type": sort_column.type.python_type})
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor opaco retornado em X-Next-Cursor"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    ):
+        self.limit = limit
+        self.after: Optional[tuple[Any, int]] = None
+        if cursor:
+            try:
+                self.after = decode_cursor(cursor, self.sort_type)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor inválido"
+                )
+
+    def set_next_cursor(self, response: Response, items: Sequence[Any], sort_attr: str) -> None:
+        """
+        Página cheia => há (possivelmente) mais itens: emite o próximo cursor.
+        Aceita objetos ORM ou dicts (listas de app.serialization).
+        """
+        if self.limit is not None and len(items) == self.limit:
+            last = items[-1]
+            if isinstance(last, dict):
+                value, row_id = last[sort_attr], last["id"]
+            else:
+                value, row_id = getattr(last, sort_attr), last.id
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(value, row_id)
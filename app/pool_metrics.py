@@ -0,0 +1,92 @@
+"""
+Métricas dos pools de conexão (por worker).
+
+Os engines de app.db usam uma subclasse do pool que mede a espera no
+checkout (fila do pool + abertura de conexão nova). Junto com os
+contadores do próprio pool (em uso, overflow), mostra quando os requests
+estão esperando por conexão e não pela query. Ver /debug/pool.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Contadores de checkout de um pool. Thread-safe."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+class _TimedCheckout:
+    """Mixin sobre QueuePool/AsyncAdaptedQueuePool: mede o tempo de _do_get."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.observe(time.perf_counter() - start, timed_out)
+
+
+def timed_pool_class(base: type[Pool]) -> type[Pool]:
+    """
+    Subclasse de `base` com métricas próprias. Uma classe por engine: o pool
+    é recriado com a mesma classe em engine.dispose(), então os contadores
+    sobrevivem.
+    """
+    return type(f"Timed{base.__name__}", (_TimedCheckout, base), {"metrics": PoolMetrics()})
+
+
+_engines: dict[str, Engine] = {}
+
+
+def register(name: str, engine: Engine) -> None:
+    """Inclui o engine (síncrono; para AsyncEngine use .sync_engine) em pool_stats."""
+    if isinstance(engine.pool, _TimedCheckout):
+        _engines[name] = engine
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    """Estado atual e contadores acumulados de cada pool registrado."""
+    stats = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        metrics = pool.metrics
+        with metrics._lock:
+            checkouts, timeouts = metrics.checkouts, metrics.timeouts
+            wait, max_wait = metrics.wait_seconds, metrics.max_wait_seconds
+        stats[name] = {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "overflow_in_use": max(pool.overflow(), 0),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_avg": round(wait / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_ms_max": round(max_wait * 1000, 3),
+        }
+    return stats
@@ -0,0 +1,190 @@
+"""
+Buffer write-behind das posições de reprodução (por worker).
+
+O player reporta a posição a cada poucos segundos; quase todas essas
+escritas são superadas logo em seguida. PUT /history/position só guarda a
+última posição por (user_id, media_uri, media_type) em memória, e uma
+thread grava o lote de tempos em tempos (ou quando o buffer enche) com um
+único upsert. No shutdown o buffer é drenado.
+
+GET /history grava antes as posições pendentes do usuário (flush_user; a
+linha pode ainda nem existir) e sobrepõe as que chegarem durante o request,
+então o usuário sempre lê o valor mais recente.
+
+Como os caches de app.cache, o buffer é do worker: o GET /history só vê os
+heartbeats que chegaram ao mesmo processo. Com vários workers, os de outro
+worker só aparecem depois do próximo lote dele (até
+POSITION_FLUSH_INTERVAL_SECONDS). Rode um único worker ou use sessões
+sticky por usuário, como para o read-your-writes.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Optional
+
+from app import crud
+from app.config import settings
+from app.db import SessionLocal
+from app.models import MediaType, mozambique_now
+from app.schemas import PositionHeartbeat
+
+log = logging.getLogger(__name__)
+
+_Key = tuple[str, MediaType]
+
+
+class PositionBuffer:
+    """Últimas posições pendentes, agrupadas por usuário. Thread-safe."""
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self._pending: dict[int, dict[_Key, dict[str, Any]]] = {}
+        self._in_flight: dict[int, dict[_Key, dict[str, Any]]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # um lote em gravação por vez
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, user_id: int, heartbeat: PositionHeartbeat) -> None:
+        """Guarda a posição (substitui a anterior do mesmo item)."""
+        row = {
+            "user_id": user_id,
+            "media_uri": heartbeat.media_uri,
+            "media_type": heartbeat.media_type,
+            "title": heartbeat.title,
+            "last_position_ms": heartbeat.position_ms,
+            "last_played": mozambique_now(),
+        }
+        with self._lock:
+            user_rows = self._pending.setdefault(user_id, {})
+            if (heartbeat.media_uri, heartbeat.media_type) not in user_rows:
+                self._size += 1
+            user_rows[(heartbeat.media_uri, heartbeat.media_type)] = row
+            self.received += 1
+            full = self._size >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending_for(self, user_id: int) -> dict[_Key, dict[str, Any]]:
+        """Posições ainda não gravadas do usuário (inclui o lote em gravação)."""
+        with self._lock:
+            return {**self._in_flight.get(user_id, {}), **self._pending.get(user_id, {})}
+
+    def marker(self, user_id: int) -> Optional[str]:
+        """Compõe o ETag de GET /history: muda a cada heartbeat pendente."""
+        pending = self.pending_for(user_id)
+        if not pending:
+            return None
+        return max(row["last_played"] for row in pending.values()).isoformat()
+
+    def apply(self, user_id: int, items: list[dict[str, Any]]) -> None:
+        """
+        Sobrepõe as posições pendentes aos itens carregados (dicts de
+        crud.get_user_history; são só a resposta, nada volta ao banco) e
+        reordena por last_played, como a query.
+        """
+        pending = self.pending_for(user_id)
+        if not pending:
+            return
+        for item in items:
+            row = pending.get((item["media_uri"], item["media_type"]))
+            if row is not None and row["last_played"] > item["last_played"]:
+                item["last_position_ms"] = row["last_position_ms"]
+                item["last_played"] = row["last_played"]
+        items.sort(key=lambda item: (item["last_played"], item["id"]), reverse=True)
+
+    def flush(self) -> int:
+        """Grava o que estiver pendente numa transação; retorna as linhas gravadas."""
+        with self._flush_lock:
+            return self._flush()
+
+    def flush_user(self, user_id: int) -> int:
+        """
+        Grava já as posições pendentes de um usuário (GET /history, antes de
+        ler): heartbeats de mídias que ainda não estão no histórico viram
+        linhas, com id, em vez de ficarem fora da resposta até o próximo lote.
+        """
+        with self._lock:
+            if user_id not in self._pending:
+                return 0
+        with self._flush_lock:
+            return self._flush(user_id)
+
+    def _flush(self, user_id: Optional[int] = None) -> int:
+        with self._lock:
+            if user_id is None:
+                batch, self._pending = self._pending, {}
+            else:
+                user_rows = self._pending.pop(user_id, None)
+                batch = {user_id: user_rows} if user_rows else {}
+            if not batch:
+                return 0
+            self._in_flight = batch
+            self._size -= sum(len(user_rows) for user_rows in batch.values())
+            rows = [row for user_rows in self._in_flight.values() for row in user_rows.values()]
+        try:
+            with SessionLocal() as db:
+                written = crud.flush_positions(db, rows)
+                db.commit()
+        except Exception as e:
+            log.exception("Falha ao gravar %d posições: %s", len(rows), e)
+            with self._lock:
+                # Devolve ao buffer o que não foi substituído por algo mais novo
+                for user_id, user_rows in self._in_flight.items():
+                    current = self._pending.setdefault(user_id, {})
+                    for key, row in user_rows.items():
+                        if key not in current:
+                            current[key] = row
+                            self._size += 1
+                self._in_flight = {}
+            return 0
+        with self._lock:
+            self._in_flight = {}
+            self.written += written
+            self.flushes += 1
+        return written
+
+    def start(self) -> None:
+        """Inicia a thread de gravação periódica."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="position-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Para a thread e drena o buffer."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+
+    def stats(self) -> dict[str, int]:
+        """Contadores para diagnóstico (ver /debug/position-buffer)."""
+        with self._lock:
+            return {
+                "pending": self._size,
+                "received": self.received,
+                "written": self.written,
+                "flushes": self.flushes,
+            }
+
+
+position_buffer = PositionBuffer(settings.position_flush_interval_seconds, settings.position_flush_max_pending)
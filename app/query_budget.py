@@ -0,0 +1,98 @@
+"""
+Orçamento de SQL por request e detector de N+1 (QUERY_BUDGET=warn|error).
+
+app.metrics já conta os statements de cada request (RequestStats, via
+before/after_cursor_execute e ContextVar). Com o orçamento ligado, conta
+também quantas vezes cada statement (o SQL parametrizado, sem os valores)
+rodou no request. No fim, check() compara com o orçamento da rota:
+
+- mais statements que o declarado com @query_budget(n) no endpoint
+  (QUERY_BUDGET_DEFAULT nas rotas sem declaração);
+- o mesmo statement mais de QUERY_REPEAT_LIMIT vezes: o padrão do N+1
+  (ex.: um lazy load por item ao serializar uma lista).
+
+Com warn sai um WARNING estruturado (logger app.query_budget); com error,
+QueryBudgetExceeded é levantada depois da resposta, e o TestClient
+(raise_server_exceptions) a propaga: o teste falha (tests/test_query_budget.py).
+
+error é só para testes com TestClient: num servidor a resposta já foi
+enviada quando check() roda, então a exceção vira apenas um traceback no
+log do uvicorn. Em produção use off ou warn.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable, NamedTuple, Optional, TypeVar
+
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Rota acima do orçamento de SQL (QUERY_BUDGET=error)."""
+
+
+class QueryBudget(NamedTuple):
+    max_statements: int
+    max_repeats: int
+
+
+def enabled() -> bool:
+    return settings.query_budget != "off"
+
+
+def query_budget(max_statements: int, *, max_repeats: Optional[int] = None) -> Callable[[F], F]:
+    """
+    Declara o orçamento do endpoint (decorador abaixo do @router.<método>):
+
+        @router.get("/{playlist_id}")
+        @query_budget(3)
+        def get_playlist(...): ...
+
+    `max_repeats` troca QUERY_REPEAT_LIMIT para rotas que repetem um
+    statement de propósito.
+    """
+    budget = QueryBudget(max_statements, settings.query_repeat_limit if max_repeats is None else max_repeats)
+
+    def decorate(endpoint: F) -> F:
+        endpoint.query_budget = budget
+        return endpoint
+
+    return decorate
+
+
+def budget_for(scope: dict) -> Optional[QueryBudget]:
+    """Orçamento da rota que atendeu o request (None sem rota, ex.: 404)."""
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    if endpoint is None:
+        return None
+    return getattr(endpoint, "query_budget", None) or QueryBudget(
+        settings.query_budget_default, settings.query_repeat_limit,
+    )
+
+
+def check(scope: dict, statements: int, shapes: dict[str, int]) -> None:
+    """Compara o request com o orçamento; ver o docstring do módulo."""
+    budget = budget_for(scope)
+    if budget is None:
+        return
+    repeated = {sql: count for sql, count in shapes.items() if count > budget.max_repeats}
+    if statements <= budget.max_statements and not repeated:
+        return
+
+    route = f"{scope['method']} {scope['route'].path}"
+    if settings.query_budget == "error":
+        problems = []
+        if statements > budget.max_statements:
+            problems.append(f"{statements} statements (orçamento {budget.max_statements})")
+        problems += [f"{count}x {sql}" for sql, count in repeated.items()]
+        raise QueryBudgetExceeded(f"{route}: " + "; ".join(problems))
+    log.warning("orçamento de SQL excedido", extra={
+        "route": route,
+        "statements": statements,
+        "budget": budget.max_statements,
+        "repeated": {sql[:300]: count for sql, count in repeated.items()},
+    })
@@ -1,7 +1,7 @@
 """Routers da API."""
 
-from . import auth, favorites, playlists, debug, history, settings, statistics, tags
+from . import auth, favorites, playlists, debug, history, settings, statistics, sync, tags
 
-__all__ = ["auth", "favorites", "playlists", "debug", "history", "settings", "statistics", "tags"]
+__all__ = ["auth", "favorites", "playlists", "debug", "history", "settings", "statistics", "sync", "tags"]
 
 
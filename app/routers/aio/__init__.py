@@ -0,0 +1,5 @@
+"""Routers assíncronos (ASYNC_DB=true): mesmas rotas dos routers síncronos."""
+
+from . import favorites, history, playlists, settings, statistics, tags
+
+__all__ = ["favorites", "history", "playlists", "settings", "statistics", "tags"]
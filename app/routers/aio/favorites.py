@@ -0,0 +1,107 @@
+"""Router de favoritos (async)."""
+from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app import schemas, crud_async as crud
+from app.deps import get_current_user_async, get_read_db_async, get_read_user_async
+from app.models import User, MediaType, Favorite
+from app.etag import not_modified
+from app.pagination import Page
+from app.serialization import json_list
+from app.routers.favorites import MAX_BATCH_SIZE
+
+router = APIRouter(tags=["Favorites"])
+
+
+@router.get("", response_model=List[schemas.FavoriteOut])
+async def get_favorites(
+    request: Request,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(Favorite.created_at)),
+    current_user: User = Depends(get_read_user_async),
+    db: AsyncSession = Depends(get_read_db_async)
+):
+    """
+    Lista os favoritos do usuário (mais recentes primeiro).
+    """
+    cached = not_modified(request, response, await crud.get_change_marker(db, Favorite, current_user.id))
+    if cached:
+        return cached
+    
+    favorites = await crud.get_user_favorites(db, current_user.id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, favorites, "created_at")
+    return json_list(favorites, response)
+
+
+@router.post("", response_model=schemas.FavoriteOut, status_code=status.HTTP_201_CREATED)
+async def create_favorite(
+    favorite: schemas.FavoriteIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cria ou atualiza favorito (upsert).
+    """
+    return await crud.upsert_favorite(db, current_user.id, favorite)
+
+
+@router.delete("", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_favorite(
+    media_uri: str = Query(..., description="URI da mídia"),
+    media_type: MediaType = Query(..., description="Tipo da mídia"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Deleta favorito específico.
+    """
+    deleted = await crud.delete_favorite_by_uri(db, current_user.id, media_uri, media_type)
+    
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Favorito não encontrado"
+        )
+    
+    return None
+
+
+@router.post("/batch", response_model=List[schemas.FavoriteOut], status_code=status.HTTP_201_CREATED)
+async def create_favorites_batch(
+    favorites: List[schemas.FavoriteIn] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cria ou atualiza vários favoritos (upsert em lote).
+    """
+    return await crud.upsert_favorites(db, current_user.id, favorites)
+
+
+@router.delete("/batch", response_model=schemas.BatchDeleteOut)
+async def delete_favorites_batch(
+    refs: List[schemas.MediaRef] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Remove vários favoritos (media_uri + media_type) num único DELETE.
+    """
+    return {"deleted": await crud.delete_favorites(db, current_user.id, refs)}
+
+
+@router.post("/contains", response_model=List[bool])
+async def favorites_contains(
+    refs: List[schemas.MediaRef] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Indica quais mídias estão nos favoritos.
+    
+    Retorna um booleano por referência, na ordem enviada, respondido por uma
+    única query no índice único (user_id, media_id) (uq_favorite_user_media).
+    """
+    return await crud.get_favorited(db, current_user.id, refs)
@@ -0,0 +1,73 @@
+"""Router de histórico (async)."""
+from typing import List
+from fastapi import APIRouter, Body, Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app import schemas, crud_async as crud
+from app.deps import get_current_user_async, get_history_db_async, get_history_user_async
+from app.models import User, HistoryItem
+from app.etag import not_modified
+from app.pagination import Page
+from app.position_buffer import position_buffer
+from app.serialization import json_list
+from app.routers.history import MAX_BATCH_SIZE
+
+router = APIRouter(prefix="/history", tags=["History"])
+
+
+@router.get("", response_model=List[schemas.HistoryItemOut])
+async def get_history(
+    request: Request,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(HistoryItem.last_played)),
+    current_user: User = Depends(get_history_user_async),
+    db: AsyncSession = Depends(get_history_db_async)
+):
+    """
+    Lista o histórico de reprodução do usuário (mais recente primeiro).
+    """
+    marker = (await crud.get_change_marker(db, HistoryItem, current_user.id), position_buffer.marker(current_user.id))
+    cached = not_modified(request, response, marker)
+    if cached:
+        return cached
+    
+    history = await crud.get_user_history(db, current_user.id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, history, "last_played")  # cursor pelo valor do banco
+    position_buffer.apply(current_user.id, history)
+    return json_list(history, response)
+
+
+@router.post("", response_model=schemas.HistoryItemOut, status_code=201)
+async def create_history_item(
+    history_item: schemas.HistoryItemIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cria ou atualiza item de histórico (upsert).
+    """
+    return await crud.upsert_history_item(db, current_user.id, history_item)
+
+
+@router.post("/batch", response_model=List[schemas.HistoryItemOut], status_code=201)
+async def create_history_batch(
+    items: List[schemas.HistoryItemIn] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Upsert em lote do histórico (reproduções acumuladas offline).
+    """
+    return await crud.upsert_history_items(db, current_user.id, items)
+
+
+@router.put("/position", status_code=status.HTTP_204_NO_CONTENT)
+async def report_position(
+    heartbeat: schemas.PositionHeartbeat,
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Registra a posição de reprodução (heartbeat do player).
+    """
+    position_buffer.put(current_user.id, heartbeat)
@@ -0,0 +1,162 @@
+"""Router de playlists (async)."""
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app import schemas, crud_async as crud
+from app.deps import get_current_user_async, get_read_db_async, get_read_user_async
+from app.models import User, PlaylistItem
+from app.etag import not_modified
+from app.pagination import Page
+from app.query_budget import query_budget
+from app.serialization import json_list
+
+router = APIRouter(tags=["Playlists"])
+
+
+def _playlist_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Playlist não encontrada"
+    )
+
+
+@router.get("", response_model=Union[List[schemas.PlaylistSummary], List[schemas.PlaylistWithItems]])
+@query_budget(4)
+async def get_playlists(
+    request: Request,
+    response: Response,
+    include: Optional[Literal["summary"]] = Query(None, description="'summary' omite os itens"),
+    current_user: User = Depends(get_read_user_async),
+    db: AsyncSession = Depends(get_read_db_async)
+):
+    """
+    Lista todas as playlists do usuário com seus itens.
+    
+    Com `include=summary`, retorna apenas contagem de itens e duração total
+    de cada playlist, sem os itens.
+    """
+    cached = not_modified(request, response, await crud.get_playlists_change_marker(db, current_user.id))
+    if cached:
+        return cached
+    
+    if include == "summary":
+        return json_list(await crud.get_user_playlist_summaries(db, current_user.id), response)
+    
+    return json_list(await crud.get_user_playlists(db, current_user.id), response)
+
+
+@router.post("", response_model=schemas.PlaylistOut, status_code=status.HTTP_201_CREATED)
+async def create_playlist(
+    playlist: schemas.PlaylistIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cria nova playlist.
+    """
+    return await crud.create_playlist(db, current_user.id, playlist)
+
+
+@router.get("/{playlist_id}", response_model=schemas.PlaylistWithItems)
+@query_budget(3)
+async def get_playlist(
+    playlist_id: int,
+    current_user: User = Depends(get_read_user_async),
+    db: AsyncSession = Depends(get_read_db_async)
+):
+    """
+    Obtém playlist específica com seus itens.
+    """
+    playlist = await crud.get_playlist(db, playlist_id, current_user.id, with_items=True)
+    if not playlist:
+        raise _playlist_not_found()
+    return playlist
+
+
+@router.put("/{playlist_id}", response_model=schemas.PlaylistOut)
+async def update_playlist(
+    playlist_id: int,
+    playlist: schemas.PlaylistIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Atualiza playlist existente.
+    """
+    db_playlist = await crud.update_playlist(db, playlist_id, current_user.id, playlist)
+    if not db_playlist:
+        raise _playlist_not_found()
+    return db_playlist
+
+
+@router.delete("/{playlist_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_playlist(
+    playlist_id: int,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Deleta playlist.
+    """
+    deleted = await crud.delete_playlist(db, playlist_id, current_user.id)
+    if not deleted:
+        raise _playlist_not_found()
+    return None
+
+
+@router.get("/{playlist_id}/items", response_model=List[schemas.PlaylistItemOut])
+@query_budget(3)
+async def get_playlist_items(
+    playlist_id: int,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(PlaylistItem.position)),
+    current_user: User = Depends(get_read_user_async),
+    db: AsyncSession = Depends(get_read_db_async)
+):
+    """
+    Lista os itens de uma playlist em ordem de posição.
+    """
+    if not await crud.get_playlist(db, playlist_id, current_user.id):
+        raise _playlist_not_found()
+    items = await crud.get_playlist_items(db, playlist_id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, items, "position")
+    return items
+
+
+@router.post("/{playlist_id}/items", response_model=schemas.PlaylistItemOut, status_code=status.HTTP_201_CREATED)
+async def create_playlist_item(
+    playlist_id: int,
+    item: schemas.PlaylistItemIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Adiciona ou atualiza item na playlist (upsert).
+    """
+    if not await crud.get_playlist(db, playlist_id, current_user.id):
+        raise _playlist_not_found()
+    return await crud.upsert_playlist_item(db, playlist_id, item, current_user.id)
+
+
+@router.delete("/{playlist_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_playlist_item(
+    playlist_id: int,
+    item_id: int,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Remove item específico da playlist.
+    """
+    if not await crud.get_playlist(db, playlist_id, current_user.id):
+        raise _playlist_not_found()
+    
+    deleted = await crud.delete_playlist_item(db, item_id, playlist_id, current_user.id)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item não encontrado"
+        )
+    return None
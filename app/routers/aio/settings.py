@@ -0,0 +1,47 @@
+"""Router de configurações (async)."""
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app import schemas, crud_async as crud
+from app.deps import get_current_user_async
+from app.etag import not_modified
+from app.models import User, Setting
+
+router = APIRouter(prefix="/settings", tags=["Settings"])
+
+
+@router.get("", response_model=schemas.SettingsOut)
+async def get_settings(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtém configurações do usuário.
+    
+    Se não existir, cria configurações padrão.
+    """
+    marker = await crud.get_change_marker(db, Setting, current_user.id)
+    if marker[0] == 0:
+        await crud.create_default_settings(db, current_user.id)
+        marker = await crud.get_change_marker(db, Setting, current_user.id)
+    
+    cached = not_modified(request, response, marker)
+    if cached:
+        return cached
+    
+    return await crud.get_user_settings(db, current_user.id)
+
+
+@router.post("", response_model=schemas.SettingsOut)
+async def update_settings(
+    settings: schemas.SettingsIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Atualiza configurações do usuário.
+    """
+    return await crud.upsert_settings(db, current_user.id, settings)
@@ -0,0 +1,47 @@
+"""Router de estatísticas (async)."""
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app import schemas, crud_async as crud
+from app.deps import get_current_user_async, get_read_db_async, get_read_user_async
+from app.etag import not_modified
+from app.models import User, Statistics
+
+router = APIRouter(prefix="/statistics", tags=["Statistics"])
+
+
+@router.get("", response_model=schemas.StatisticsOut)
+async def get_statistics(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_read_user_async),
+    db: AsyncSession = Depends(get_read_db_async)
+):
+    """
+    Obtém estatísticas do usuário.
+    
+    Se não existir, cria estatísticas padrão.
+    """
+    marker = await crud.get_change_marker(db, Statistics, current_user.id)
+    if marker[0] == 0:
+        await crud.create_default_statistics(db, current_user.id)
+        marker = await crud.get_change_marker(db, Statistics, current_user.id)
+    
+    cached = not_modified(request, response, marker)
+    if cached:
+        return cached
+    
+    return await crud.get_user_statistics(db, current_user.id)
+
+
+@router.post("", response_model=schemas.StatisticsOut)
+async def update_statistics(
+    statistics: schemas.StatisticsIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Atualiza estatísticas do usuário.
+    """
+    return await crud.upsert_statistics(db, current_user.id, statistics)
@@ -0,0 +1,107 @@
+"""Router de tags (async)."""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app import schemas, crud_async as crud
+from app.deps import get_current_user_async, get_read_db_async, get_read_user_async
+from app.models import User, Tag
+from app.etag import not_modified
+from app.pagination import Page
+
+router = APIRouter(prefix="/tags", tags=["Tags"])
+
+
+@router.get("", response_model=List[schemas.TagOut])
+async def get_tags(
+    request: Request,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(Tag.created_at)),
+    current_user: User = Depends(get_read_user_async),
+    db: AsyncSession = Depends(get_read_db_async)
+):
+    """
+    Lista as tags do usuário (ordem de criação).
+    """
+    cached = not_modified(request, response, await crud.get_change_marker(db, Tag, current_user.id))
+    if cached:
+        return cached
+    
+    tags = await crud.get_user_tags(db, current_user.id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, tags, "created_at")
+    return tags
+
+
+@router.post("", response_model=schemas.TagOut, status_code=status.HTTP_201_CREATED)
+async def create_tag(
+    tag: schemas.TagIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cria nova tag.
+    """
+    return await crud.create_tag(db, current_user.id, tag)
+
+
+@router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_tag(
+    tag_id: int,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Deleta tag.
+    """
+    deleted = await crud.delete_tag(db, tag_id, current_user.id)
+    
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tag não encontrada"
+        )
+    
+    return None
+
+
+# ==================== MEDIA TAGS ====================
+
+@router.post("/media", response_model=schemas.MediaTagOut, status_code=status.HTTP_201_CREATED)
+async def link_media_tag(
+    media_tag: schemas.MediaTagIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Vincula tag a uma mídia.
+    
+    Cria vínculo se não existir.
+    """
+    if await crud.get_tag(db, media_tag.tag_id, current_user.id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tag não encontrada"
+        )
+    
+    return await crud.create_media_tag(db, media_tag, current_user.id)
+
+
+@router.delete("/media/{media_tag_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unlink_media_tag(
+    media_tag_id: int,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Remove vínculo de tag com mídia.
+    """
+    deleted = await crud.delete_media_tag(db, media_tag_id, current_user.id)
+    
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vínculo não encontrado"
+        )
+    
+    return None
@@ -2,15 +2,19 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from datetime import timedelta
+import logging
 
 from app import schemas, crud
 from app.db import get_db
 from app.security import create_access_token, verify_password
 from app.models import User
+from app.query_budget import query_budget
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/signup", response_model=schemas.Token, status_code=status.HTTP_201_CREATED)
+@query_budget(16)
 def signup(user_data: schemas.UserSignup, db: Session = Depends(get_db)):
     """Cria um novo usuário e retorna token JWT."""
     # Verificar se usuário já existe
@@ -21,16 +25,10 @@ def signup(user_data: schemas.UserSignup, db: Session = Depends(get_db)):
             detail="Email já cadastrado"
         )
     
-    # Criar usuário
+    # Criar usuário, settings e statistics padrão (uma transação, commit em get_db)
     new_user = crud.create_user(db, user_data)
-    
-    # Criar settings e statistics padrão
-    try:
-        crud.create_default_settings(db, new_user.id)
-        crud.create_default_statistics(db, new_user.id)
-    except Exception as e:
-        # Log do erro mas continua
-        pass
+    crud.create_default_settings(db, new_user.id)
+    crud.create_default_statistics(db, new_user.id)
     
     # Criar token JWT
     access_token = create_access_token(
@@ -46,34 +44,27 @@ def signup(user_data: schemas.UserSignup, db: Session = Depends(get_db)):
 @router.post("/signin", response_model=schemas.Token)
 def signin(credentials: schemas.UserSignin, db: Session = Depends(get_db)):
     """Autentica usuário e retorna token JWT."""
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"Tentativa de login para email: {credentials.email}")
-    
     # Verificar se usuário existe
     user = crud.get_user_by_email(db, credentials.email)
     if not user:
-        logger.warning(f"Usuário não encontrado: {credentials.email}")
+        logger.warning("Login: usuário não encontrado", extra={"email": credentials.email})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    logger.info(f"Usuário encontrado: ID {user.id}, email {user.email}")
-    
     # Autenticar usuário
     is_valid = crud.authenticate_user(db, credentials.email, credentials.password)
     if not is_valid:
-        logger.warning(f"Senha inválida para usuário: {credentials.email}")
+        logger.warning("Login: senha inválida", extra={"user_id": user.id})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    logger.info(f"Login bem-sucedido para usuário ID {is_valid.id}")
+    logger.debug("Login bem-sucedido", extra={"user_id": is_valid.id})
     
     # Criar token JWT
     access_token = create_access_token(
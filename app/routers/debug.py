@@ -1,9 +1,15 @@
 from __future__ import annotations
+from typing import Union
 from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.cache import media_cache, user_cache
+from app.metrics import latency_summary
 from app.db import get_db
+from app.pool_metrics import pool_stats
+from app.position_buffer import position_buffer
+from app.security import token_cache
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 
@@ -22,3 +28,23 @@ def smoke(db: Session = Depends(get_db)) -> dict[str, str]:
         "db": "ok",
         "version": "v1", 
     }
+
+@router.get("/cache")
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Contadores de hit/miss dos caches em memória deste worker."""
+    return {"user": user_cache.stats(), "token": token_cache.stats(), "media": media_cache.stats()}
+
+@router.get("/position-buffer")
+def position_buffer_stats() -> dict[str, int]:
+    """Heartbeats recebidos x linhas gravadas pelo buffer write-behind."""
+    return position_buffer.stats()
+
+@router.get("/pool")
+def pool_metrics() -> dict[str, dict[str, Union[int, float]]]:
+    """Pools de conexão deste worker: em uso, overflow e espera no checkout."""
+    return pool_stats()
+
+@router.get("/latency")
+def latency() -> dict[str, dict[str, float]]:
+    """p50/p95/p99 estimados por rota (buckets de /metrics) e média de statements SQL."""
+    return latency_summary()
@@ -1,23 +1,41 @@
 """Router de favoritos."""
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas, crud
-from app.deps import get_current_user
-from app.models import User, MediaType
+from app.deps import get_current_user, get_read_db, get_read_user
+from app.models import User, MediaType, Favorite
+from app.etag import not_modified
+from app.pagination import Page
+from app.serialization import json_list
 
 router = APIRouter(tags=["Favorites"])
 
+MAX_BATCH_SIZE = 1000
+
 
 @router.get("", response_model=List[schemas.FavoriteOut])
-def get_favorites(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_favorites(
+    request: Request,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(Favorite.created_at)),
+    current_user: User = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
+):
     """
-    Lista todos os favoritos do usuário.
+    Lista os favoritos do usuário (mais recentes primeiro).
+    
+    Com `limit`, pagina por cursor: a próxima página vem em X-Next-Cursor.
     """
-    favorites = crud.get_user_favorites(db, current_user.id)
-    return favorites
+    cached = not_modified(request, response, crud.get_change_marker(db, Favorite, current_user.id))
+    if cached:
+        return cached
+    
+    favorites = crud.get_user_favorites(db, current_user.id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, favorites, "created_at")
+    return json_list(favorites, response)
 
 
 @router.post("", response_model=schemas.FavoriteOut, status_code=status.HTTP_201_CREATED)
@@ -59,3 +77,44 @@ def delete_favorite(
     return None
 
 
+@router.post("/batch", response_model=List[schemas.FavoriteOut], status_code=status.HTTP_201_CREATED)
+def create_favorites_batch(
+    favorites: List[schemas.FavoriteIn] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cria ou atualiza vários favoritos (upsert em lote).
+    
+    Um único INSERT ... ON CONFLICT; retorna um favorito por entrada, na ordem enviada.
+    """
+    return crud.upsert_favorites(db, current_user.id, favorites)
+
+
+@router.delete("/batch", response_model=schemas.BatchDeleteOut)
+def delete_favorites_batch(
+    refs: List[schemas.MediaRef] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove vários favoritos (media_uri + media_type) num único DELETE.
+    
+    Referências que não são favoritas são ignoradas; retorna quantos foram removidos.
+    """
+    return {"deleted": crud.delete_favorites(db, current_user.id, refs)}
+
+
+@router.post("/contains", response_model=List[bool])
+def favorites_contains(
+    refs: List[schemas.MediaRef] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Indica quais mídias estão nos favoritos.
+    
+    Retorna um booleano por referência, na ordem enviada, respondido por uma
+    única query no índice único (user_id, media_id) (uq_favorite_user_media).
+    """
+    return crud.get_favorited(db, current_user.id, refs)
@@ -1,23 +1,44 @@
 """Router de histórico."""
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas, crud
-from app.deps import get_current_user
-from app.models import User
+from app.deps import get_current_user, get_history_db, get_history_user
+from app.models import User, HistoryItem
+from app.etag import not_modified
+from app.pagination import Page
+from app.position_buffer import position_buffer
+from app.serialization import json_list
 
 router = APIRouter(prefix="/history", tags=["History"])
 
+MAX_BATCH_SIZE = 1000
+
 
 @router.get("", response_model=List[schemas.HistoryItemOut])
-def get_history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_history(
+    request: Request,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(HistoryItem.last_played)),
+    current_user: User = Depends(get_history_user),
+    db: Session = Depends(get_history_db)
+):
     """
-    Lista todo o histórico de reprodução do usuário.
+    Lista o histórico de reprodução do usuário (mais recente primeiro).
+    
+    Com `limit`, pagina por cursor: a próxima página vem em X-Next-Cursor.
     """
-    history = crud.get_user_history(db, current_user.id)
-    return history
+    marker = (crud.get_change_marker(db, HistoryItem, current_user.id), position_buffer.marker(current_user.id))
+    cached = not_modified(request, response, marker)
+    if cached:
+        return cached
+    
+    history = crud.get_user_history(db, current_user.id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, history, "last_played")  # cursor pelo valor do banco
+    position_buffer.apply(current_user.id, history)
+    return json_list(history, response)
 
 
 @router.post("", response_model=schemas.HistoryItemOut, status_code=201)
@@ -36,4 +57,33 @@ def create_history_item(
     return db_history
 
 
+@router.post("/batch", response_model=List[schemas.HistoryItemOut], status_code=201)
+def create_history_batch(
+    items: List[schemas.HistoryItemIn] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upsert em lote do histórico (reproduções acumuladas offline).
+    
+    Todo o lote é gravado numa única transação, com um só INSERT ... ON CONFLICT.
+    Entradas repetidas (mesma media_uri + media_type) são mescladas: play_count
+    é somado e last_position_ms vem da última ocorrência. Retorna um item por
+    entrada, na ordem enviada.
+    """
+    return crud.upsert_history_items(db, current_user.id, items)
 
+
+@router.put("/position", status_code=status.HTTP_204_NO_CONTENT)
+def report_position(
+    heartbeat: schemas.PositionHeartbeat,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Registra a posição de reprodução (heartbeat do player).
+    
+    Não toca o banco: a posição vai para o buffer write-behind, que grava em
+    lote periodicamente só a última posição de cada item (sem incrementar
+    play_count). GET /history já reflete o valor pendente.
+    """
+    position_buffer.put(current_user.id, heartbeat)
@@ -1,23 +1,43 @@
 """Router de playlists."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas, crud
-from app.deps import get_current_user
-from app.models import User
+from app.deps import get_current_user, get_read_db, get_read_user
+from app.models import User, PlaylistItem
+from app.etag import not_modified
+from app.pagination import Page
+from app.query_budget import query_budget
+from app.serialization import json_list
 
 router = APIRouter(tags=["Playlists"])
 
 
-@router.get("", response_model=List[schemas.PlaylistWithItems])
-def get_playlists(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("", response_model=Union[List[schemas.PlaylistSummary], List[schemas.PlaylistWithItems]])
+@query_budget(4)
+def get_playlists(
+    request: Request,
+    response: Response,
+    include: Optional[Literal["summary"]] = Query(None, description="'summary' omite os itens"),
+    current_user: User = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
+):
     """
     Lista todas as playlists do usuário com seus itens.
+    
+    Com `include=summary`, retorna apenas contagem de itens e duração total
+    de cada playlist, sem os itens.
     """
-    playlists = crud.get_user_playlists(db, current_user.id)
-    return playlists
+    cached = not_modified(request, response, crud.get_playlists_change_marker(db, current_user.id))
+    if cached:
+        return cached
+    
+    if include == "summary":
+        return json_list(crud.get_user_playlist_summaries(db, current_user.id), response)
+    
+    return json_list(crud.get_user_playlists(db, current_user.id), response)
 
 
 @router.post("", response_model=schemas.PlaylistOut, status_code=status.HTTP_201_CREATED)
@@ -34,15 +54,16 @@ def create_playlist(
 
 
 @router.get("/{playlist_id}", response_model=schemas.PlaylistWithItems)
+@query_budget(3)
 def get_playlist(
     playlist_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtém playlist específica com seus itens.
     """
-    playlist = crud.get_playlist(db, playlist_id, current_user.id)
+    playlist = crud.get_playlist(db, playlist_id, current_user.id, with_items=True)
     
     if not playlist:
         raise HTTPException(
@@ -96,13 +117,18 @@ def delete_playlist(
 
 
 @router.get("/{playlist_id}/items", response_model=List[schemas.PlaylistItemOut])
+@query_budget(3)
 def get_playlist_items(
     playlist_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    page: Page = Depends(Page.sorted_by(PlaylistItem.position)),
+    current_user: User = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """
-    Lista todos os itens de uma playlist.
+    Lista os itens de uma playlist em ordem de posição.
+    
+    Com `limit`, pagina por cursor: a próxima página vem em X-Next-Cursor.
     """
   
     playlist = crud.get_playlist(db, playlist_id, current_user.id)
@@ -112,7 +138,8 @@ def get_playlist_items(
             detail="Playlist não encontrada"
         )
     
-    items = crud.get_playlist_items(db, playlist_id)
+    items = crud.get_playlist_items(db, playlist_id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, items, "position")
     return items
 
 
@@ -137,7 +164,7 @@ def create_playlist_item(
             detail="Playlist não encontrada"
         )
     
-    db_item = crud.upsert_playlist_item(db, playlist_id, item)
+    db_item = crud.upsert_playlist_item(db, playlist_id, item, current_user.id)
     return db_item
 
 
@@ -159,7 +186,7 @@ def delete_playlist_item(
             detail="Playlist não encontrada"
         )
     
-    deleted = crud.delete_playlist_item(db, item_id, playlist_id)
+    deleted = crud.delete_playlist_item(db, item_id, playlist_id, current_user.id)
     
     if not deleted:
         raise HTTPException(
@@ -1,28 +1,38 @@
 """Router de configurações."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas, crud
 from app.deps import get_current_user
-from app.models import User
+from app.etag import not_modified
+from app.models import User, Setting
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 
 @router.get("", response_model=schemas.SettingsOut)
-def get_settings(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_settings(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Obtém configurações do usuário.
     
     Se não existir, cria configurações padrão.
     """
-    settings = crud.get_user_settings(db, current_user.id)
+    marker = crud.get_change_marker(db, Setting, current_user.id)
+    if marker[0] == 0:
+        crud.create_default_settings(db, current_user.id)
+        marker = crud.get_change_marker(db, Setting, current_user.id)
     
-    if not settings:
-        settings = crud.create_default_settings(db, current_user.id)
+    cached = not_modified(request, response, marker)
+    if cached:
+        return cached
     
-    return settings
+    return crud.get_user_settings(db, current_user.id)
 
 
 @router.post("", response_model=schemas.SettingsOut)
@@ -1,28 +1,38 @@
 """Router de estatísticas."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas, crud
-from app.deps import get_current_user
-from app.models import User
+from app.deps import get_current_user, get_read_db, get_read_user
+from app.etag import not_modified
+from app.models import User, Statistics
 
 router = APIRouter(prefix="/statistics", tags=["Statistics"])
 
 
 @router.get("", response_model=schemas.StatisticsOut)
-def get_statistics(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_statistics(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
+):
     """
     Obtém estatísticas do usuário.
     
     Se não existir, cria estatísticas padrão.
     """
-    statistics = crud.get_user_statistics(db, current_user.id)
+    marker = crud.get_change_marker(db, Statistics, current_user.id)
+    if marker[0] == 0:
+        crud.create_default_statistics(db, current_user.id)
+        marker = crud.get_change_marker(db, Statistics, current_user.id)
     
-    if not statistics:
-        statistics = crud.create_default_statistics(db, current_user.id)
+    cached = not_modified(request, response, marker)
+    if cached:
+        return cached
     
-    return statistics
+    return crud.get_user_statistics(db, current_user.id)
 
 
 @router.post("", response_model=schemas.StatisticsOut)
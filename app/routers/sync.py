@@ -0,0 +1,57 @@
+"""Router de sincronização incremental (delta sync)."""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app import schemas, crud
+from app.deps import get_current_user
+from app.models import User
+from app.pagination import decode_cursor, encode_cursor
+from app.query_budget import query_budget
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+# Pior caso (20): primeiro /sync com o usuário fora do cache, backfill e uma query por entidade (8 cada)
+@router.get("", response_model=schemas.SyncOut)
+@query_budget(22)
+def sync(
+    since: Optional[str] = Query(None, description="Cursor retornado pelo último /sync (vazio = tudo)"),
+    limit: int = Query(1000, ge=1, le=5000, description="Máximo de mudanças por resposta"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna apenas o que mudou desde o cursor, em todas as entidades do
+    usuário, mais o novo cursor.
+    
+    Remoções vêm em `deleted` (tombstones). Se `has_more`, chame de novo
+    com o cursor retornado.
+    """
+    after = None
+    if since:
+        try:
+            after = decode_cursor(since, int)  # (seq, id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+    
+    changes, rows = crud.get_changes_since(db, current_user.id, after, limit)
+    
+    if changes:
+        cursor = encode_cursor(changes[-1].seq, changes[-1].id)
+    else:
+        cursor = since or encode_cursor(0, 0)
+    
+    return {
+        "cursor": cursor,
+        "has_more": len(changes) == limit,
+        "changes": rows,
+        "deleted": [
+            {"entity": change.entity, "id": change.entity_id}
+            for change in changes if change.deleted
+        ],
+    }
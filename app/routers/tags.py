@@ -1,22 +1,37 @@
 """Router de tags."""
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas, crud
-from app.deps import get_current_user
-from app.models import User
+from app.deps import get_current_user, get_read_db, get_read_user
+from app.models import User, Tag
+from app.etag import not_modified
+from app.pagination import Page
 
 router = APIRouter(prefix="/tags", tags=["Tags"])
 
 
 @router.get("", response_model=List[schemas.TagOut])
-def get_tags(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_tags(
+    request: Request,
+    response: Response,
+    page: Page = Depends(Page.sorted_by(Tag.created_at)),
+    current_user: User = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
+):
     """
-    Lista todas as tags do usuário.
+    Lista as tags do usuário (ordem de criação).
+    
+    Com `limit`, pagina por cursor: a próxima página vem em X-Next-Cursor.
     """
-    tags = crud.get_user_tags(db, current_user.id)
+    cached = not_modified(request, response, crud.get_change_marker(db, Tag, current_user.id))
+    if cached:
+        return cached
+    
+    tags = crud.get_user_tags(db, current_user.id, after=page.after, limit=page.limit)
+    page.set_next_cursor(response, tags, "created_at")
     return tags
 
 
@@ -66,7 +81,13 @@ def link_media_tag(
     
     Cria vínculo se não existir.
     """
-    db_media_tag = crud.create_media_tag(db, media_tag)
+    if crud.get_tag(db, media_tag.tag_id, current_user.id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tag não encontrada"
+        )
+    
+    db_media_tag = crud.create_media_tag(db, media_tag, current_user.id)
     return db_media_tag
 
 
@@ -79,7 +100,7 @@ def unlink_media_tag(
     """
     Remove vínculo de tag com mídia.
     """
-    deleted = crud.delete_media_tag(db, media_tag_id)
+    deleted = crud.delete_media_tag(db, media_tag_id, current_user.id)
     
     if not deleted:
         raise HTTPException(
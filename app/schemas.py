@@ -1,5 +1,5 @@
 """Schemas Pydantic para validação e serialização."""
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 from app.models import MediaType
@@ -71,6 +71,17 @@ class FavoriteOut(FavoriteBase):
         from_attributes = True
 
 
+class MediaRef(BaseModel):
+    """Referência a uma mídia pela chave natural (media_uri + media_type)."""
+    media_uri: str
+    media_type: MediaType
+
+
+class BatchDeleteOut(BaseModel):
+    """Resultado de remoção em lote."""
+    deleted: int
+
+
 # History Schemas
 class HistoryItemBase(BaseModel):
     """Schema base de item de histórico."""
@@ -100,6 +111,14 @@ class HistoryItemOut(HistoryItemBase):
         from_attributes = True
 
 
+class PositionHeartbeat(BaseModel):
+    """Posição de reprodução reportada periodicamente pelo player."""
+    media_uri: str
+    media_type: MediaType
+    title: str
+    position_ms: int = Field(..., ge=0)
+
+
 # Playlist Schemas
 class PlaylistBase(BaseModel):
     """Schema base de playlist."""
@@ -133,6 +152,12 @@ class PlaylistWithItems(PlaylistOut):
         from_attributes = True
 
 
+class PlaylistSummary(PlaylistOut):
+    """Schema de playlist resumida (GET /playlists?include=summary)."""
+    item_count: int
+    total_duration_ms: int
+
+
 class PlaylistItemBase(BaseModel):
     """Schema base de item de playlist."""
     media_uri: str
@@ -256,6 +281,33 @@ class StatisticsOut(StatisticsBase):
         from_attributes = True
 
 
+# Sync Schemas
+class SyncChanges(BaseModel):
+    """Linhas criadas/alteradas desde o cursor, por entidade."""
+    favorites: list[FavoriteOut] = []
+    history: list[HistoryItemOut] = []
+    playlists: list[PlaylistOut] = []
+    playlist_items: list[PlaylistItemOut] = []
+    tags: list[TagOut] = []
+    media_tags: list[MediaTagOut] = []
+    settings: list[SettingsOut] = []
+    statistics: list[StatisticsOut] = []
+
+
+class Tombstone(BaseModel):
+    """Entidade removida desde o cursor."""
+    entity: str
+    id: int
+
+
+class SyncOut(BaseModel):
+    """Schema de resposta de GET /sync."""
+    cursor: str
+    has_more: bool
+    changes: SyncChanges
+    deleted: list[Tombstone] = []
+
+
 # Health check
 class Health(BaseModel):
     """Schema de health check."""
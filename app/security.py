@@ -4,8 +4,13 @@ from typing import Optional
 import jwt
 import hashlib
 import secrets
+import time
+from app.cache import TTLCache
 from app.config import settings
 
+# Tokens já verificados: sha256(token) -> payload. Cada entrada expira no `exp` do token.
+token_cache = TTLCache(settings.token_cache_max_size, 0)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha plain corresponde ao hash."""
@@ -44,12 +49,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decodifica JWT access token."""
+    """
+    Decodifica JWT access token.
+
+    Tokens já verificados ficam em cache até o próprio `exp`, evitando
+    refazer a verificação HMAC a cada request com o mesmo token.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            token_cache.set(key, dict(payload), ttl=ttl)
+    return payload
 
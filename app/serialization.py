@@ -0,0 +1,67 @@
+"""
+Serialização rápida das listas grandes (GET /history, /favorites, /playlists).
+
+O caminho padrão do FastAPI carrega objetos ORM, valida cada um de novo no
+response_model (from_attributes) e codifica com o json da stdlib; em listas
+de milhares de linhas isso domina a CPU do request. Aqui o crud seleciona só
+as colunas dos schemas de saída, na ordem dos campos (schema_columns), as
+linhas viram dicts simples (as_dicts) e a rota devolve JSONList, codificada
+com orjson. Os dados vêm do banco, já no formato dos schemas: não há o que
+revalidar.
+
+As rotas mantêm o response_model, então o schema do OpenAPI não muda; como
+devolvem um Response pronto, o FastAPI não passa pelo response_model.
+"""
+from typing import Any
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Result
+
+from app.models import Base, Media
+
+
+def schema_columns(schema: type[BaseModel], model: type[Base], **computed: Any) -> list:
+    """
+    Colunas de SELECT para os campos de `schema`, na mesma ordem: do próprio
+    `model`, da mídia do catálogo (MediaRefMixin, exige o join com Media) ou
+    expressões em `computed` (ex.: agregados), rotuladas com o nome do campo.
+    Campo sem coluna é KeyError: omitido, faltaria na resposta sem aviso.
+    """
+    table = model.__table__
+    columns = []
+    for name in schema.model_fields:
+        if name in computed:
+            columns.append(computed[name].label(name))
+        elif name in table.c:
+            columns.append(table.c[name])
+        elif name in Media.__table__.c:
+            columns.append(Media.__table__.c[name])
+        else:
+            raise KeyError(f"{schema.__name__}.{name}: sem coluna em {model.__name__}")
+    return columns
+
+
+def as_dicts(result: Result) -> list[dict[str, Any]]:
+    """Linhas do resultado como dicts (chaves = nomes das colunas)."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+class JSONList(Response):
+    """Resposta JSON codificada com orjson (datetime em ISO 8601, enums pelo valor)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def json_list(rows: list[dict[str, Any]], response: Response) -> JSONList:
+    """
+    Monta a resposta das linhas levando os headers já definidos pela rota
+    no `response` injetado (ETag, X-Next-Cursor), que o FastAPI só aplica
+    quando a rota não devolve um Response próprio.
+    """
+    return JSONList(rows, status_code=response.status_code or 200, headers=dict(response.headers))
@@ -0,0 +1 @@
+"""Benchmarks e ferramentas de carga da Mediaplay API."""
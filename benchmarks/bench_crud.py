@@ -0,0 +1,364 @@
+"""
+Micro-benchmarks das funções de app.crud sobre bancos SQLite semeados
+(benchmarks.seed_dataset) em vários tamanhos, com baseline e limiar de
+regressão.
+
+Cada operação roda como um request do app: sessão própria, chamada do crud
+e commit (o perfil de produção do SQLite, ver app.db.create_sqlite_engines).
+Mede p50/p95 por chamada e a mediana de statements SQL emitidos. Regressão:
+p50 acima do baseline em mais que --threshold % ou qualquer statement a mais.
+As operações rodam intercaladas e o p50 é comparado relativo a uma operação
+de referência da mesma execução (sessão + SELECT 1 + commit), o que desconta
+a velocidade da máquina; a contagem de statements é exata.
+
+Uso:
+    python -m benchmarks.bench_crud [--sizes small,medium] [--iterations 200] [--only history]
+    python -m benchmarks.bench_crud --save-baseline      # grava benchmarks/baselines/crud.json
+    python -m benchmarks.bench_crud --threshold 15       # exit 1 se houver regressão
+
+Os bancos semeados ficam em cache no diretório temporário (um por tamanho e
+versão do schema); cada execução trabalha numa cópia.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from typing import Any, Callable, NamedTuple, Optional
+
+_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIR}/bench_crud_app.db")
+
+from sqlalchemy import event, func, select  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.db import RoutingSession, create_sqlite_engines  # noqa: E402
+from app.migrations import head, upgrade  # noqa: E402
+from app.models import Favorite, HistoryItem, Playlist, PlaylistItem, MediaTag, Tag, User  # noqa: E402
+from benchmarks import seed_dataset  # noqa: E402
+
+SIZES = {"small": 0.001, "medium": 0.01, "large": 0.1}  # --scale do seed_dataset
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "crud.json")
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "mediaplay_bench_crud")
+BATCH = 50
+
+
+class Op(NamedTuple):
+    name: str
+    run: Callable[[Session, dict, int, Any], Any]
+    # Preparação fora da medição (commitada antes); o retorno (um id) vai para run
+    setup: Optional[Callable[[Session, dict, int], Any]] = None
+
+
+# ==================== PAYLOADS ====================
+def catalog(i: int) -> dict:
+    """Mídia já existente no catálogo semeado (as mais populares)."""
+    index = i % 200
+    return {
+        "media_uri": seed_dataset.media_uri(index),
+        "media_type": seed_dataset.media_type(index),
+        "title": f"Faixa {index}",
+    }
+
+
+def fresh(i: int) -> dict:
+    """Mídia nova (ainda fora do catálogo)."""
+    return {"media_uri": f"content://bench/{i}", "media_type": "audio", "title": f"Nova {i}"}
+
+
+def ref(media: dict) -> dict:
+    return {"media_uri": media["media_uri"], "media_type": media["media_type"]}
+
+
+def refs(i: int) -> list[schemas.MediaRef]:
+    return [schemas.MediaRef(**ref(catalog(i * BATCH + n))) for n in range(BATCH)]
+
+
+# ==================== OPERAÇÕES ====================
+# Régua de cada execução: sessão, um SELECT trivial e commit
+REFERENCE = Op("(referência)", lambda db, c, i, _: db.execute(select(1)).scalar())
+
+OPS = (
+    # ---------- leituras ----------
+    Op("get_user_by_email", lambda db, c, i, _: crud.get_user_by_email(db, c["email"])),
+    Op("authenticate_user", lambda db, c, i, _: crud.authenticate_user(db, c["email"], seed_dataset.PASSWORD)),
+    Op("get_user_favorites", lambda db, c, i, _: crud.get_user_favorites(db, c["favorites_user"], limit=BATCH)),
+    Op("get_favorited", lambda db, c, i, _: crud.get_favorited(db, c["favorites_user"], refs(i))),
+    Op("get_user_history", lambda db, c, i, _: crud.get_user_history(db, c["history_user"], limit=BATCH)),
+    Op("get_user_playlists", lambda db, c, i, _: [
+        len(p["items"]) for p in crud.get_user_playlists(db, c["playlist_user"])
+    ]),
+    Op("get_user_playlist_summaries", lambda db, c, i, _: crud.get_user_playlist_summaries(db, c["playlist_user"])),
+    Op("get_playlist_with_items", lambda db, c, i, _: crud.get_playlist(
+        db, c["playlist_id"], c["playlist_user"], with_items=True,
+    )),
+    Op("get_playlist_items", lambda db, c, i, _: crud.get_playlist_items(db, c["playlist_id"], limit=100)),
+    Op("get_user_tags", lambda db, c, i, _: crud.get_user_tags(db, c["tag_user"], limit=BATCH)),
+    Op("get_user_settings", lambda db, c, i, _: crud.get_user_settings(db, c["history_user"])),
+    Op("get_user_statistics", lambda db, c, i, _: crud.get_user_statistics(db, c["history_user"])),
+    Op("get_change_marker", lambda db, c, i, _: crud.get_change_marker(db, HistoryItem, c["history_user"])),
+    Op("get_playlists_change_marker", lambda db, c, i, _: crud.get_playlists_change_marker(db, c["playlist_user"])),
+    Op("get_changes_since", lambda db, c, i, _: crud.get_changes_since(db, c["history_user"], None, 100)),
+    # ---------- escritas ----------
+    Op("create_user", lambda db, c, i, _: crud.create_user(db, schemas.UserSignup(
+        email=f"bench{i}@bench.dev", name="Bench", password="x",
+    ))),
+    Op("upsert_favorite", lambda db, c, i, _: crud.upsert_favorite(
+        db, c["favorites_user"], schemas.FavoriteIn(**catalog(i)),
+    )),
+    Op("upsert_favorite_new_media", lambda db, c, i, _: crud.upsert_favorite(
+        db, c["favorites_user"], schemas.FavoriteIn(**fresh(i)),
+    )),
+    Op("upsert_favorites", lambda db, c, i, _: crud.upsert_favorites(
+        db, c["favorites_user"], [schemas.FavoriteIn(**catalog(i * BATCH + n)) for n in range(BATCH)],
+    )),
+    Op(
+        "delete_favorite_by_uri",
+        lambda db, c, i, _: crud.delete_favorite_by_uri(db, c["favorites_user"], **ref(fresh(i))),
+        lambda db, c, i: crud.upsert_favorite(db, c["favorites_user"], schemas.FavoriteIn(**fresh(i))),
+    ),
+    Op(
+        "delete_favorites",
+        lambda db, c, i, _: crud.delete_favorites(db, c["favorites_user"], refs(i)),
+        lambda db, c, i: crud.upsert_favorites(
+            db, c["favorites_user"], [schemas.FavoriteIn(**catalog(i * BATCH + n)) for n in range(BATCH)],
+        ),
+    ),
+    Op("upsert_history_item", lambda db, c, i, _: crud.upsert_history_item(
+        db, c["history_user"], schemas.HistoryItemIn(**catalog(i), last_position_ms=i),
+    )),
+    Op("upsert_history_items", lambda db, c, i, _: crud.upsert_history_items(
+        db, c["history_user"], [schemas.HistoryItemIn(**catalog(i * BATCH + n)) for n in range(BATCH)],
+    )),
+    Op("flush_positions", lambda db, c, i, _: crud.flush_positions(db, [
+        {"user_id": c["history_user"], **catalog(i * BATCH + n), "last_position_ms": i,
+         "last_played": seed_dataset.EPOCH + timedelta(days=3650, seconds=i)}
+        for n in range(BATCH)
+    ])),
+    Op("create_playlist", lambda db, c, i, _: crud.create_playlist(
+        db, c["playlist_user"], schemas.PlaylistIn(name=f"Bench {i}"),
+    )),
+    Op("update_playlist", lambda db, c, i, _: crud.update_playlist(
+        db, c["playlist_id"], c["playlist_user"], schemas.PlaylistIn(name=f"Renomeada {i}"),
+    )),
+    Op(
+        "delete_playlist",
+        lambda db, c, i, playlist_id: crud.delete_playlist(db, playlist_id, c["playlist_user"]),
+        lambda db, c, i: crud.create_playlist(db, c["playlist_user"], schemas.PlaylistIn(name=f"Apagar {i}")).id,
+    ),
+    Op("upsert_playlist_item", lambda db, c, i, _: crud.upsert_playlist_item(
+        db, c["playlist_id"], schemas.PlaylistItemIn(**fresh(i), position=i), c["playlist_user"],
+    )),
+    Op(
+        "delete_playlist_item",
+        lambda db, c, i, item_id: crud.delete_playlist_item(db, item_id, c["playlist_id"], c["playlist_user"]),
+        lambda db, c, i: crud.upsert_playlist_item(
+            db, c["playlist_id"], schemas.PlaylistItemIn(**fresh(-i), position=i), c["playlist_user"],
+        ).id,
+    ),
+    Op("create_tag", lambda db, c, i, _: crud.create_tag(db, c["tag_user"], schemas.TagIn(name=f"bench {i}"))),
+    Op(
+        "delete_tag",
+        lambda db, c, i, tag_id: crud.delete_tag(db, tag_id, c["tag_user"]),
+        lambda db, c, i: crud.create_tag(db, c["tag_user"], schemas.TagIn(name=f"apagar {i}")).id,
+    ),
+    Op("create_media_tag", lambda db, c, i, _: crud.create_media_tag(
+        db, schemas.MediaTagIn(tag_id=c["tag_id"], **ref(fresh(i))), c["tag_user"],
+    )),
+    Op(
+        "delete_media_tag",
+        lambda db, c, i, link_id: crud.delete_media_tag(db, link_id, c["tag_user"]),
+        lambda db, c, i: crud.create_media_tag(
+            db, schemas.MediaTagIn(tag_id=c["tag_id"], **ref(fresh(-i))), c["tag_user"],
+        ).id,
+    ),
+    Op("upsert_settings", lambda db, c, i, _: crud.upsert_settings(
+        db, c["history_user"], schemas.SettingsIn(theme_mode=("light", "dark")[i % 2]),
+    )),
+    Op("upsert_statistics", lambda db, c, i, _: crud.upsert_statistics(
+        db, c["history_user"], schemas.StatisticsIn(total_play_count=i),
+    )),
+)
+
+
+# ==================== EXECUÇÃO ====================
+def seeded_copy(size: str) -> str:
+    """Cópia de trabalho do banco semeado do tamanho (semeia e guarda em cache na primeira vez)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cached = os.path.join(CACHE_DIR, f"{size}-v{head()}.db")
+    if not os.path.exists(cached):
+        engine = seed_dataset.bulk_engine(f"sqlite:///{cached}.tmp")
+        upgrade(engine)
+        seed_dataset.seed(engine, SIZES[size])
+        engine.dispose()
+        os.replace(f"{cached}.tmp", cached)
+    work = os.path.join(_DIR, f"{size}.db")
+    shutil.copyfile(cached, work)
+    return f"sqlite:///{work}"
+
+
+def context(db: Session) -> dict:
+    """Os donos mais pesados de cada tipo de linha (pior caso das listagens)."""
+    def heaviest(column) -> int:
+        return db.execute(select(column).group_by(column).order_by(func.count().desc(), column).limit(1)).scalar()
+
+    playlist_id = heaviest(PlaylistItem.playlist_id)
+    tag_id = heaviest(MediaTag.tag_id)
+    history_user = heaviest(HistoryItem.user_id)
+    return {
+        "email": db.get(User, history_user).email,
+        "history_user": history_user,
+        "favorites_user": heaviest(Favorite.user_id),
+        "playlist_id": playlist_id,
+        "playlist_user": db.get(Playlist, playlist_id).user_id,
+        "tag_id": tag_id,
+        "tag_user": db.get(Tag, tag_id).user_id,
+    }
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_size(size: str, ops: list[Op], iterations: int, warmup: int) -> dict[str, dict]:
+    """
+    Roda as operações intercaladas (uma chamada de cada por rodada), para
+    que oscilações da máquina atinjam todas por igual; REFERENCE entra nas
+    rodadas como régua (ver compare).
+    """
+    writer, reader = create_sqlite_engines(seeded_copy(size), f"bench_{size}")
+    Session = sessionmaker(class_=RoutingSession, bind=writer, reader=reader, autoflush=False)
+
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    with Session() as db:
+        ctx = context(db)
+    for engine in (writer, reader):
+        event.listen(engine, "before_cursor_execute", count)
+
+    ops = [REFERENCE, *ops]
+    timings: dict[str, list[float]] = {op.name: [] for op in ops}
+    counts: dict[str, list[int]] = {op.name: [] for op in ops}
+    try:
+        for n in range(warmup + iterations):
+            for op_index, op in enumerate(ops):
+                i = op_index * 1_000_000 + n
+                arg = None
+                if op.setup is not None:
+                    with Session() as db:
+                        arg = op.setup(db, ctx, i)
+                        db.commit()
+                with Session() as db:
+                    statements = 0
+                    start = time.perf_counter()
+                    op.run(db, ctx, i, arg)
+                    db.commit()
+                    elapsed = time.perf_counter() - start
+                if n >= warmup:
+                    timings[op.name].append(elapsed * 1e6)
+                    counts[op.name].append(statements)
+    finally:
+        writer.dispose()
+        reader.dispose()
+
+    results = {}
+    for op in ops:
+        ordered = sorted(timings[op.name])
+        results[op.name] = {
+            "p50_us": round(percentile(ordered, 0.50), 1),
+            "p95_us": round(percentile(ordered, 0.95), 1),
+            "statements": sorted(counts[op.name])[len(ordered) // 2],
+        }
+    return results
+
+
+def change(size: str, name: str, results: dict[str, dict], baseline: dict) -> Optional[float]:
+    """
+    Variação relativa do p50 contra o baseline, normalizada pela REFERENCE
+    das duas execuções (mede a operação, não a máquina naquele momento).
+    """
+    base = baseline.get(size, {})
+    if name not in base:
+        return None
+    ratio = results[name]["p50_us"] / base[name]["p50_us"]
+    if REFERENCE.name in base and name != REFERENCE.name:
+        ratio /= results[REFERENCE.name]["p50_us"] / base[REFERENCE.name]["p50_us"]
+    return ratio - 1
+
+
+def compare(size: str, results: dict[str, dict], baseline: dict, threshold: float) -> list[str]:
+    """Regressões de `results` contra o baseline do tamanho."""
+    regressions = []
+    for name, result in results.items():
+        delta = change(size, name, results, baseline)
+        if delta is None or name == REFERENCE.name:
+            continue
+        base = baseline[size][name]
+        if result["statements"] > base["statements"]:
+            regressions.append(f"{size}/{name}: statements {base['statements']} -> {result['statements']}")
+        if delta > threshold / 100:
+            regressions.append(f"{size}/{name}: p50 {base['p50_us']} -> {result['p50_us']} us ({delta:+.0%} normalizado)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium", help=f"entre {', '.join(SIZES)}")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", help="só operações cujo nome contém este texto")
+    parser.add_argument("--threshold", type=float, default=25, help="%% de piora do p50 tolerada")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como baseline")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",")]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"tamanhos desconhecidos: {', '.join(unknown)}")
+    ops = [op for op in OPS if not args.only or args.only in op.name]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = []
+    for size in sizes:
+        results = run_size(size, ops, args.iterations, args.warmup)
+        print(f"\n[{size}]  {'operação':<30} {'p50 us':>10} {'p95 us':>10} {'SQL':>6}  vs baseline")
+        for name, result in results.items():
+            delta = change(size, name, results, baseline)
+            print(
+                f"{'':>{len(size) + 4}}{name:<30} {result['p50_us']:>10} {result['p95_us']:>10} "
+                f"{result['statements']:>6}  {'-' if delta is None else format(delta, '+.0%')}"
+            )
+        regressions += compare(size, results, baseline, args.threshold)
+        baseline.setdefault(size, {})
+        if args.save_baseline:
+            baseline[size].update(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline gravado em {args.baseline}")
+    elif regressions:
+        print(f"\nRegressões (limiar {args.threshold:g}%):")
+        for line in regressions:
+            print(f"  {line}")
+        raise SystemExit(1)
+    else:
+        print("\nSem regressões.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+CPU por resposta das listas grandes: caminho antigo (objetos ORM validados
+no response_model e json da stdlib) vs o rápido de app.serialization
+(colunas em dicts, orjson).
+
+O caminho antigo é o que o FastAPI fazia nas rotas: as mesmas queries ORM de
+antes, serialize_response com o response_field da própria rota e o render do
+JSONResponse. Cada chamada abre sua sessão, como um request; as duas versões
+rodam intercaladas e o corpo das respostas é comparado byte a byte antes de
+medir.
+
+Uso:
+    python -m benchmarks.bench_serialization [--rows 10000] [--iterations 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, NamedTuple
+
+_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIR}/bench_serialization.db")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, APIRouter, serialize_response  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import Session, selectinload  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.db import SessionLocal, engine  # noqa: E402
+from app.migrations import upgrade  # noqa: E402
+from app.models import Favorite, HistoryItem, Playlist, PlaylistItem, media_key  # noqa: E402
+from app.pagination import keyset  # noqa: E402
+from app.routers import favorites, history, playlists  # noqa: E402
+from app.serialization import JSONList  # noqa: E402
+
+BATCH = 1000  # MAX_BATCH_SIZE das rotas de lote
+PLAYLISTS = 20
+
+
+class Case(NamedTuple):
+    name: str
+    route: APIRoute
+    # Carga de antes (objetos ORM) e a de agora (dicts de app.crud)
+    legacy: Callable[[Session, int], list]
+    fast: Callable[[Session, int], list[dict[str, Any]]]
+
+
+def list_route(router: APIRouter, path: str) -> APIRoute:
+    return next(route for route in router.routes if route.path == path and "GET" in route.methods)
+
+
+CASES = (
+    Case(
+        "GET /history", list_route(history.router, "/history"),
+        lambda db, user_id: db.scalars(keyset(
+            select(HistoryItem).where(HistoryItem.user_id == user_id),
+            HistoryItem.last_played, HistoryItem.id, None, None, descending=True,
+        )).all(),
+        crud.get_user_history,
+    ),
+    Case(
+        "GET /favorites", list_route(favorites.router, ""),
+        lambda db, user_id: db.scalars(keyset(
+            select(Favorite).where(Favorite.user_id == user_id),
+            Favorite.created_at, Favorite.id, None, None, descending=True,
+        )).all(),
+        crud.get_user_favorites,
+    ),
+    Case(
+        "GET /playlists", list_route(playlists.router, ""),
+        lambda db, user_id: db.scalars(
+            select(Playlist).where(Playlist.user_id == user_id).options(selectinload(Playlist.items))
+        ).all(),
+        crud.get_user_playlists,
+    ),
+)
+
+
+# ==================== DADOS ====================
+def populate(rows: int) -> int:
+    """Um usuário com `rows` itens de histórico, `rows` favoritos e `rows` itens em PLAYLISTS playlists."""
+    upgrade(engine)
+    media = [
+        {
+            "media_uri": f"content://bench/{i}",
+            "media_type": ("audio", "video")[i % 2],
+            "title": f"Faixa {i}",
+            "mime_type": ("audio/mpeg", None)[i % 2],
+            "duration_ms": 180_000 + i,
+        }
+        for i in range(rows)
+    ]
+    with SessionLocal() as db:
+        user_id = crud.create_user(db, schemas.UserSignup(
+            email="bench@mediaplay.com", name="Bench", password="senha123",
+        )).id
+        for start in range(0, rows, BATCH):
+            chunk = media[start:start + BATCH]
+            crud.upsert_history_items(db, user_id, [schemas.HistoryItemIn(**m, last_position_ms=i) for i, m in enumerate(chunk)])
+            crud.upsert_favorites(db, user_id, [schemas.FavoriteIn(**m) for m in chunk])
+        per_playlist = -(-rows // PLAYLISTS)
+        for p in range(PLAYLISTS):
+            playlist_id = crud.create_playlist(db, user_id, schemas.PlaylistIn(name=f"Playlist {p}")).id
+            chunk = media[p * per_playlist:(p + 1) * per_playlist]
+            if chunk:
+                db.execute(insert(PlaylistItem), [
+                    {
+                        "playlist_id": playlist_id, "media_id": media_key(m["media_uri"], m["media_type"]), "position": n,
+                        "title": m["title"], "mime_type": m["mime_type"], "duration_ms": m["duration_ms"],
+                    }
+                    for n, m in enumerate(chunk)
+                ])
+        db.commit()
+    return user_id
+
+
+# ==================== MEDIÇÃO ====================
+def legacy_response(case: Case, user_id: int, loop: asyncio.AbstractEventLoop) -> tuple[bytes, float, float]:
+    """Corpo e CPU (carga, serialização) do caminho antigo."""
+    start = time.process_time()
+    with SessionLocal() as db:
+        objects = case.legacy(db, user_id)
+        loaded = time.process_time()
+        content = loop.run_until_complete(serialize_response(field=case.route.response_field, response_content=objects))
+        body = JSONResponse(content).body
+    return body, loaded - start, time.process_time() - loaded
+
+
+def fast_response(case: Case, user_id: int) -> tuple[bytes, float, float]:
+    """Corpo e CPU (carga, serialização) do caminho de app.serialization."""
+    start = time.process_time()
+    with SessionLocal() as db:
+        rows = case.fast(db, user_id)
+        loaded = time.process_time()
+        body = JSONList(rows).body
+    return body, loaded - start, time.process_time() - loaded
+
+
+def run(user_id: int, iterations: int) -> dict[str, dict]:
+    loop = asyncio.new_event_loop()
+    results = {}
+    for case in CASES:
+        before, after = legacy_response(case, user_id, loop)[0], fast_response(case, user_id)[0]
+        if before != after:
+            raise SystemExit(f"{case.name}: corpos diferentes entre os caminhos ({len(before)} vs {len(after)} bytes)")
+        timings = {"antes": [], "depois": []}
+        for _ in range(iterations):  # intercalado
+            timings["antes"].append(legacy_response(case, user_id, loop)[1:])
+            timings["depois"].append(fast_response(case, user_id)[1:])
+        results[case.name] = {
+            "bytes": len(before),
+            **{
+                f"{label}_{part}_ms": round(statistics.median(t[i] for t in samples) * 1000, 1)
+                for label, samples in timings.items()
+                for i, part in enumerate(("carga", "json"))
+            },
+        }
+    loop.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="linhas por resposta")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = populate(args.rows)
+    results = run(user_id, args.iterations)
+
+    print(f"\nCPU por resposta de {args.rows} linhas (mediana de {args.iterations}, ms; carga + JSON)")
+    print(f"{'resposta':<16} {'bytes':>9}  {'antes':>24}  {'depois':>24}  {'ganho':>6}")
+    for name, r in results.items():
+        before = r["antes_carga_ms"] + r["antes_json_ms"]
+        after = r["depois_carga_ms"] + r["depois_json_ms"]
+        print(
+            f"{name:<16} {r['bytes']:>9}  "
+            f"{before:>7.1f} {'(%.1f + %.1f)' % (r['antes_carga_ms'], r['antes_json_ms']):>16}  "
+            f"{after:>7.1f} {'(%.1f + %.1f)' % (r['depois_carga_ms'], r['depois_json_ms']):>16}  "
+            f"{before / after:>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
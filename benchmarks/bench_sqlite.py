@@ -0,0 +1,107 @@
+"""
+Throughput do SQLite com escritas concorrentes (threadpool): engine padrão
+(journal de rollback, pool comum) vs perfil de produção de app.db (WAL,
+pragmas, writer único e leitores query_only).
+
+Cada thread é um usuário alternando leituras do histórico e upserts
+(commit a cada escrita), como os requests do app.
+
+Uso:
+    python -m benchmarks.bench_sqlite [--threads 16] [--seconds 5] [--write-ratio 0.2]
+
+Sempre usa bancos SQLite temporários (um por perfil).
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIR}/bench_sqlite_app.db")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.db import RoutingSession, create_sqlite_engines  # noqa: E402
+from app.migrations import upgrade  # noqa: E402
+from app.models import MediaType  # noqa: E402
+
+
+def default_profile(url: str) -> sessionmaker:
+    return sessionmaker(bind=create_engine(url), autoflush=False)
+
+
+def tuned_profile(url: str) -> sessionmaker:
+    writer, reader = create_sqlite_engines(url, "bench")
+    return sessionmaker(class_=RoutingSession, bind=writer, reader=reader, autoflush=False)
+
+
+def run(make_sessions, name: str, threads: int, seconds: float, write_ratio: float) -> dict:
+    url = f"sqlite:///{_DIR}/bench_sqlite_{name}.db"
+    Session = make_sessions(url)
+    upgrade(Session.kw["bind"])
+
+    with Session() as db:
+        user_ids = [
+            crud.create_user(db, schemas.UserSignup(email=f"{name}{i}@bench.com", name="B", password="x")).id
+            for i in range(threads)
+        ]
+        db.commit()
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(user_id: int) -> None:
+        rng = random.Random(user_id)
+        local = {"reads": 0, "writes": 0, "locked": 0}
+        while time.perf_counter() < deadline:
+            try:
+                with Session() as db:
+                    if rng.random() < write_ratio:
+                        item = schemas.HistoryItemIn(
+                            media_uri=f"content://{name}/{rng.randrange(200)}", media_type=MediaType.AUDIO,
+                            title="T", last_position_ms=rng.randrange(10_000),
+                        )
+                        crud.upsert_history_item(db, user_id, item)
+                        db.commit()
+                        local["writes"] += 1
+                    else:
+                        crud.get_user_history(db, user_id, limit=50)
+                        db.commit()
+                        local["reads"] += 1
+            except OperationalError:  # "database is locked"
+                local["locked"] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    pool = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return {**counts, "ops_per_s": round((counts["reads"] + counts["writes"]) / seconds)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for name, profile in (("default", default_profile), ("tuned", tuned_profile)):
+        result = run(profile, name, args.threads, args.seconds, args.write_ratio)
+        print(
+            f"{name:>8}: {result['ops_per_s']:7d} ops/s  reads={result['reads']}  "
+            f"writes={result['writes']}  locked={result['locked']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Custo de verificação do schema no boot: checagem de versão (init_db atual)
+vs create_all + checagem de índices (comportamento anterior), num banco já
+atualizado.
+
+Uso:
+    python -m benchmarks.bench_startup [--runs 20]
+
+Sem DATABASE_URL, usa um SQLite temporário.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.db import engine, init_db  # noqa: E402
+from app.models import Base  # noqa: E402
+
+
+def legacy_boot() -> None:
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def measure(boot, runs: int) -> dict:
+    statements = []
+    listener = lambda *a: statements.append(a[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        start = time.perf_counter()
+        for _ in range(runs):
+            engine.dispose()  # cada boot abre conexões novas
+            boot()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return {"ms_per_boot": round(elapsed / runs * 1000, 2), "statements_per_boot": len(statements) // runs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()  # garante o schema em HEAD
+    results = {"version_check": measure(init_db, args.runs), "create_all": measure(legacy_boot, args.runs)}
+    for name, result in results.items():
+        print(f"{name:>14}: {result['ms_per_boot']:8.2f} ms/boot  {result['statements_per_boot']:4d} statements")
+
+
+if __name__ == "__main__":
+    main()
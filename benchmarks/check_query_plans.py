@@ -0,0 +1,154 @@
+"""
+Regressão de planos: roda as consultas quentes do app.crud num banco com
+dados, captura o SQL que elas realmente emitem e passa cada statement por
+EXPLAIN. Falha (exit 1) se alguma fizer varredura completa de tabela.
+
+- SQLite: EXPLAIN QUERY PLAN; "SCAN <tabela>" sem índice é varredura
+  (versões antigas escrevem "SCAN TABLE <tabela>").
+- PostgreSQL: EXPLAIN (FORMAT JSON) com enable_seqscan=off, para que um
+  "Seq Scan" signifique que não há índice utilizável (tabelas pequenas
+  seriam varridas de qualquer forma).
+
+Uso:
+    python -m benchmarks.check_query_plans
+
+Sem DATABASE_URL, usa um SQLite temporário. O mesmo conjunto roda no
+pytest em tests/test_query_plans.py.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/check_query_plans.db")
+
+from sqlalchemy import event, text  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.db import SessionLocal, engine, init_db, read_engine  # noqa: E402
+from app.models import MediaType, MediaTag, Favorite, HistoryItem, Tag, media_key  # noqa: E402
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE |(?!TABLE ))(\w+)\b(?! USING (COVERING )?INDEX)")
+
+
+def seed(db) -> tuple[int, int]:
+    """Um usuário com algumas linhas em cada tabela; retorna (user_id, playlist_id)."""
+    user = crud.create_user(db, schemas.UserSignup(email="plans@mediaplay.com", name="Plans", password="x"))
+    crud.create_default_settings(db, user.id)
+    crud.create_default_statistics(db, user.id)
+    media = [
+        {"media_uri": f"content://media/{i}", "media_type": MediaType.AUDIO, "title": f"T{i}", "duration_ms": 1000}
+        for i in range(20)
+    ]
+    crud.upsert_favorites(db, user.id, [schemas.FavoriteIn(**m) for m in media])
+    crud.upsert_history_items(db, user.id, [schemas.HistoryItemIn(**m) for m in media])
+    playlist = crud.create_playlist(db, user.id, schemas.PlaylistIn(name="P"))
+    for position, m in enumerate(media):
+        crud.upsert_playlist_item(db, playlist.id, schemas.PlaylistItemIn(**m, position=position), user.id)
+    tag = crud.create_tag(db, user.id, schemas.TagIn(name="tag"))
+    crud.create_media_tag(db, schemas.MediaTagIn(tag_id=tag.id, **{k: media[0][k] for k in ("media_uri", "media_type")}), user.id)
+    db.commit()
+    return user.id, playlist.id
+
+
+def prepare() -> tuple[int, int]:
+    """Migra o banco e semeia na primeira vez; retorna (user_id, playlist_id)."""
+    init_db()
+    with SessionLocal() as db:
+        existing = crud.get_user_by_email(db, "plans@mediaplay.com")
+        return (existing.id, existing.playlists[0].id) if existing else seed(db)
+
+
+def hot_queries(user_id: int, playlist_id: int) -> dict:
+    """Consultas de leitura executadas a cada request dos endpoints por usuário."""
+    refs = [schemas.MediaRef(media_uri=f"content://media/{i}", media_type=MediaType.AUDIO) for i in range(3)]
+    return {
+        "user_by_email": lambda db: crud.get_user_by_email(db, "plans@mediaplay.com"),
+        "favorites_page": lambda db: crud.get_user_favorites(db, user_id, limit=10),
+        "favorites_marker": lambda db: crud.get_change_marker(db, Favorite, user_id),
+        "favorites_contains": lambda db: crud.get_favorited(db, user_id, refs),
+        "favorite_by_uri": lambda db: crud.get_favorite_by_uri(db, user_id, refs[0].media_uri, refs[0].media_type),
+        "history_page": lambda db: crud.get_user_history(db, user_id, limit=10),
+        "history_marker": lambda db: crud.get_change_marker(db, HistoryItem, user_id),
+        "playlists_with_items": lambda db: crud.get_user_playlists(db, user_id),
+        "playlists_summary": lambda db: crud.get_user_playlist_summaries(db, user_id),
+        "playlists_marker": lambda db: crud.get_playlists_change_marker(db, user_id),
+        "playlist_items_page": lambda db: crud.get_playlist_items(db, playlist_id, limit=10),
+        "tags_page": lambda db: crud.get_user_tags(db, user_id, limit=10),
+        "tags_marker": lambda db: crud.get_change_marker(db, Tag, user_id),
+        "media_tags_by_media": lambda db: db.query(MediaTag).filter(
+            MediaTag.media_id == media_key(refs[0].media_uri, refs[0].media_type)
+        ).all(),
+        "settings": lambda db: crud.get_user_settings(db, user_id),
+        "statistics": lambda db: crud.get_user_statistics(db, user_id),
+        "sync_changes": lambda db: crud.get_changes_since(db, user_id, None, 100),
+    }
+
+
+def capture(fn) -> list[tuple[str, object]]:
+    """Executa `fn` numa sessão descartável e retorna os SELECTs emitidos."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engines = [e for e in (engine, read_engine) if e is not None]
+    for e in engines:
+        event.listen(e, "before_cursor_execute", listener)
+    try:
+        with SessionLocal() as db:
+            fn(db)
+            db.rollback()
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", listener)
+    return statements
+
+
+def full_scans(conn, statement: str, parameters) -> tuple[list[str], list[str]]:
+    """Retorna (linhas do plano, tabelas varridas por completo)."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        plan = [row[-1] for row in rows]
+        return plan, [m.group(1) for line in plan if (m := _SQLITE_SCAN.match(line))]
+
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    (document,) = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).one()
+    plan, scans = [], []
+
+    def walk(node, depth=0):
+        plan.append("  " * depth + f"{node['Node Type']} {node.get('Relation Name', '')}".rstrip())
+        if node["Node Type"] == "Seq Scan":
+            scans.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(document[0]["Plan"])
+    return plan, scans
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="mostra o plano de todas as consultas")
+    args = parser.parse_args()
+
+    user_id, playlist_id = prepare()
+    failures = 0
+    for name, fn in hot_queries(user_id, playlist_id).items():
+        for statement, parameters in capture(fn):
+            with engine.begin() as conn:
+                plan, scans = full_scans(conn, statement, parameters)
+                conn.rollback()
+            status = "FULL SCAN: " + ", ".join(scans) if scans else "ok"
+            failures += bool(scans)
+            print(f"{name:>22}: {status}")
+            if scans or args.verbose:
+                for line in plan:
+                    print(f"{'':>24}{line}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
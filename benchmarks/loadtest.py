@@ -0,0 +1,390 @@
+"""
+Teste de carga da API com usuários virtuais concorrentes (asyncio + httpx).
+
+Cada usuário virtual faz signup/signin e, até o fim da duração, sorteia
+ações da mistura (favoritos, histórico, posição, CRUD de playlists, tags,
+estatísticas, novo signin), com tempo de pensar exponencial entre elas.
+Sai um JSON com throughput e p50/p95/p99 por rota (template, não path),
+para comparar execuções entre commits.
+
+Uso:
+    python -m benchmarks.loadtest --serve [--users 50] [--duration 30] [--mix mixed]
+    python -m benchmarks.loadtest --base-url http://localhost:8000 --mix "history_list=3,history_upsert=1"
+    python -m benchmarks.loadtest --serve --output atual.json --baseline anterior.json
+
+--serve sobe um uvicorn local (SQLite temporário, a menos que DATABASE_URL
+esteja definida) numa porta livre e derruba ao final. --workers > 1 exige
+PostgreSQL: a fila de escrita do SQLite é por processo (ver app.db.WriterGate).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+MEDIA_TYPES = ("audio", "video")
+
+# Pesos por ação; --mix aceita um nome daqui ou "acao=peso,acao=peso"
+MIXES = {
+    "mixed": {
+        "favorites_list": 3, "favorite_add": 1, "history_list": 4, "history_upsert": 3,
+        "position": 4, "playlists_list": 2, "playlist_detail": 2, "playlist_create": 1,
+        "playlist_delete": 0.2, "tags_list": 1, "tag_link": 0.5, "statistics": 1, "signin": 0.2,
+    },
+    "browse": {
+        "favorites_list": 4, "history_list": 4, "playlists_list": 3, "playlist_detail": 3,
+        "tags_list": 2, "statistics": 1, "position": 1,
+    },
+    "player": {
+        "position": 8, "history_upsert": 3, "history_list": 2, "favorites_list": 1, "favorite_add": 1,
+    },
+    "write": {
+        "favorite_add": 3, "history_upsert": 4, "playlist_create": 2, "playlist_delete": 1,
+        "tag_link": 2, "statistics": 1, "position": 2,
+    },
+}
+
+
+# ==================== COLETA ====================
+class Recorder:
+    """Latências (ms) e erros por rota; ver percentile()."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, dict[str, int]] = {}
+
+    def record(self, route: str, elapsed_ms: float, error: Optional[str]) -> None:
+        self.latencies.setdefault(route, []).append(elapsed_ms)
+        if error is not None:
+            errors = self.errors.setdefault(route, {})
+            errors[error] = errors.get(error, 0) + 1
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank sobre uma lista já ordenada."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, samples in sorted(recorder.latencies.items()):
+        ordered = sorted(samples)
+        errors = recorder.errors.get(route, {})
+        routes[route] = {
+            "count": len(ordered),
+            "errors": sum(errors.values()),
+            "error_kinds": errors,
+            "rps": round(len(ordered) / elapsed, 2),
+            "mean_ms": round(sum(ordered) / len(ordered), 2),
+            "p50_ms": round(percentile(ordered, 0.50), 2),
+            "p95_ms": round(percentile(ordered, 0.95), 2),
+            "p99_ms": round(percentile(ordered, 0.99), 2),
+            "max_ms": round(ordered[-1], 2),
+        }
+    total = sum(route["count"] for route in routes.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(route["errors"] for route in routes.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "routes": routes,
+    }
+
+
+# ==================== USUÁRIO VIRTUAL ====================
+class VirtualUser:
+    """Um cliente do app: token, playlists/tags já criadas e um RNG próprio."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, run_id: str, index: int, seed: int):
+        self.client = client
+        self.recorder = recorder
+        self.email = f"load-{run_id}-{index}@mediaplay.com"
+        self.rng = random.Random(seed * 100_003 + index)
+        self.headers: dict[str, str] = {}
+        self.playlist_ids: list[int] = []
+        self.tag_ids: list[int] = []
+        self.media_seq = 0
+
+    async def request(self, method: str, route: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """Executa e registra sob `route` (template); 4xx/5xx contam como erro."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(f"{method} {route}", (time.perf_counter() - start) * 1000, type(e).__name__)
+            return None
+        error = str(response.status_code) if response.status_code >= 400 else None
+        self.recorder.record(f"{method} {route}", (time.perf_counter() - start) * 1000, error)
+        return response if error is None else None
+
+    def media(self, fresh: bool = False) -> dict:
+        """Mídia do "catálogo" do usuário; fresh=True cria uma URI nova."""
+        if fresh or self.media_seq == 0:
+            self.media_seq += 1
+            number = self.media_seq
+        else:
+            number = self.rng.randint(1, self.media_seq)
+        return {
+            "media_uri": f"content://media/{number}",
+            "media_type": MEDIA_TYPES[number % 2],
+            "title": f"Faixa {number}",
+        }
+
+    async def login(self) -> bool:
+        credentials = {"email": self.email, "password": "senha123"}
+        response = await self.request("POST", "/auth/signup", "/auth/signup", json={**credentials, "name": "Carga"})
+        if response is None:
+            return False
+        response = await self.request("POST", "/auth/signin", "/auth/signin", json=credentials)
+        if response is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    # ---------- ações ----------
+    async def favorites_list(self) -> None:
+        await self.request("GET", "/favorites", "/favorites", params={"limit": 50})
+
+    async def favorite_add(self) -> None:
+        await self.request("POST", "/favorites", "/favorites", json=self.media(fresh=self.rng.random() < 0.5))
+
+    async def history_list(self) -> None:
+        await self.request("GET", "/history", "/history", params={"limit": 50})
+
+    async def history_upsert(self) -> None:
+        item = {**self.media(fresh=self.rng.random() < 0.3), "last_position_ms": self.rng.randrange(600_000)}
+        await self.request("POST", "/history", "/history", json=item)
+
+    async def position(self) -> None:
+        beat = {**self.media(), "position_ms": self.rng.randrange(600_000)}
+        await self.request("PUT", "/history/position", "/history/position", json=beat)
+
+    async def playlists_list(self) -> None:
+        await self.request("GET", "/playlists", "/playlists", params={"include": "summary"})
+
+    async def playlist_detail(self) -> None:
+        if not self.playlist_ids:
+            return await self.playlist_create()
+        playlist_id = self.rng.choice(self.playlist_ids)
+        await self.request("GET", "/playlists/{playlist_id}", f"/playlists/{playlist_id}")
+
+    async def playlist_create(self) -> None:
+        response = await self.request("POST", "/playlists", "/playlists", json={"name": f"Lista {self.rng.random():.6f}"})
+        if response is None:
+            return
+        playlist_id = response.json()["id"]
+        self.playlist_ids.append(playlist_id)
+        for position in range(self.rng.randint(1, 5)):
+            item = {**self.media(), "position": position, "duration_ms": self.rng.randrange(60_000, 400_000)}
+            await self.request(
+                "POST", "/playlists/{playlist_id}/items", f"/playlists/{playlist_id}/items", json=item,
+            )
+
+    async def playlist_delete(self) -> None:
+        if not self.playlist_ids:
+            return
+        playlist_id = self.playlist_ids.pop(self.rng.randrange(len(self.playlist_ids)))
+        await self.request("DELETE", "/playlists/{playlist_id}", f"/playlists/{playlist_id}")
+
+    async def tags_list(self) -> None:
+        await self.request("GET", "/tags", "/tags")
+
+    async def tag_link(self) -> None:
+        if len(self.tag_ids) < 5:
+            response = await self.request("POST", "/tags", "/tags", json={"name": f"tag-{len(self.tag_ids)}"})
+            if response is None:
+                return
+            self.tag_ids.append(response.json()["id"])
+        media = self.media()
+        link = {"tag_id": self.rng.choice(self.tag_ids), "media_uri": media["media_uri"], "media_type": media["media_type"]}
+        await self.request("POST", "/tags/media", "/tags/media", json=link)
+
+    async def statistics(self) -> None:
+        response = await self.request("GET", "/statistics", "/statistics")
+        if response is not None and self.rng.random() < 0.3:
+            stats = response.json()
+            await self.request("POST", "/statistics", "/statistics", json={
+                "total_play_count": stats["total_play_count"] + 1,
+                "total_listen_time_ms": stats["total_listen_time_ms"] + self.rng.randrange(300_000),
+                "favorite_count": stats["favorite_count"],
+                "playlist_count": len(self.playlist_ids),
+            })
+
+    async def signin(self) -> None:
+        await self.request("POST", "/auth/signin", "/auth/signin", json={"email": self.email, "password": "senha123"})
+
+
+ACTIONS: dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    name: getattr(VirtualUser, name) for name in sorted({name for mix in MIXES.values() for name in mix})
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"ação desconhecida: {name!r} (válidas: {', '.join(ACTIONS)})")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"peso inválido em {part!r}")
+    return mix
+
+
+# ==================== EXECUÇÃO ====================
+async def run_user(user: VirtualUser, mix: dict[str, float], start_delay: float, deadline: float, think_ms: float) -> None:
+    await asyncio.sleep(start_delay)
+    if not await user.login():
+        return
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        await ACTIONS[user.rng.choices(names, weights)[0]](user)
+        if think_ms > 0:
+            await asyncio.sleep(min(user.rng.expovariate(1000 / think_ms), max(0.0, deadline - time.perf_counter())))
+
+
+async def run(base_url: str, users: int, duration: float, ramp_up: float, think_ms: float,
+              mix: dict[str, float], seed: int) -> dict:
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        deadline = start + ramp_up + duration
+        await asyncio.gather(*(
+            run_user(
+                VirtualUser(client, recorder, run_id, index, seed), mix,
+                ramp_up * index / users, deadline, think_ms,
+            )
+            for index in range(users)
+        ))
+        elapsed = time.perf_counter() - start
+    return summarize(recorder, elapsed)
+
+
+# ==================== SERVIDOR LOCAL (--serve) ====================
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        "LOG_REQUEST_SAMPLE_RATE": os.environ.get("LOG_REQUEST_SAMPLE_RATE", "0"),
+    }
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/loadtest.db")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(150):
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn saiu com código {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn não respondeu em /health")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """Resumo legível (stderr) do throughput e p95 contra outra execução."""
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"throughput: {baseline['throughput_rps']} -> {report['throughput_rps']} rps "
+          f"({delta(report['throughput_rps'], baseline['throughput_rps'])})", file=sys.stderr)
+    for route, stats in report["routes"].items():
+        old = baseline["routes"].get(route)
+        if old:
+            print(f"  {route:<36} p95 {old['p95_ms']:>8} -> {stats['p95_ms']:>8} ms "
+                  f"({delta(stats['p95_ms'], old['p95_ms'])})", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="API já rodando (ex.: http://localhost:8000)")
+    target.add_argument("--serve", action="store_true", help="sobe um uvicorn local para o teste")
+    parser.add_argument("--workers", type=int, default=1, help="workers do uvicorn com --serve")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="segundos após o ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5, help="segundos para iniciar todos os usuários")
+    parser.add_argument("--think-ms", type=float, default=200, help="média do tempo de pensar (0 = sem pausa)")
+    parser.add_argument("--mix", type=parse_mix, default="mixed", help=f"{', '.join(MIXES)} ou acao=peso,...")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="grava o JSON aqui (padrão: stdout)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+    if args.serve and args.workers > 1 and os.environ.get("DATABASE_URL", "sqlite").startswith("sqlite"):
+        parser.error("SQLite roda com um único worker: a fila de escrita é por processo (ver app.db.WriterGate)")
+
+    process = None
+    base_url = args.base_url
+    if args.serve:
+        process, base_url = start_server(args.workers)
+    try:
+        result = asyncio.run(run(
+            base_url, args.users, args.duration, args.ramp_up, args.think_ms, args.mix, args.seed,
+        ))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "commit": git_commit(),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "base_url": None if args.serve else base_url, "serve": args.serve, "workers": args.workers,
+            "users": args.users, "duration_s": args.duration, "ramp_up_s": args.ramp_up,
+            "think_ms": args.think_ms, "mix": args.mix, "seed": args.seed,
+        },
+        **result,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
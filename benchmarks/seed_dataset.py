@@ -0,0 +1,410 @@
+"""
+Gera um dataset sintético em escala de produção no banco de DATABASE_URL,
+com inserts em lote de 20k linhas (executemany do driver no SQLite,
+insertmanyvalues do Core nos demais).
+
+Volumes padrão (--scale multiplica todos):
+    100k usuários (com settings e statistics), 200k mídias no catálogo,
+    2M linhas de histórico, 500k favoritos, 50k playlists com 1M itens
+    (até 5k por playlist), 200k tags com 2M vínculos tag-mídia.
+
+Distribuições com cauda longa: a quantidade de linhas por usuário (e de
+itens por playlist / vínculos por tag) segue Zipf sobre um ranking
+embaralhado, e a escolha da mídia segue a popularidade Zipf do catálogo.
+Mesma --seed, mesmo banco: ids explícitos, timestamps a partir de uma data
+fixa e um RNG por tabela.
+
+Uso:
+    DATABASE_URL=sqlite:///seed.db python -m benchmarks.seed_dataset [--scale 0.1] [--seed 1] [--reset]
+
+Sem DATABASE_URL, grava em sqlite:///mediaplay_seed.db. Os índices
+secundários são removidos durante a carga e recriados no fim
+(--keep-indexes para não mexer neles).
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Callable, Iterable, Iterator
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///mediaplay_seed.db")
+
+from sqlalchemy import Table, create_engine, event, func, insert, select, text  # noqa: E402
+from sqlalchemy.engine import Connection, Engine  # noqa: E402
+
+from app.db import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from app.migrations import upgrade  # noqa: E402
+from app.models import (  # noqa: E402
+    Base, Favorite, HistoryItem, Media, MediaTag, MediaType, Playlist, PlaylistItem, Setting, Statistics, Tag,
+    User, media_key,
+)
+from app.security import verify_password  # noqa: E402
+
+BATCH_SIZE = 20_000
+PASSWORD = "senha123"
+EPOCH = datetime(2025, 1, 1)
+SPAN_SECONDS = 365 * 24 * 3600
+
+VOLUMES = {
+    "users": 100_000,
+    "media": 200_000,
+    "history": 2_000_000,
+    "favorites": 500_000,
+    "playlists": 50_000,
+    "playlist_items": 1_000_000,
+    "tags": 200_000,
+    "media_tags": 2_000_000,
+}
+MAX_ROWS_PER_USER = 5_000  # histórico e favoritos
+MAX_OWNED_PER_USER = 500   # playlists e tags
+MAX_PLAYLIST_ITEMS = 5_000
+MAX_TAG_LINKS = 20_000
+ACTIVITY_SKEW = 1.0      # expoente Zipf das linhas por dono
+POPULARITY_SKEW = 1.1    # expoente Zipf da popularidade das mídias
+
+
+# ==================== DISTRIBUIÇÕES ====================
+def zipf_counts(total: int, owners: int, cap: int, rng: random.Random) -> list[int]:
+    """
+    Reparte `total` linhas entre `owners` donos: o de rank k recebe
+    ~total / k^ACTIVITY_SKEW (normalizado), limitado a `cap`. O ranking é
+    embaralhado para os donos pesados não serem só os primeiros ids.
+    """
+    weights = [1 / rank ** ACTIVITY_SKEW for rank in range(1, owners + 1)]
+    norm = sum(weights)
+    counts = [min(cap, int(total * weight / norm)) for weight in weights]
+    # Arredondamento e limite perdem linhas: devolve uma a cada dono do topo com espaço
+    missing = total - sum(counts)
+    while missing > 0:
+        room = [rank for rank in range(owners) if counts[rank] < cap][:missing]
+        if not room:
+            break
+        for rank in room:
+            counts[rank] += 1
+        missing -= len(room)
+    rng.shuffle(counts)
+    return counts
+
+
+class Popularity:
+    """Sorteio de mídias (índices do catálogo) com popularidade Zipf."""
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.rng = rng
+        self.cum_weights = list(accumulate(1 / rank ** POPULARITY_SKEW for rank in range(1, size + 1)))
+        self.population = range(size)
+
+    def distinct(self, count: int) -> list[int]:
+        """`count` mídias distintas: cabeça pela popularidade, o resto da cauda uniforme."""
+        count = min(count, self.size)
+        chosen: dict[int, None] = {}
+        for _ in range(2):
+            for index in self.rng.choices(self.population, cum_weights=self.cum_weights, k=count - len(chosen)):
+                chosen[index] = None
+            if len(chosen) == count:
+                return list(chosen)
+        while len(chosen) < count:
+            chosen[self.rng.randrange(self.size)] = None
+        return list(chosen)
+
+
+def media_uri(index: int) -> str:
+    """URI da mídia de índice `index` do catálogo gerado."""
+    return f"content://media/external/{index}"
+
+
+def media_type(index: int) -> MediaType:
+    return MediaType.VIDEO if index % 5 == 0 else MediaType.AUDIO
+
+
+def batched(rows: Iterable[tuple]) -> Iterator[list[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==================== GERADORES ====================
+# Colunas de cada tabela, na ordem das tuplas geradas
+COLUMNS = {
+    "users": ("id", "email", "name", "hashed_password", "created_at", "updated_at"),
+    "settings": ("id", "user_id", "theme_mode", "playback_speed", "auto_resume", "created_at", "updated_at"),
+    "statistics": (
+        "id", "user_id", "total_play_count", "total_listen_time_ms", "favorite_count", "playlist_count",
+        "created_at", "updated_at",
+    ),
+    "media": ("id", "media_uri", "media_type", "created_at", "updated_at"),
+    "history": (
+        "id", "user_id", "media_id", "title", "mime_type", "duration_ms", "last_position_ms", "last_played",
+        "play_count", "created_at", "updated_at",
+    ),
+    "favorites": ("id", "user_id", "media_id", "title", "mime_type", "duration_ms", "created_at", "updated_at"),
+    "playlists": ("id", "user_id", "name", "description", "created_at", "updated_at"),
+    "playlist_items": (
+        "id", "playlist_id", "media_id", "title", "mime_type", "duration_ms", "position", "created_at", "updated_at",
+    ),
+    "tags": ("id", "user_id", "name", "color", "created_at", "updated_at"),
+    "media_tags": ("id", "tag_id", "media_id", "created_at", "updated_at"),
+}
+
+
+class Dataset:
+    """
+    Tuplas de cada tabela (ver COLUMNS), um RNG por tabela derivado da seed.
+
+    Timestamps são segundos desde EPOCH; stamp() converte. No SQLite já sai o
+    texto que o DateTime do SQLAlchemy grava ("AAAA-MM-DD HH:MM:SS.ffffff"),
+    montado de tabelas de dias e horários: o bind processor do DateTime
+    custava mais que o próprio executemany.
+    """
+
+    def __init__(self, seed: int, volumes: dict[str, int], dialect: str):
+        self.seed = seed
+        self.volumes = volumes
+        self.media_ids = [
+            media_key(media_uri(index), media_type(index)) for index in range(volumes["media"])
+        ]
+        # (title, mime_type, duration_ms) de cada mídia, repetidos nas linhas que a referenciam
+        rng = self.rng("media.metadata")
+        self.metadata = [
+            (f"Faixa {index}", "video/mp4" if media_type(index) is MediaType.VIDEO else "audio/mpeg",
+             rng.randrange(30_000, 600_000))
+            for index in range(volumes["media"])
+        ]
+        self.popularity = Popularity(volumes["media"], self.rng("popularity"))
+        self.stamp: Callable[[int], Any] = lambda offset: EPOCH + timedelta(seconds=offset)
+        if dialect == "sqlite":
+            days = [f"{EPOCH + timedelta(days=day):%Y-%m-%d} " for day in range(2 * SPAN_SECONDS // 86400)]
+            times = [f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}.000000" for second in range(86400)]
+            self.stamp = lambda offset: days[offset // 86400] + times[offset % 86400]
+
+    def rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    def users(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("users"), self.stamp
+        # O mesmo hash para todos (login com PASSWORD), no formato de app.security mas com salt da seed
+        salt = f"{rng.getrandbits(128):032x}"
+        hashed = f"{salt}:{hashlib.sha256((PASSWORD + salt).encode()).hexdigest()}"
+        assert verify_password(PASSWORD, hashed)
+        for user_id in range(1, self.volumes["users"] + 1):
+            created = stamp(int(rng.random() * SPAN_SECONDS))
+            yield user_id, f"seed{user_id}@mediaplay.dev", f"Usuario {user_id}", hashed, created, created
+
+    def settings(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("settings"), self.stamp
+        for user_id in range(1, self.volumes["users"] + 1):
+            changed = stamp(int(rng.random() * SPAN_SECONDS))
+            theme = rng.choice(("light", "dark", "auto"))
+            speed = rng.choice((1.0, 1.0, 1.0, 1.25, 1.5, 2.0))
+            yield user_id, user_id, theme, speed, rng.randrange(2), changed, changed
+
+    def statistics(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("statistics"), self.stamp
+        for user_id in range(1, self.volumes["users"] + 1):
+            changed = stamp(int(rng.random() * SPAN_SECONDS))
+            plays = int(rng.paretovariate(1.2))
+            # favorite_count/playlist_count são recalculados em finish()
+            yield user_id, user_id, plays, plays * rng.randrange(60_000, 300_000), 0, 0, changed, changed
+
+    def media(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("media"), self.stamp
+        for index, media_id in enumerate(self.media_ids):
+            created = stamp(int(rng.random() * SPAN_SECONDS))
+            yield media_id, media_uri(index), media_type(index).name, created, created
+
+    def _per_owner_media(self, table: str, owners: int, cap: int) -> Iterator[tuple[int, int, int]]:
+        """(id, dono 1..owners, índice da mídia) com linhas por dono Zipf e mídias distintas por dono."""
+        rng = self.rng(table)
+        counts = zipf_counts(self.volumes[table], owners, min(cap, self.volumes["media"]), rng)
+        row_id = 0
+        for owner, count in enumerate(counts, start=1):
+            for index in self.popularity.distinct(count):
+                row_id += 1
+                yield row_id, owner, index
+
+    def history(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("history.rows"), self.stamp
+        for row_id, user_id, index in self._per_owner_media("history", self.volumes["users"], MAX_ROWS_PER_USER):
+            created = int(rng.random() * SPAN_SECONDS)
+            played = stamp(created + int(rng.random() * 30 * 86400))
+            yield (
+                row_id, user_id, self.media_ids[index], *self.metadata[index], int(rng.random() * 600_000), played,
+                int(rng.paretovariate(1.5)), stamp(created), played,
+            )
+
+    def favorites(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("favorites.rows"), self.stamp
+        for row_id, user_id, index in self._per_owner_media("favorites", self.volumes["users"], MAX_ROWS_PER_USER):
+            created = stamp(int(rng.random() * SPAN_SECONDS))
+            yield row_id, user_id, self.media_ids[index], *self.metadata[index], created, created
+
+    def _owned(self, table: str) -> Iterator[tuple[int, int]]:
+        """(id, user_id) com quantidade por usuário Zipf (playlists, tags)."""
+        counts = zipf_counts(self.volumes[table], self.volumes["users"], MAX_OWNED_PER_USER, self.rng(table))
+        row_id = 0
+        for user_id, count in enumerate(counts, start=1):
+            for _ in range(count):
+                row_id += 1
+                yield row_id, user_id
+
+    def playlists(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("playlists.rows"), self.stamp
+        for playlist_id, user_id in self._owned("playlists"):
+            created = int(rng.random() * SPAN_SECONDS)
+            updated = created + int(rng.random() * SPAN_SECONDS / 4)
+            yield playlist_id, user_id, f"Playlist {playlist_id}", None, stamp(created), stamp(updated)
+
+    def playlist_items(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("playlist_items.rows"), self.stamp
+        current, position = 0, 0
+        for row_id, playlist_id, index in self._per_owner_media(
+            "playlist_items", self.volumes["playlists"], MAX_PLAYLIST_ITEMS,
+        ):
+            position = position + 1 if playlist_id == current else 0
+            current = playlist_id
+            created = stamp(int(rng.random() * SPAN_SECONDS))
+            yield row_id, playlist_id, self.media_ids[index], *self.metadata[index], position, created, created
+
+    def tags(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("tags.rows"), self.stamp
+        for tag_id, user_id in self._owned("tags"):
+            created = stamp(int(rng.random() * SPAN_SECONDS))
+            yield tag_id, user_id, f"tag {tag_id}", f"#{rng.randrange(1 << 24):06x}", created, created
+
+    def media_tags(self) -> Iterator[tuple]:
+        rng, stamp = self.rng("media_tags.rows"), self.stamp
+        for row_id, tag_id, index in self._per_owner_media("media_tags", self.volumes["tags"], MAX_TAG_LINKS):
+            created = stamp(int(rng.random() * SPAN_SECONDS))
+            yield row_id, tag_id, self.media_ids[index], created, created
+
+
+# Ordem de carga (FKs) e o gerador de cada tabela
+LOAD_ORDER = (
+    (User, "users"), (Setting, "settings"), (Statistics, "statistics"), (Media, "media"),
+    (HistoryItem, "history"), (Favorite, "favorites"), (Playlist, "playlists"),
+    (PlaylistItem, "playlist_items"), (Tag, "tags"), (MediaTag, "media_tags"),
+)
+
+
+# ==================== CARGA ====================
+def bulk_engine(url: str) -> Engine:
+    """Engine da carga: no SQLite, sem fsync nem journal em disco (o banco é descartável até o fim)."""
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _bulk_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.execute("PRAGMA cache_size=-262144")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+    return engine
+
+
+def load_table(conn: Connection, table: Table, rows: Iterable[tuple]) -> int:
+    """
+    Insere em lotes de BATCH_SIZE. No SQLite as tuplas vão direto ao
+    executemany do driver; nos demais, insert do Core (insertmanyvalues).
+    """
+    columns = COLUMNS[table.name]
+    sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    count = 0
+    for batch in batched(rows):
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql(sql, batch)
+        else:
+            conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+        count += len(batch)
+    return count
+
+
+def finish(conn: Connection) -> None:
+    """Contadores derivados, sequências (PostgreSQL: os ids foram explícitos) e estatísticas do planner."""
+    for column, model, key in (
+        (Statistics.favorite_count, Favorite, Favorite.user_id),
+        (Statistics.playlist_count, Playlist, Playlist.user_id),
+    ):
+        conn.execute(
+            Statistics.__table__.update().values({
+                column.key: select(func.count()).select_from(model).where(key == Statistics.user_id).scalar_subquery(),
+                Statistics.updated_at.key: Statistics.updated_at,  # sem o onupdate (determinístico)
+            })
+        )
+    if conn.dialect.name == "postgresql":
+        for model, _ in LOAD_ORDER:
+            if model is not Media:
+                table = model.__tablename__
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))"
+                ))
+    conn.execute(text("ANALYZE"))
+
+
+def seed(
+    engine: Engine, scale: float = 1.0, seed_value: int = 1, keep_indexes: bool = False,
+    progress: Callable[[str, int, float], None] = lambda name, rows, elapsed: None,
+) -> int:
+    """Gera o dataset num banco com o schema vazio; retorna o total de linhas."""
+    volumes = {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+    dataset = Dataset(seed_value, volumes, engine.dialect.name)
+    indexes = [] if keep_indexes else [index for model, _ in LOAD_ORDER for index in model.__table__.indexes]
+    total_rows = 0
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+    for model, name in LOAD_ORDER:
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            rows = load_table(conn, model.__table__, getattr(dataset, name)())
+        total_rows += rows
+        progress(name, rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+        finish(conn)
+    progress("índices+analyze", len(indexes), time.perf_counter() - start)
+    return total_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica todos os volumes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="apaga as tabelas do app antes de gerar")
+    parser.add_argument("--keep-indexes", action="store_true", help="não remove os índices durante a carga")
+    args = parser.parse_args()
+
+    engine = bulk_engine(SQLALCHEMY_DATABASE_URL)
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    upgrade(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(User)).scalar():
+            raise SystemExit("O banco já tem usuários; use --reset para recriar as tabelas.")
+
+    def progress(name: str, rows: int, elapsed: float) -> None:
+        if name == "índices+analyze":
+            print(f"{name:>15}: {rows:>10} índices {elapsed:7.1f}s")
+        else:
+            print(f"{name:>15}: {rows:>10,} linhas  {elapsed:7.1f}s  {rows / elapsed:>10,.0f} linhas/s")
+
+    start = time.perf_counter()
+    total_rows = seed(engine, args.scale, args.seed, args.keep_indexes, progress)
+    elapsed = time.perf_counter() - start
+    print(f"{'total':>15}: {total_rows:>10,} linhas  {elapsed:7.1f}s  {total_rows / elapsed:>10,.0f} linhas/s")
+
+
+if __name__ == "__main__":
+    main()
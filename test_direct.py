@@ -39,6 +39,9 @@ try:
     stats = crud.create_default_statistics(db, new_user.id)
     print(f"Statistics criado: ID {stats.id}")
     
+    # CRUD só faz flush; o commit é responsabilidade de quem abre a sessão
+    db.commit()
+    
     print("\n✅ Todos os testes passaram!")
     
 except Exception as e:
@@ -0,0 +1,23 @@
+"""
+Configuração dos testes.
+
+app.config lê o ambiente na importação: as variáveis precisam estar
+definidas antes de qualquer `import app`. Sem DATABASE_URL, os testes
+usam um SQLite temporário; QUERY_BUDGET=error faz o TestClient falhar em
+qualquer rota acima do orçamento de SQL (ver app.query_budget).
+"""
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/tests.db")
+os.environ.setdefault("QUERY_BUDGET", "error")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    """Banco migrado até HEAD antes de qualquer teste."""
+    from app.db import init_db
+
+    init_db()
@@ -0,0 +1,48 @@
+"""Cache de interning do catálogo de mídia (app.cache.media_cache)."""
+import uuid
+
+from sqlalchemy import event
+
+from app import crud, schemas
+from app.cache import media_cache
+from app.db import SessionLocal, engine
+from app.models import MediaType
+
+
+def media_inserts(fn) -> int:
+    """Quantos INSERT em `media` `fn` emite."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO media "):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+def test_known_media_skip_the_catalog_insert():
+    uri = f"content://media/{uuid.uuid4().hex}"
+    key = (uri, MediaType.AUDIO)
+    favorite = schemas.FavoriteIn(media_uri=uri, media_type=MediaType.AUDIO, title="T")
+    with SessionLocal() as db:
+        user = crud.create_user(db, schemas.UserSignup(
+            email=f"media-{uuid.uuid4().hex[:8]}@mediaplay.com", name="Media", password="secret123",
+        ))
+        db.commit()
+
+        # Rollback: a linha do catálogo não existe, então não entra no cache
+        assert media_inserts(lambda: crud.upsert_favorite(db, user.id, favorite)) == 1
+        db.rollback()
+        assert media_cache.get(key) is None
+
+        assert media_inserts(lambda: crud.upsert_favorite(db, user.id, favorite)) == 1
+        db.commit()
+        assert media_cache.get(key) is not None
+
+        assert media_inserts(lambda: crud.upsert_favorite(db, user.id, favorite)) == 0
+        db.commit()
@@ -0,0 +1,59 @@
+"""Migrações sobre bancos SQLite montados no layout de uma versão anterior."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, inspect, select, text
+
+from app import migrations
+from app.models import Media, MediaType, SchemaVersion, Statistics, User
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+    yield engine
+    engine.dispose()
+
+
+def at_version(engine, version: int) -> None:
+    """Layout atual, marcado como se só as migrações até `version` tivessem rodado."""
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(delete(SchemaVersion).where(SchemaVersion.version > version))
+
+
+def test_duplicate_statistics_collapse_before_unique_index(engine):
+    at_version(engine, 2)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_statistics_user"))
+        conn.execute(insert(User), [{"id": 1, "email": "a@x.com", "name": "A", "hashed_password": "x"}])
+        conn.execute(insert(Statistics), [
+            {"id": 1, "user_id": 1, "total_play_count": 1, "updated_at": datetime(2024, 1, 1)},
+            {"id": 2, "user_id": 1, "total_play_count": 7, "updated_at": datetime(2024, 2, 1)},
+            {"id": 3, "user_id": 1, "total_play_count": 3, "updated_at": datetime(2024, 1, 15)},
+        ])
+
+    assert migrations.upgrade(engine) == [3, 4, 5, 6]
+    with engine.connect() as conn:
+        assert conn.execute(select(Statistics.id, Statistics.total_play_count)).all() == [(2, 7)]
+        assert "uq_statistics_user" in {
+            name for (name,) in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+        }
+
+
+@pytest.mark.parametrize("sqlite_version", [None, (3, 34, 1)], ids=["drop-column", "rebuild"])
+def test_media_metadata_leave_the_catalog(engine, sqlite_version):
+    at_version(engine, 5)
+    with engine.begin() as conn:
+        for column in ("title VARCHAR", "mime_type VARCHAR", "duration_ms INTEGER"):
+            conn.execute(text(f"ALTER TABLE media ADD COLUMN {column}"))
+        conn.execute(insert(Media), [{"id": 1, "media_uri": "content://media/1", "media_type": MediaType.AUDIO}])
+    if sqlite_version:
+        # SQLite sem DROP COLUMN: a migração 6 recria a tabela
+        engine.dialect.server_version_info = sqlite_version
+
+    assert migrations.upgrade(engine) == [6]
+    with engine.connect() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("media")}
+        assert columns == set(Media.__table__.columns.keys())
+        assert conn.execute(select(Media.id, Media.media_uri)).all() == [(1, "content://media/1")]
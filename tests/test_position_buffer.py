@@ -0,0 +1,67 @@
+"""Buffer write-behind de PUT /history/position (app.position_buffer)."""
+import uuid
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.db import SessionLocal
+from app.main import app
+from app.models import HistoryItem, MediaType, media_key, mozambique_now
+
+
+def new_user(db) -> int:
+    user = crud.create_user(db, schemas.UserSignup(
+        email=f"positions-{uuid.uuid4().hex[:8]}@mediaplay.com", name="Positions", password="secret123",
+    ))
+    db.flush()
+    return user.id
+
+
+def test_heartbeat_for_new_media_creates_row_without_play():
+    with TestClient(app) as client:
+        signup = client.post("/auth/signup", json={
+            "email": f"heartbeat-{uuid.uuid4().hex[:8]}@mediaplay.com", "name": "HB", "password": "secret123",
+        })
+        headers = {"Authorization": f"Bearer {signup.json()['access_token']}"}
+        heartbeat = {"media_uri": "content://media/new", "media_type": "video", "title": "Novo", "position_ms": 42}
+        assert client.put("/history/position", json=heartbeat, headers=headers).status_code == 204
+
+        (item,) = client.get("/history", headers=headers).json()
+        assert (item["media_uri"], item["last_position_ms"], item["play_count"]) == ("content://media/new", 42, 0)
+
+    with SessionLocal() as db:
+        row = db.get(HistoryItem, item["id"])
+        assert (row.last_position_ms, row.play_count, row.title) == (42, 0, "Novo")
+
+
+def test_flush_positions_never_overwrites_a_newer_play():
+    uri = f"content://media/{uuid.uuid4().hex}"
+    with SessionLocal() as db:
+        user_id = new_user(db)
+        played = crud.upsert_history_item(db, user_id, schemas.HistoryItemIn(
+            media_uri=uri, media_type=MediaType.AUDIO, title="T", last_position_ms=1000,
+        ))
+        db.commit()
+        last_played = played.last_played
+
+        def heartbeat(position_ms: int, at) -> dict:
+            return {
+                "user_id": user_id, "media_uri": uri, "media_type": MediaType.AUDIO, "title": "T",
+                "last_position_ms": position_ms, "last_played": at,
+            }
+
+        # Heartbeat anterior ao POST /history: não grava
+        assert crud.flush_positions(db, [heartbeat(500, last_played - timedelta(seconds=1))]) == 0
+        db.commit()
+        row = db.scalars(select(HistoryItem).where(
+            HistoryItem.user_id == user_id, HistoryItem.media_id == media_key(uri, MediaType.AUDIO),
+        )).one()
+        assert (row.last_position_ms, row.play_count) == (1000, 1)
+
+        # Posterior: atualiza a posição sem contar reprodução
+        assert crud.flush_positions(db, [heartbeat(2000, mozambique_now() + timedelta(seconds=1))]) == 1
+        db.commit()
+        db.refresh(row)
+        assert (row.last_position_ms, row.play_count) == (2000, 1)
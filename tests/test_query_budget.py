@@ -0,0 +1,93 @@
+"""
+Orçamento de SQL das rotas de lista com N itens (QUERY_BUDGET=error, ver
+tests/conftest.py): acima do orçamento, o TestClient propaga
+QueryBudgetExceeded e o teste falha.
+"""
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.config import settings
+from app.db import SessionLocal
+from app.deps import get_read_db, get_read_user
+from app.main import app
+from app.metrics import MetricsMiddleware
+from app.models import MediaType, Playlist, PlaylistItem
+from app.query_budget import QueryBudgetExceeded, query_budget
+
+pytestmark = pytest.mark.skipif(settings.query_budget != "error", reason="requer QUERY_BUDGET=error")
+
+N = 25  # bem acima de QUERY_REPEAT_LIMIT: um N+1 estoura o limite de repetição
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def signup(client) -> tuple[int, dict]:
+    email = f"budget-{uuid.uuid4().hex[:8]}@mediaplay.com"
+    response = client.post("/auth/signup", json={"email": email, "name": "Budget", "password": "secret123"})
+    assert response.status_code == 201
+    with SessionLocal() as db:
+        user_id = crud.get_user_by_email(db, email).id
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def media(n: int) -> list[dict]:
+    return [
+        {"media_uri": f"content://media/{i}", "media_type": MediaType.AUDIO, "title": f"T{i}", "duration_ms": 1000}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    """Um usuário com N playlists de N itens e N entradas no histórico."""
+    user_id, headers = signup(client)
+    with SessionLocal() as db:
+        for p in range(N):
+            playlist = crud.create_playlist(db, user_id, schemas.PlaylistIn(name=f"P{p}"))
+            for position, m in enumerate(media(N)):
+                crud.upsert_playlist_item(db, playlist.id, schemas.PlaylistItemIn(**m, position=position), user_id)
+        crud.upsert_history_items(db, user_id, [schemas.HistoryItemIn(**m) for m in media(N)])
+        db.commit()
+    return headers
+
+
+def test_signup_within_budget(client):
+    signup(client)
+
+
+@pytest.mark.parametrize("include", [None, "summary"])
+def test_playlists_within_budget(client, seeded, include):
+    response = client.get("/playlists", params={"include": include} if include else {}, headers=seeded)
+    assert response.status_code == 200
+    assert len(response.json()) == N
+    if include is None:
+        assert all(len(playlist["items"]) == N for playlist in response.json())
+
+
+def test_history_within_budget(client, seeded):
+    response = client.get("/history", headers=seeded)
+    assert response.status_code == 200
+    assert len(response.json()) == N
+
+
+def test_n_plus_one_raises(client, seeded):
+    """Uma consulta por playlist ao montar a lista: o detector precisa pegar."""
+    n_plus_one = FastAPI()
+    n_plus_one.add_middleware(MetricsMiddleware)
+
+    @n_plus_one.get("/playlists")
+    @query_budget(100)
+    def item_counts(current_user=Depends(get_read_user), db=Depends(get_read_db)):
+        playlists = db.query(Playlist).filter(Playlist.user_id == current_user.id).all()
+        return [db.query(PlaylistItem).filter(PlaylistItem.playlist_id == p.id).count() for p in playlists]
+
+    with pytest.raises(QueryBudgetExceeded, match=r"\d+x SELECT"):
+        TestClient(n_plus_one).get("/playlists", headers=seeded)
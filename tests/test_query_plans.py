@@ -0,0 +1,38 @@
+"""Nenhuma consulta quente faz varredura completa (ver benchmarks.check_query_plans)."""
+import pytest
+
+from app.db import engine
+from benchmarks.check_query_plans import _SQLITE_SCAN, capture, full_scans, hot_queries, prepare
+
+QUERIES = list(hot_queries(0, 0))
+
+
+@pytest.fixture(scope="module")
+def ids():
+    return prepare()
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "postgresql"])
+@pytest.mark.parametrize("name", QUERIES)
+def test_no_full_scan(ids, dialect, name):
+    if engine.dialect.name != dialect:
+        pytest.skip(f"DATABASE_URL não aponta para {dialect}")
+    statements = capture(hot_queries(*ids)[name])
+    assert statements, f"{name} não emitiu nenhum SELECT"
+    for statement, parameters in statements:
+        with engine.begin() as conn:
+            plan, scans = full_scans(conn, statement, parameters)
+            conn.rollback()
+        assert not scans, f"{name}: varredura completa de {scans}\n" + "\n".join(plan)
+
+
+@pytest.mark.parametrize("line, table", [
+    ("SCAN favorites", "favorites"),
+    ("SCAN TABLE favorites", "favorites"),
+    ("SCAN favorites USING INDEX ix_favorites_user_updated", None),
+    ("SCAN TABLE favorites USING COVERING INDEX ix_favorites_user_updated", None),
+    ("SEARCH favorites USING INDEX ix_favorites_user_updated (user_id=?)", None),
+])
+def test_sqlite_scan_pattern(line, table):
+    match = _SQLITE_SCAN.match(line)
+    assert (match.group(1) if match else None) == table